@@ -0,0 +1,39 @@
+"""plan_balance
+
+Revision ID: 0840f4aff680
+Revises: c8cac6d2c776
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0840f4aff680'
+down_revision: Union[str, None] = 'c8cac6d2c776'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'plan_balance',
+        sa.Column('plan_id', sa.UUID(as_uuid=True), sa.ForeignKey('plan.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('balance', sa.DECIMAL(12, 2), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('plan_id')
+    )
+
+    op.execute("""
+        INSERT INTO plan_balance (plan_id, balance)
+        SELECT p.id, p.contribution + COALESCE(ec.total, 0) - COALESCE(r.total, 0)
+        FROM plan p
+        LEFT JOIN (SELECT plan_id, sum(contribution_value) AS total FROM extra_contribution GROUP BY plan_id) ec ON ec.plan_id = p.id
+        LEFT JOIN (SELECT plan_id, sum(rescue_value) AS total FROM rescue GROUP BY plan_id) r ON r.plan_id = p.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('plan_balance')
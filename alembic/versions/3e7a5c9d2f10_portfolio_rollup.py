@@ -0,0 +1,53 @@
+"""portfolio_rollup
+
+Revision ID: 3e7a5c9d2f10
+Revises: 9d4c2f1b6e85
+Create Date: 2026-10-17 17:48:05.630912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7a5c9d2f10'
+down_revision: Union[str, None] = '9d4c2f1b6e85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'portfolio_rollup',
+        sa.Column('product_id', sa.UUID(as_uuid=True), nullable=False),
+        sa.Column('age_band', sa.Integer(), nullable=False),
+        sa.Column('contract_month', sa.Date(), nullable=False),
+        sa.Column('plans', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('aum', sa.DECIMAL(16, 2), nullable=False, server_default='0'),
+        sa.Column('contributions', sa.DECIMAL(16, 2), nullable=False, server_default='0'),
+        sa.Column('rescues', sa.DECIMAL(16, 2), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('product_id', 'age_band', 'contract_month')
+    )
+
+    op.execute("""
+        INSERT INTO portfolio_rollup (product_id, age_band, contract_month, plans, aum, contributions, rescues)
+        SELECT p.product_id,
+            (extract(year FROM age((p.date_of_contract AT TIME ZONE 'UTC')::date, c.date_of_birth))::int / 10) * 10,
+            date_trunc('month', p.date_of_contract AT TIME ZONE 'UTC')::date,
+            count(*),
+            sum(COALESCE(b.balance, 0)),
+            sum(p.contribution + COALESCE(ec.total, 0)),
+            sum(COALESCE(r.total, 0))
+        FROM plan p
+        JOIN client c ON c.id = p.client_id
+        LEFT JOIN plan_balance b ON b.plan_id = p.id
+        LEFT JOIN LATERAL (SELECT sum(contribution_value) AS total FROM extra_contribution WHERE plan_id = p.id) ec ON true
+        LEFT JOIN LATERAL (SELECT sum(rescue_value) AS total FROM rescue WHERE plan_id = p.id) r ON true
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_rollup')
@@ -0,0 +1,45 @@
+"""query_indexes
+
+Revision ID: 5b1e9d3a7c42
+Revises: 0840f4aff680
+Create Date: 2026-10-17 14:05:12.402715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e9d3a7c42'
+down_revision: Union[str, None] = '0840f4aff680'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Índices das chaves estrangeiras usadas nos filtros (com o id para a paginação por cursor),
+# nas verificações de exclusão e nas buscas por nome, cpf e email.
+INDEXES = [
+    ('ix_plan_client_id_id', 'plan', ['client_id', 'id'], False),
+    ('ix_plan_product_id', 'plan', ['product_id'], False),
+    ('ix_extra_contribution_client_id_id', 'extra_contribution', ['client_id', 'id'], False),
+    ('ix_extra_contribution_plan_id', 'extra_contribution', ['plan_id'], False),
+    ('ix_rescue_plan_id_id', 'rescue', ['plan_id', 'id'], False),
+    ('ix_products_name', 'products', ['name'], False),
+    ('ix_client_cpf', 'client', ['cpf'], True),
+    ('ix_client_email_lower', 'client', [sa.text('lower(email)')], False),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY não bloqueia escritas, mas não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,26 @@
+"""plan_updated_at
+
+Revision ID: 9d4c2f1b6e85
+Revises: 5b1e9d3a7c42
+Create Date: 2026-10-17 16:22:37.815046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4c2f1b6e85'
+down_revision: Union[str, None] = '5b1e9d3a7c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('plan', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('plan', 'updated_at')
@@ -0,0 +1,54 @@
+"""rescue_eligibility
+
+Revision ID: b2f8e4a61c37
+Revises: 3e7a5c9d2f10
+Create Date: 2026-10-17 19:03:51.274409
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f8e4a61c37'
+down_revision: Union[str, None] = '3e7a5c9d2f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Registros anteriores a esta migração recebem a data da migração
+    op.add_column('rescue', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column('extra_contribution', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column('plan', sa.Column('next_eligible_rescue_date', sa.Date(), nullable=True))
+
+    op.execute("""
+        UPDATE plan p SET next_eligible_rescue_date = GREATEST(
+            (p.date_of_contract AT TIME ZONE 'UTC')::date + pr.lack_initial_of_rescue,
+            (SELECT (r.created_at AT TIME ZONE 'UTC')::date + pr.lack_entre_resgates
+             FROM rescue r WHERE r.plan_id = p.id ORDER BY r.created_at DESC LIMIT 1)
+        )
+        FROM products pr
+        WHERE pr.id = p.product_id
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_rescue_plan_id_created_at', 'rescue', ['plan_id', sa.text('created_at DESC')], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_extra_contribution_plan_id_created_at', 'extra_contribution', ['plan_id', sa.text('created_at DESC')], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_plan_next_eligible_rescue_date', 'plan', ['next_eligible_rescue_date'], postgresql_concurrently=True, if_not_exists=True)
+        # O índice (plan_id, created_at) também atende as buscas apenas por plan_id
+        op.drop_index('ix_extra_contribution_plan_id', table_name='extra_contribution', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_extra_contribution_plan_id', 'extra_contribution', ['plan_id'], postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_plan_next_eligible_rescue_date', table_name='plan', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_extra_contribution_plan_id_created_at', table_name='extra_contribution', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_rescue_plan_id_created_at', table_name='rescue', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('plan', 'next_eligible_rescue_date')
+    op.drop_column('extra_contribution', 'created_at')
+    op.drop_column('rescue', 'created_at')
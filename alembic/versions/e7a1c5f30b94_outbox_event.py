@@ -0,0 +1,47 @@
+"""outbox_event
+
+Revision ID: e7a1c5f30b94
+Revises: 6c0d8b3f4a92
+Create Date: 2026-10-17 22:41:09.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c5f30b94'
+down_revision: Union[str, None] = '6c0d8b3f4a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("dispatched_at IS NULL AND failed_at IS NULL")
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox_event',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('aggregate_type', sa.String(32), nullable=False),
+        sa.Column('aggregate_id', sa.UUID(), nullable=False),
+        sa.Column('event_type', sa.String(64), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('failed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_event_pending', 'outbox_event', ['id'], postgresql_where=PENDING)
+    op.create_index('ix_outbox_event_pending_aggregate', 'outbox_event', ['aggregate_id', 'id'], postgresql_where=PENDING)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_event_pending_aggregate', table_name='outbox_event')
+    op.drop_index('ix_outbox_event_pending', table_name='outbox_event')
+    op.drop_table('outbox_event')
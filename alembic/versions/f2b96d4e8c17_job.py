@@ -0,0 +1,49 @@
+"""job
+
+Revision ID: f2b96d4e8c17
+Revises: e7a1c5f30b94
+Create Date: 2026-10-17 23:58:31.204617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b96d4e8c17'
+down_revision: Union[str, None] = 'e7a1c5f30b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('kind', sa.String(64), nullable=False),
+        sa.Column('status', sa.String(16), server_default='queued', nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('result', postgresql.JSONB(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('progress', sa.SmallInteger(), server_default='0', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('worker', sa.String(128), nullable=True),
+        sa.Column('run_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_queued', 'job', ['run_at'], postgresql_where=sa.text("status = 'queued'"))
+    op.create_index('ix_job_running', 'job', ['heartbeat_at'], postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_running', table_name='job')
+    op.drop_index('ix_job_queued', table_name='job')
+    op.drop_table('job')
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Date, UUID, DECIMAL
+from database.session import Base
+
+
+class PortfolioRollup(Base):
+    __tablename__ = 'portfolio_rollup'
+
+    product_id = Column(UUID(as_uuid=True), primary_key=True)
+    age_band = Column(Integer, primary_key=True)
+    contract_month = Column(Date, primary_key=True)
+    plans = Column(Integer, nullable=False, default=0)
+    aum = Column(DECIMAL(16, 2), nullable=False, default=0)
+    contributions = Column(DECIMAL(16, 2), nullable=False, default=0)
+    rescues = Column(DECIMAL(16, 2), nullable=False, default=0)
@@ -0,0 +1,13 @@
+from api.v1.apps.analytics.service.service import rebuild_rollups
+import asyncio
+
+"""
+    Recalcula os rollups da carteira a partir das tabelas base.
+
+    Uso: python -m api.v1.apps.analytics.rebuild
+
+"""
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_rollups())
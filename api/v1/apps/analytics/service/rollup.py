@@ -0,0 +1,114 @@
+from api.v1.apps.analytics.models.models import PortfolioRollup
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from decimal import Decimal
+
+"""
+    Manutenção incremental das tabelas de consolidação da carteira (rollups).
+
+    Cada linha de `portfolio_rollup` acumula os planos de um produto, faixa etária (idade do
+    cliente na contratação, em faixas de 10 anos) e mês de contratação. Os serviços de planos,
+    aportes extras e resgates aplicam a diferença de cada operação com um único
+    INSERT ... ON CONFLICT DO UPDATE, na mesma transação da escrita. Assim as consultas de
+    análise leem apenas os rollups, cujo tamanho não depende do volume das tabelas base.
+
+"""
+
+ROLLUP_KEY = """
+    p.product_id,
+    (extract(year FROM age((p.date_of_contract AT TIME ZONE 'UTC')::date, c.date_of_birth))::int / 10) * 10,
+    date_trunc('month', p.date_of_contract AT TIME ZONE 'UTC')::date
+"""
+
+ROLLUP_UPSERT = """
+    ON CONFLICT (product_id, age_band, contract_month) DO UPDATE SET
+        plans = portfolio_rollup.plans + excluded.plans,
+        aum = portfolio_rollup.aum + excluded.aum,
+        contributions = portfolio_rollup.contributions + excluded.contributions,
+        rescues = portfolio_rollup.rescues + excluded.rescues
+"""
+
+RECORD_FLOW = text(f"""
+    INSERT INTO {PortfolioRollup.__tablename__} (product_id, age_band, contract_month, plans, aum, contributions, rescues)
+    SELECT {ROLLUP_KEY}, :plans, :aum, :contributions, :rescues
+    FROM plan p
+    JOIN client c ON c.id = p.client_id
+    WHERE p.id = :plan_id
+    {ROLLUP_UPSERT}
+""")
+
+PLANS_FOOTPRINT = """
+    INSERT INTO {table} (product_id, age_band, contract_month, plans, aum, contributions, rescues)
+    SELECT {key},
+        CAST(:sign AS integer) * count(*),
+        CAST(:sign AS integer) * sum(COALESCE(b.balance, 0)),
+        CAST(:sign AS integer) * sum(p.contribution + COALESCE(ec.total, 0)),
+        CAST(:sign AS integer) * sum(COALESCE(r.total, 0))
+    FROM plan p
+    JOIN client c ON c.id = p.client_id
+    LEFT JOIN plan_balance b ON b.plan_id = p.id
+    LEFT JOIN LATERAL (SELECT sum(contribution_value) AS total FROM extra_contribution WHERE plan_id = p.id) ec ON true
+    LEFT JOIN LATERAL (SELECT sum(rescue_value) AS total FROM rescue WHERE plan_id = p.id) r ON true
+    {where}
+    GROUP BY 1, 2, 3
+    {upsert}
+"""
+
+
+def _plans_footprint(where: str) -> str:
+    return PLANS_FOOTPRINT.format(table=PortfolioRollup.__tablename__, key=ROLLUP_KEY, where=where, upsert=ROLLUP_UPSERT)
+
+
+RECORD_PLAN = text(_plans_footprint("WHERE p.id = :plan_id"))
+RECORD_CLIENT_PLANS = text(_plans_footprint("WHERE p.client_id = :client_id"))
+REBUILD_ROLLUP = text(_plans_footprint(""))
+
+
+async def record_flow(session: AsyncSession, plan_id, plans: int = 0, aum=0, contributions=0, rescues=0) -> None:
+    """Aplica ao rollup do plano a diferença de uma operação
+
+    Args:
+        session (AsyncSession): Sessão da transação que fez a escrita.
+        plan_id: Identificador do plano afetado.
+        plans (int): Diferença na quantidade de planos.
+        aum: Diferença no patrimônio (saldo) do plano.
+        contributions: Diferença nos aportes (inicial e extras).
+        rescues: Diferença nos resgates.
+    """
+    await session.execute(RECORD_FLOW, {
+        "plan_id": plan_id,
+        "plans": plans,
+        "aum": Decimal(str(aum)),
+        "contributions": Decimal(str(contributions)),
+        "rescues": Decimal(str(rescues)),
+    })
+
+
+async def record_plan(session: AsyncSession, plan_id, sign: int) -> None:
+    """Soma (sign=1) ou retira (sign=-1) do rollup tudo o que o plano acumula
+
+    Usado quando a chave do rollup do plano pode mudar (produto, data de contratação ou
+    cliente): o plano é retirado antes da alteração e somado de novo depois dela.
+    """
+    await session.execute(RECORD_PLAN, {"plan_id": plan_id, "sign": sign})
+
+
+async def record_client_plans(session: AsyncSession, client_id, sign: int) -> None:
+    """Soma ou retira do rollup todos os planos do cliente (mudança na data de nascimento)"""
+    await session.execute(RECORD_CLIENT_PLANS, {"client_id": client_id, "sign": sign})
+
+
+async def rebuild(session: AsyncSession) -> int:
+    """Recalcula o rollup inteiro a partir das tabelas base
+
+    A tabela é bloqueada para escrita durante o recálculo, então operações concorrentes
+    aguardam e aplicam sua diferença sobre o resultado já recalculado.
+
+    Returns:
+        int: Quantidade de linhas do rollup.
+    """
+    table = PortfolioRollup.__tablename__
+    await session.execute(text(f"LOCK TABLE {table} IN EXCLUSIVE MODE"))
+    await session.execute(text(f"DELETE FROM {table}"))
+    result = await session.execute(REBUILD_ROLLUP, {"sign": 1})
+    return result.rowcount
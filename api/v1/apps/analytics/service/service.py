@@ -0,0 +1,103 @@
+from api.v1.apps.analytics.models.models import PortfolioRollup
+from api.v1.apps.analytics.service.rollup import rebuild
+from api.v1.apps.products.service.catalog import catalog
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import async_session
+from typing import List, Dict, Any, Optional
+from sqlalchemy import select, func
+from fastapi import HTTPException
+from loguru import logger
+from uuid import UUID
+
+"""
+    Nesse aquivo contém as consultas de análise da carteira.
+    Todas leem apenas a tabela `portfolio_rollup`, mantida pelos serviços de escrita.
+
+"""
+
+
+def _totals():
+    return (
+        func.sum(PortfolioRollup.plans).label('plans'),
+        func.sum(PortfolioRollup.aum).label('aum'),
+        func.sum(PortfolioRollup.contributions).label('contributions'),
+        func.sum(PortfolioRollup.rescues).label('rescues'),
+    )
+
+
+def _has_plans():
+    # Linhas esvaziadas por planos que mudaram de chave continuam no rollup com zero planos
+    return func.sum(PortfolioRollup.plans) > 0
+
+
+@async_session
+async def get_aum_by_product(session: AsyncSession) -> List[Dict[str, Any]]:
+    """Patrimônio, aportes e resgates por produto
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+
+    Returns:
+        List[Dict[str, Any]]: Totais de cada produto.
+    """
+    query = select(PortfolioRollup.product_id, *_totals()).group_by(PortfolioRollup.product_id).having(_has_plans()).order_by(PortfolioRollup.product_id)
+    rows = (await session.execute(query)).mappings().all()
+    products = await catalog.all(session)
+
+    return [
+        {**row, "product": products[row['product_id']].name if row['product_id'] in products else None}
+        for row in rows
+    ]
+
+
+@async_session
+async def get_aum_by_age_band(session: AsyncSession) -> List[Dict[str, Any]]:
+    """Patrimônio, aportes e resgates por faixa etária do cliente na contratação
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+
+    Returns:
+        List[Dict[str, Any]]: Totais de cada faixa (`age_band` é o início da faixa de 10 anos).
+    """
+    query = select(PortfolioRollup.age_band, *_totals()).group_by(PortfolioRollup.age_band).having(_has_plans()).order_by(PortfolioRollup.age_band)
+    return (await session.execute(query)).mappings().all()
+
+
+@async_session
+async def get_aum_by_contract_month(session: AsyncSession, product_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Patrimônio, aportes e resgates por mês de contratação
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        product_id (Optional[str]): Filtra os planos de um produto.
+
+    Returns:
+        List[Dict[str, Any]]: Totais de cada mês.
+    """
+    query = select(PortfolioRollup.contract_month, *_totals())
+
+    if product_id is not None:
+        try:
+            UUID(str(product_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="product_id inválido. Deve ser um UUID válido.")
+        query = query.where(PortfolioRollup.product_id == product_id)
+
+    query = query.group_by(PortfolioRollup.contract_month).having(_has_plans()).order_by(PortfolioRollup.contract_month)
+    return (await session.execute(query)).mappings().all()
+
+
+@async_session
+async def rebuild_rollups(session: AsyncSession) -> Dict[str, int]:
+    """Recalcula os rollups a partir das tabelas base
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+
+    Returns:
+        Dict[str, int]: Quantidade de linhas do rollup recalculado.
+    """
+    rows = await rebuild(session)
+    logger.success(f"Rollups da carteira recalculados ({rows} linhas)")
+    return {"rows": rows}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, DECIMAL, Date, Enum
+from sqlalchemy import Column, String, UUID, DECIMAL, Date, Enum, Index, func
 from sqlalchemy.orm import relationship
 from database.session import Base
 import uuid
@@ -6,6 +6,9 @@ import uuid
 
 class Client(Base):
     __tablename__ = 'client'
+    __table_args__ = (
+        Index('ix_client_cpf', 'cpf', unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), unique=True, primary_key=True, default=uuid.uuid4)
     cpf = Column(String(11), nullable=False)
@@ -17,3 +20,6 @@ class Client(Base):
 
     _plans = relationship('Plan', back_populates='_clients')
     _extra_contributions = relationship('ExtraContribution', back_populates='_clients')
+
+
+Index('ix_client_email_lower', func.lower(Client.email))
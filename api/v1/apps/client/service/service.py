@@ -1,9 +1,22 @@
 from api.v1.apps.client.schemas.schemas import ClientSchema, GenderTypeEnum
 from api.v1.apps.client.models.models import Client
+from api.v1.apps.plan.models.models import Plan
+from api.v1.apps.analytics.service.rollup import record_client_plans
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.session import async_session
-from typing import List, Dict, Optional
+from api.v1.core.pagination import paginate, decode_cursor, DEFAULT_PAGE_LIMIT
+from api.v1.core.export import stream_table, ExportFormatEnum, ExportCompressionEnum
+from api.v1.core.ingest import to_columns, check_column
+from typing import List, Dict, Optional, AsyncIterator, Any
 from sqlalchemy.future import select
+from sqlalchemy import any_, bindparam, func, String
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.dialects.postgresql import ARRAY
+from datetime import date
+from decimal import Decimal
+import uuid
+import re
 from loguru import logger
 from fastapi import HTTPException
 from uuid import UUID
@@ -57,27 +70,31 @@ async def insert(session: AsyncSession, args: Dict[str, any]) -> Dict[str, str]:
         raise HTTPException(status_code=400, detail="Informe um valor válido para a renda mensal.")
     
     session.add(new_client)
-    await session.commit()
-    await session.refresh(new_client)
+    try:
+        await session.flush()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Já existe um cliente cadastrado com este cpf ou email.")
     logger.success("Novo cliente registrado com sucesso")
     return {"id": str(new_client.id)}
 
 @async_session
-async def get_all(session: AsyncSession, client_schema) -> List[ClientSchema]:
+async def get_all(session: AsyncSession, client_schema, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Função para listar todos os clientes
     
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         client_schema: Esquema do cliente.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        List[ClientSchema]: Lista de clientes.
+        Dict: Página com a lista de clientes e o cursor da próxima página.
     """
+    after = decode_cursor(cursor)
+
     try:
-        query = select(Client)
-        result = await session.execute(query)
-        list: List[client_schema] = result.scalars().all()
-        return list
+        query = select(*Client.__table__.c)
+        return await paginate(session, query, Client.id, limit, after)
     except Exception as e:
         logger.error(f"Erro ao listar aportes: {e}")
         raise HTTPException(status_code=500, detail="Erro ao listar clientes")
@@ -101,6 +118,59 @@ async def get_one(session: AsyncSession, client_id: str) -> Dict:
     obj_client = obj.scalar_one()
     return obj_client
 
+def _columns(obj) -> Dict[str, Any]:
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+@async_session
+async def get_summary(session: AsyncSession, client_id: str) -> Dict[str, Any]:
+    """Resgata o cliente com todos os seus planos, produtos, aportes extras, resgates e saldos
+
+    Os relacionamentos são carregados de forma antecipada: produto e saldo vêm junto com os
+    planos (JOIN) e aportes e resgates em uma consulta cada (IN), então a quantidade de
+    consultas é fixa, independente do número de planos do cliente.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        client_id (str): Identificador do cliente.
+
+    Returns:
+        Dict[str, Any]: Cliente com a árvore de planos.
+    """
+    try:
+        UUID(str(client_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="client_id inválido. Deve ser um UUID válido.")
+
+    query = (
+        select(Client)
+        .where(Client.id == client_id)
+        .options(
+            selectinload(Client._plans).options(
+                joinedload(Plan._products),
+                joinedload(Plan._balance),
+                selectinload(Plan._extra_contributions),
+                selectinload(Plan._rescues),
+            )
+        )
+    )
+    obj_client = (await session.execute(query)).scalar_one_or_none()
+
+    if obj_client is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado.")
+
+    plans = []
+    for plan in sorted(obj_client._plans, key=lambda plan: plan.date_of_contract):
+        plans.append({
+            **_columns(plan),
+            "balance": plan._balance.balance if plan._balance is not None else None,
+            "product": _columns(plan._products),
+            "extra_contributions": [_columns(extra_contribution) for extra_contribution in plan._extra_contributions],
+            "rescues": [_columns(rescue) for rescue in plan._rescues],
+        })
+
+    return {**_columns(obj_client), "plans": plans}
+
 @async_session
 async def get_client_by_email(session: AsyncSession, client_email: str) -> Dict:
     """Resgata um cliente pelo email
@@ -116,9 +186,8 @@ async def get_client_by_email(session: AsyncSession, client_email: str) -> Dict:
     if not client_email:
         raise HTTPException(status_code=400, detail="Informe um email válido para o cliente.")
 
-    obj = await session.execute(select(Client).where(Client.email == client_email))
-    obj_client = obj.scalars().all()
-    return obj_client
+    obj = await session.execute(select(*Client.__table__.c).where(func.lower(Client.email) == client_email.lower()))
+    return [dict(row) for row in obj.mappings()]
     
 @async_session
 async def update(session: AsyncSession, client_id: str, **kwargs) -> Dict[str, Optional[str]]:
@@ -152,11 +221,22 @@ async def update(session: AsyncSession, client_id: str, **kwargs) -> Dict[str, O
     if not existing_client:
         raise HTTPException(status_code=400, detail="Cliente não encontrado")
 
+    date_of_birth = kwargs.get('date_of_birth')
+    moves_age_band = date_of_birth is not None and date_of_birth != existing_client.date_of_birth
+    if moves_age_band:
+        await record_client_plans(session, existing_client.id, -1)
+
     for key, value in kwargs.items():
         if value is not None and hasattr(existing_client, key):
             setattr(existing_client, key, value)
 
-    await session.commit()
+    try:
+        await session.flush()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Já existe um cliente cadastrado com este cpf ou email.")
+
+    if moves_age_band:
+        await record_client_plans(session, existing_client.id, 1)
     return {"message": f"Cliente {existing_client.id}: atualizado com sucesso"}
    
 
@@ -183,7 +263,140 @@ async def remove(session: AsyncSession, client_id: str) -> Dict[str, str]:
         raise HTTPException(status_code=404, detail="Cliente não encontrado.")
 
     await session.delete(obj_client)
-    await session.commit()
+    await session.flush()
     return {"message": f"Cliente {obj_client.id}: deletado com sucesso"}
-    
-   
\ No newline at end of file
+
+
+def export(session: AsyncSession, export_format: ExportFormatEnum, compression: Optional[ExportCompressionEnum] = None) -> AsyncIterator[bytes]:
+    """Exporta todos os clientes em streaming por um cursor do servidor
+
+    Args:
+        session (AsyncSession): Sessão da requisição, mantida aberta até o fim do streaming.
+        export_format (ExportFormatEnum): Formato de saída (ndjson ou csv).
+        compression (Optional[ExportCompressionEnum]): Compressão aplicada à saída.
+
+    Returns:
+        AsyncIterator[bytes]: Blocos do arquivo exportado.
+    """
+    return stream_table(session, Client.__table__, export_format, compression)
+
+
+CPF_PATTERN = re.compile(r"^\d{11}$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+MAX_MONTHLY_INCOME = Decimal("99999999.99")
+BULK_CLIENT_FIELDS = ['cpf', 'name', 'email', 'date_of_birth', 'gender', 'monthly_income']
+
+
+def _parse_cpf(value: Any) -> str:
+    cpf = str(value or "").strip()
+    if not CPF_PATTERN.match(cpf):
+        raise ValueError(cpf)
+    return cpf
+
+
+def _parse_name(value: Any) -> str:
+    name = str(value or "").strip()
+    if not name or len(name) > 320:
+        raise ValueError(name)
+    return name
+
+
+def _parse_email(value: Any) -> str:
+    email = str(value or "").strip()
+    if len(email) > 320 or not EMAIL_PATTERN.match(email):
+        raise ValueError(email)
+    return email
+
+
+def _parse_gender(value: Any) -> str:
+    return GenderTypeEnum(value).value
+
+
+def _parse_monthly_income(value: Any) -> Decimal:
+    monthly_income = Decimal(str(value)).quantize(Decimal("0.01"))
+    if not 0 < monthly_income <= MAX_MONTHLY_INCOME:
+        raise ValueError(value)
+    return monthly_income
+
+
+@async_session
+async def bulk_insert(session: AsyncSession, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cadastra clientes em lote utilizando COPY
+
+    O formato de cada campo é validado em memória, os cpfs e emails já cadastrados são
+    verificados com uma consulta cada para o arquivo inteiro e as linhas válidas são gravadas
+    com um único COPY.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        records (List[Dict[str, Any]]): Linhas do arquivo enviado.
+
+    Returns:
+        Dict[str, Any]: Relatório com o resultado de cada linha.
+    """
+    columns = to_columns(records, BULK_CLIENT_FIELDS)
+    errors: List[List[str]] = [[] for _ in records]
+
+    cpfs = check_column(columns['cpf'], _parse_cpf, "Informe um valor válido para o cpf", errors)
+    names = check_column(columns['name'], _parse_name, "Informe um valor válido para o nome.", errors)
+    emails = check_column(columns['email'], _parse_email, "Informe um valor válido para o email", errors)
+    dates_of_birth = check_column(columns['date_of_birth'], lambda value: date.fromisoformat(str(value)), "Informe um valor válido para a data de nascimento.", errors)
+    genders = check_column(columns['gender'], _parse_gender, "Informe um valor válido para o gênero.", errors)
+    monthly_incomes = check_column(columns['monthly_income'], _parse_monthly_income, "Informe um valor válido para a renda mensal.", errors)
+
+    seen_cpfs = set()
+    for index, cpf in enumerate(cpfs):
+        if cpf is None:
+            continue
+        if cpf in seen_cpfs:
+            errors[index].append("CPF duplicado no arquivo.")
+        seen_cpfs.add(cpf)
+
+    seen_emails = set()
+    for index, email in enumerate(emails):
+        if email is None:
+            continue
+        # O índice único é em lower(email): emails que diferem só nas maiúsculas são o mesmo
+        if email.lower() in seen_emails:
+            errors[index].append("Email duplicado no arquivo.")
+        seen_emails.add(email.lower())
+
+    if seen_cpfs:
+        registered_query = select(Client.cpf).where(Client.cpf == any_(bindparam('cpfs', list(seen_cpfs), type_=ARRAY(String))))
+        registered_cpfs = set((await session.execute(registered_query)).scalars().all())
+        for index, cpf in enumerate(cpfs):
+            if cpf in registered_cpfs:
+                errors[index].append("CPF já cadastrado.")
+
+    if seen_emails:
+        registered_query = (
+            select(func.lower(Client.email))
+            .where(func.lower(Client.email) == any_(bindparam('emails', list(seen_emails), type_=ARRAY(String))))
+        )
+        registered_emails = set((await session.execute(registered_query)).scalars().all())
+        for index, email in enumerate(emails):
+            if email is not None and email.lower() in registered_emails:
+                errors[index].append("Email já cadastrado.")
+
+    results = []
+    copy_records = []
+    for index, row_errors in enumerate(errors):
+        if row_errors:
+            results.append({"row": index + 1, "status": "rejected", "errors": row_errors})
+            continue
+
+        client_id = uuid.uuid4()
+        copy_records.append((client_id, cpfs[index], names[index], emails[index], dates_of_birth[index], genders[index], monthly_incomes[index]))
+        results.append({"row": index + 1, "status": "created", "id": str(client_id)})
+
+    if copy_records:
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Client.__tablename__,
+            records=copy_records,
+            columns=['id', 'cpf', 'name', 'email', 'date_of_birth', 'gender', 'monthly_income'],
+        )
+
+    logger.success(f"{len(copy_records)} clientes registrados em lote")
+    return {"created": len(copy_records), "rejected": len(records) - len(copy_records), "results": results}
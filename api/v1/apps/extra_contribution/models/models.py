@@ -1,4 +1,4 @@
-from sqlalchemy import Column, UUID, DECIMAL, ForeignKey
+from sqlalchemy import Column, UUID, DECIMAL, DateTime, ForeignKey, Index, func, text
 from sqlalchemy.orm import relationship
 from database.session import Base
 import uuid
@@ -6,11 +6,16 @@ import uuid
 
 class ExtraContribution(Base):
     __tablename__ = 'extra_contribution'
+    __table_args__ = (
+        Index('ix_extra_contribution_client_id_id', 'client_id', 'id'),
+        Index('ix_extra_contribution_plan_id_created_at', 'plan_id', text('created_at DESC')),
+    )
 
     id = Column(UUID(as_uuid=True), unique=True, primary_key=True, default=uuid.uuid4)
     client_id = Column(UUID(as_uuid=True), ForeignKey('client.id'), nullable=False)
     plan_id = Column(UUID(as_uuid=True), ForeignKey('plan.id'), nullable=False)
     contribution_value = Column(DECIMAL(10, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     _clients = relationship('Client', back_populates='_extra_contributions')
     _plans = relationship('Plan', back_populates='_extra_contributions')
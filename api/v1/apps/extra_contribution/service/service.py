@@ -1,9 +1,20 @@
 from api.v1.apps.extra_contribution.schemas.schemas import ExtraContributionSchema
 from api.v1.apps.extra_contribution.models.models import ExtraContribution
+from api.v1.apps.plan_balance.service.service import credit, debit, adjust as adjust_balance
+from api.v1.apps.analytics.service.rollup import record_flow, ROLLUP_KEY, ROLLUP_UPSERT
+from api.v1.apps.plan.service.service import get_owner as get_plan_owner
+from api.v1.websockets.events import emit_plan_event, PLAN_AGGREGATE
+from api.v1.apps.outbox.service.service import OUTBOX_PENDING
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.session import async_session
-from typing import List, Dict, Optional
+from api.v1.core.pagination import paginate, decode_cursor, DEFAULT_PAGE_LIMIT
+from api.v1.core.export import stream_table, ExportFormatEnum, ExportCompressionEnum
+from api.v1.core.ingest import to_columns, check_column
+from typing import List, Dict, Optional, AsyncIterator, Any
 from sqlalchemy.future import select
+from sqlalchemy import text
+from decimal import Decimal
+import uuid
 from loguru import logger
 from fastapi import HTTPException
 from uuid import UUID
@@ -49,27 +60,36 @@ async def insert(session: AsyncSession, args: Dict[str, any]) -> Dict[str, str]:
         raise HTTPException(status_code=400, detail="Não é possível realizar aporte extra com valor menor que R$ 100,00.")
     
     session.add(new_extra_contribution)
-    await session.commit()
+    await session.flush()
+    balance = await credit(session, new_extra_contribution.plan_id, new_extra_contribution.contribution_value)
+    await record_flow(session, new_extra_contribution.plan_id, aum=new_extra_contribution.contribution_value,
+                      contributions=new_extra_contribution.contribution_value)
+    await emit_plan_event(session, "extra_contribution.created", new_extra_contribution.plan_id,
+                          await get_plan_owner(session=session, plan_id=new_extra_contribution.plan_id), balance,
+                          extra_contribution_id=new_extra_contribution.id,
+                          contribution_value=new_extra_contribution.contribution_value)
     logger.success("Novo aporte registrado com sucesso")
     return {"id": str(new_extra_contribution.id)}
 
 
 @async_session
-async def get_all(session: AsyncSession, extra_contribution_schema) -> List[ExtraContributionSchema]:
+async def get_all(session: AsyncSession, extra_contribution_schema, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Função para listar todos os aportes extras
     
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         extra_contribution_schema: Esquema do aporte
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        List[ExtraContributionSchema]: Lista de aportes extras.
+        Dict: Página com a lista de aportes extras e o cursor da próxima página.
     """
+    after = decode_cursor(cursor)
+
     try:
-        query = select(ExtraContribution)
-        result = await session.execute(query)
-        list: List[extra_contribution_schema] = result.scalars().all()
-        return list
+        query = select(*ExtraContribution.__table__.c)
+        return await paginate(session, query, ExtraContribution.id, limit, after)
     except Exception as e:
         logger.error(f"Erro ao listar aportes: {e}")
         raise HTTPException(status_code=500, detail="Erro ao listar aportes extra")
@@ -94,14 +114,16 @@ async def get_one(session: AsyncSession, extra_contribution_id: str) -> Dict:
     return obj_extra_contribution
 
 @async_session
-async def get_extra_contribution_by_client_id(session: AsyncSession, client_id: str) -> Dict:
+async def get_extra_contribution_by_client_id(session: AsyncSession, client_id: str, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Resgata um cliente pelo nome
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         client_id (str): Id do cliente a ser resgatado.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        Dict: Dicionário com mensagem de sucesso ou falha.
+        Dict: Página com a lista de aportes extras e o cursor da próxima página.
 
     """
     try:
@@ -109,9 +131,9 @@ async def get_extra_contribution_by_client_id(session: AsyncSession, client_id:
     except ValueError:
         raise HTTPException(status_code=400, detail="client_id inválido. Deve ser um UUID válido.")
 
-    obj = await session.execute(select(ExtraContribution).where(ExtraContribution.client_id == client_id))
-    obj_extra_contrbution = obj.scalars().all()
-    return obj_extra_contrbution
+    after = decode_cursor(cursor)
+    query = select(*ExtraContribution.__table__.c).where(ExtraContribution.client_id == client_id)
+    return await paginate(session, query, ExtraContribution.id, limit, after)
     
 @async_session
 async def update(session: AsyncSession, extra_contribution_id: str, **kwargs) -> Dict[str, Optional[str]]:
@@ -154,11 +176,34 @@ async def update(session: AsyncSession, extra_contribution_id: str, **kwargs) ->
     if contribution_value < min_contribution_value:
         raise HTTPException(status_code=400, detail="Não é possível realizar aporte extra com valor menor que R$ 100,00.")
 
+    previous_plan_id = existing_extra_contribution.plan_id
+    previous_value = existing_extra_contribution.contribution_value
+
     for key, value in kwargs.items():
         if value is not None and hasattr(existing_extra_contribution, key):
             setattr(existing_extra_contribution, key, value)
 
-    await session.commit()
+    await session.flush()
+
+    if str(previous_plan_id) != str(plan_id):
+        previous_balance = await debit(session, previous_plan_id, previous_value)
+        if previous_balance is None:
+            raise HTTPException(status_code=400, detail="Não há saldo suficiente no plano anterior para transferir o aporte extra.")
+        balance = await credit(session, plan_id, contribution_value)
+        await record_flow(session, previous_plan_id, aum=-previous_value, contributions=-previous_value)
+        await record_flow(session, plan_id, aum=contribution_value, contributions=contribution_value)
+        await emit_plan_event(session, "extra_contribution.updated", previous_plan_id,
+                              await get_plan_owner(session=session, plan_id=previous_plan_id), previous_balance,
+                              extra_contribution_id=existing_extra_contribution.id)
+    else:
+        delta = Decimal(str(contribution_value)) - previous_value
+        balance = await adjust_balance(session, plan_id, delta, "Não há saldo suficiente para reduzir o aporte extra.")
+        await record_flow(session, plan_id, aum=delta, contributions=delta)
+
+    await emit_plan_event(session, "extra_contribution.updated", plan_id,
+                          await get_plan_owner(session=session, plan_id=plan_id), balance,
+                          extra_contribution_id=existing_extra_contribution.id,
+                          contribution_value=contribution_value)
     return {"message": f"Aporte extra {existing_extra_contribution.id}: atualizado com sucesso"}
    
 @async_session
@@ -184,8 +229,144 @@ async def remove(session: AsyncSession, extra_contribution_id: str) -> Dict[str,
     if obj_extra_contribution is None:
         raise HTTPException(status_code=404, detail="Cliente não encontrado.")
     
+    if await debit(session, obj_extra_contribution.plan_id, obj_extra_contribution.contribution_value) is None:
+        raise HTTPException(status_code=400, detail="Não há saldo suficiente para remover o aporte extra.")
+    await record_flow(session, obj_extra_contribution.plan_id, aum=-obj_extra_contribution.contribution_value,
+                      contributions=-obj_extra_contribution.contribution_value)
+
     await session.delete(obj_extra_contribution)
-    await session.commit()
+    await session.flush()
     return {"message": f"Aporte {obj_extra_contribution.id}: deletado com sucesso"}
-    
-   
\ No newline at end of file
+
+
+def export(session: AsyncSession, export_format: ExportFormatEnum, compression: Optional[ExportCompressionEnum] = None) -> AsyncIterator[bytes]:
+    """Exporta todos os aportes extras em streaming por um cursor do servidor
+
+    Args:
+        session (AsyncSession): Sessão da requisição, mantida aberta até o fim do streaming.
+        export_format (ExportFormatEnum): Formato de saída (ndjson ou csv).
+        compression (Optional[ExportCompressionEnum]): Compressão aplicada à saída.
+
+    Returns:
+        AsyncIterator[bytes]: Blocos do arquivo exportado.
+    """
+    return stream_table(session, ExtraContribution.__table__, export_format, compression)
+
+
+BATCH_FIELDS = ['client_id', 'plan_id', 'contribution_value']
+MAX_CONTRIBUTION_VALUE = Decimal("99999999.99")
+
+CREATE_STAGING_TABLE = text("""
+    CREATE TEMP TABLE extra_contribution_staging (
+        row_number integer NOT NULL,
+        id uuid NOT NULL,
+        client_id uuid NOT NULL,
+        plan_id uuid NOT NULL,
+        contribution_value numeric(10, 2) NOT NULL
+    ) ON COMMIT DROP
+""")
+
+VALIDATE_AND_INSERT_STAGING = text(f"""
+    WITH checked AS (
+        SELECT s.row_number, s.id, s.client_id, s.plan_id, s.contribution_value,
+            CASE
+                WHEN p.id IS NULL THEN 'Plano não encontrado.'
+                WHEN p.client_id <> s.client_id THEN 'O plano informado não pertence ao cliente.'
+                WHEN s.contribution_value < :min_contribution_value THEN 'Não é possível realizar aporte extra com valor menor que R$ 100,00.'
+                WHEN s.contribution_value < pr.value_minimum_aporte_extra THEN 'Valor do aporte extra menor que o mínimo exigido pelo produto.'
+            END AS reason
+        FROM extra_contribution_staging s
+        LEFT JOIN plan p ON p.id = s.plan_id
+        LEFT JOIN products pr ON pr.id = p.product_id
+    ), inserted AS (
+        INSERT INTO extra_contribution (id, client_id, plan_id, contribution_value)
+        SELECT id, client_id, plan_id, contribution_value FROM checked WHERE reason IS NULL
+        RETURNING plan_id, contribution_value
+    ), credited AS (
+        UPDATE plan_balance b SET balance = b.balance + i.total
+        FROM (SELECT plan_id, count(*) AS contributions, sum(contribution_value) AS total FROM inserted GROUP BY plan_id) i
+        WHERE b.plan_id = i.plan_id
+        RETURNING b.plan_id, b.balance, i.contributions, i.total
+    ), events AS (
+        INSERT INTO outbox_event (aggregate_type, aggregate_id, event_type, payload)
+        SELECT :aggregate_type, c.plan_id, CAST(:event_type AS varchar), jsonb_build_object(
+            'event', CAST(:event_type AS varchar), 'plan_id', c.plan_id, 'client_id', p.client_id,
+            'contributions', c.contributions, 'contribution_value', c.total, 'balance', c.balance)
+        FROM credited c
+        JOIN plan p ON p.id = c.plan_id
+        ORDER BY c.plan_id
+    ), rolled_up AS (
+        INSERT INTO portfolio_rollup (product_id, age_band, contract_month, plans, aum, contributions, rescues)
+        SELECT {ROLLUP_KEY}, 0, sum(i.contribution_value), sum(i.contribution_value), 0
+        FROM inserted i
+        JOIN plan p ON p.id = i.plan_id
+        JOIN client c ON c.id = p.client_id
+        GROUP BY 1, 2, 3
+        {ROLLUP_UPSERT}
+    )
+    SELECT row_number, reason FROM checked WHERE reason IS NOT NULL ORDER BY row_number
+""")
+
+
+def _parse_uuid(value: Any) -> uuid.UUID:
+    return uuid.UUID(str(value))
+
+
+def _parse_contribution_value(value: Any) -> Decimal:
+    contribution_value = Decimal(str(value)).quantize(Decimal("0.01"))
+    if not contribution_value.is_finite() or contribution_value > MAX_CONTRIBUTION_VALUE:
+        raise ValueError(value)
+    return contribution_value
+
+
+@async_session
+async def batch_insert(session: AsyncSession, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Registra aportes extras em lote (arquivo da folha de pagamento)
+
+    As linhas válidas quanto ao formato são copiadas para uma tabela temporária e a
+    verificação de plano x cliente e dos valores mínimos é feita com um único join, no mesmo
+    comando que grava todas as linhas aprovadas e um evento `extra_contribution.batch_created`
+    no outbox para cada plano creditado.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        records (List[Dict[str, Any]]): Linhas do arquivo enviado.
+
+    Returns:
+        Dict[str, Any]: Quantidade de aportes registrados e as linhas rejeitadas com o motivo.
+    """
+    min_contribution_value: float = 100.00
+    columns = to_columns(records, BATCH_FIELDS)
+    errors: List[List[str]] = [[] for _ in records]
+
+    client_ids = check_column(columns['client_id'], _parse_uuid, "client_id inválido. Deve ser um UUID válido.", errors)
+    plan_ids = check_column(columns['plan_id'], _parse_uuid, "plan_id inválido. Deve ser um UUID válido.", errors)
+    values = check_column(columns['contribution_value'], _parse_contribution_value, "Informe um valor válido para o aporte extra.", errors)
+
+    rejected = [{"row": index + 1, "reason": "; ".join(row_errors)} for index, row_errors in enumerate(errors) if row_errors]
+    staging_records = [
+        (index + 1, uuid.uuid4(), client_ids[index], plan_ids[index], values[index])
+        for index, row_errors in enumerate(errors) if not row_errors
+    ]
+
+    if staging_records:
+        await session.execute(CREATE_STAGING_TABLE)
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            'extra_contribution_staging',
+            records=staging_records,
+            columns=['row_number', 'id', 'client_id', 'plan_id', 'contribution_value'],
+        )
+
+        result = await session.execute(VALIDATE_AND_INSERT_STAGING, {"min_contribution_value": min_contribution_value,
+                                                                     "aggregate_type": PLAN_AGGREGATE,
+                                                                     "event_type": "extra_contribution.batch_created"})
+        rejected.extend({"row": row.row_number, "reason": row.reason} for row in result)
+        rejected.sort(key=lambda item: item["row"])
+
+    inserted = len(records) - len(rejected)
+    if inserted:
+        session.info[OUTBOX_PENDING] = True
+    logger.success(f"{inserted} aportes extras registrados em lote")
+    return {"inserted": inserted, "rejected": rejected}
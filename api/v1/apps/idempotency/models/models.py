@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from database.session import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_key'
+    __table_args__ = (
+        Index('ix_idempotency_key_expires_at', 'expires_at'),
+    )
+
+    scope = Column(String(64), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSONB, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,14 @@
+from api.v1.apps.idempotency.service.service import purge_expired
+from loguru import logger
+import asyncio
+
+"""
+    Remove as chaves de idempotência expiradas.
+
+    Uso: python -m api.v1.apps.idempotency.purge
+
+"""
+
+
+if __name__ == "__main__":
+    logger.success(f"{asyncio.run(purge_expired())} chaves de idempotência expiradas removidas")
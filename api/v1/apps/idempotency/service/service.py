@@ -0,0 +1,149 @@
+from api.v1.apps.idempotency.models.models import IdempotencyKey
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database.session import async_session, unit_of_work
+from api.v1.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, delete, func
+from fastapi import HTTPException
+from loguru import logger
+import hashlib
+import json
+import time
+
+"""
+    Chaves de idempotência (header `Idempotency-Key`) para as rotas de criação.
+
+    A primeira requisição com uma chave grava a chave na tabela `idempotency_key` na mesma
+    transação da operação, junto com a resposta. Uma repetição com a mesma chave devolve a
+    resposta gravada sem refazer validações nem consultar produtos, planos ou saldos: primeiro
+    pelo cache em memória do worker (LRU com expiração) e, se não estiver lá, com uma única
+    consulta à tabela. Repetições simultâneas aguardam a primeira terminar, pois a gravação da
+    chave fica bloqueada pelo índice único até o commit.
+
+"""
+
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyCache:
+    """Cache LRU das respostas já gravadas, com expiração"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[str, int, Any]]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Tuple[str, str], value: Tuple[str, int, Any], ttl_seconds: float) -> None:
+        self._items[key] = (time.monotonic() + ttl_seconds, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+idempotency_cache = IdempotencyCache(settings.IDEMPOTENCY_CACHE_SIZE)
+
+
+def request_hash(payload: Dict[str, Any]) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _replay(stored_hash: str, current_hash: str, status_code: int, response: Any) -> JSONResponse:
+    if stored_hash != current_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key já utilizada em uma requisição diferente.")
+    return JSONResponse(status_code=status_code, content=response, headers={REPLAYED_HEADER: 'true'})
+
+
+async def run_idempotent(session: AsyncSession, scope: str, key: Optional[str], payload: Dict[str, Any],
+                         handler: Callable[[], Awaitable[Any]], status_code: int = 201) -> Any:
+    """Executa a operação uma única vez por chave de idempotência
+
+    Args:
+        session (AsyncSession): Sessão da requisição, usada também pela operação.
+        scope (str): Rota protegida (a mesma chave pode ser usada em rotas diferentes).
+        key (Optional[str]): Valor do header `Idempotency-Key`. Sem chave, a operação é executada normalmente.
+        payload (Dict[str, Any]): Corpo da requisição, usado para detectar reuso da chave com outro conteúdo.
+        handler (Callable[[], Awaitable[Any]]): Operação a ser executada.
+        status_code (int): Status HTTP da resposta da operação.
+
+    Returns:
+        Any: Resposta da operação ou a resposta gravada, quando é uma repetição.
+    """
+    if not key:
+        return await handler()
+
+    current_hash = request_hash(payload)
+    cached = idempotency_cache.get((scope, key))
+    if cached is not None:
+        stored_hash, stored_status_code, stored_response = cached
+        return _replay(stored_hash, current_hash, stored_status_code, stored_response)
+
+    ttl = timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    async with unit_of_work(session):
+        claim = pg_insert(IdempotencyKey).values(scope=scope, key=key, request_hash=current_hash, expires_at=func.now() + ttl)
+        claim = claim.on_conflict_do_update(
+            index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+            set_={
+                "request_hash": claim.excluded.request_hash,
+                "expires_at": claim.excluded.expires_at,
+                "status_code": None,
+                "response": None,
+            },
+            where=IdempotencyKey.expires_at <= func.now(),
+        ).returning(IdempotencyKey.key)
+
+        if await session.scalar(claim) is None:
+            stored = (await session.execute(
+                select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response, IdempotencyKey.expires_at)
+                .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+            )).one()
+            remaining = (stored.expires_at - datetime.now(timezone.utc)).total_seconds()
+            if remaining > 0:
+                idempotency_cache.set((scope, key), (stored.request_hash, stored.status_code, stored.response), remaining)
+            logger.info(f"Requisição repetida com Idempotency-Key {key} em {scope}")
+            return _replay(stored.request_hash, current_hash, stored.status_code, stored.response)
+
+        response = jsonable_encoder(await handler())
+        await session.execute(
+            IdempotencyKey.__table__.update()
+            .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+            .values(status_code=status_code, response=response)
+        )
+
+    idempotency_cache.set((scope, key), (current_hash, status_code, response), ttl.total_seconds())
+    return response
+
+
+@async_session
+async def purge_expired(session: AsyncSession) -> int:
+    """Remove as chaves expiradas
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+
+    Returns:
+        int: Quantidade de chaves removidas.
+    """
+    result = await session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= func.now()))
+    return result.rowcount
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, UUID, String, Integer, SmallInteger, DateTime, Text, Index, text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from database.session import Base
+import uuid
+
+
+class Job(Base):
+    __tablename__ = 'job'
+    __table_args__ = (
+        Index('ix_job_queued', 'run_at', postgresql_where=text("status = 'queued'")),
+        Index('ix_job_running', 'heartbeat_at', postgresql_where=text("status = 'running'")),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False, server_default='queued')
+    payload = Column(JSONB, nullable=False)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    progress = Column(SmallInteger, nullable=False, server_default='0')
+    attempts = Column(Integer, nullable=False, server_default='0')
+    max_attempts = Column(Integer, nullable=False)
+    worker = Column(String(128), nullable=True)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
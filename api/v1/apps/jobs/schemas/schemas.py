@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class JobStatusEnum(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
@@ -0,0 +1,43 @@
+from api.v1.apps.jobs.service.registry import JobContext, job_handler
+from api.v1.apps.client.service.service import bulk_insert as bulk_insert_clients
+from api.v1.apps.extra_contribution.service.service import batch_insert as batch_insert_extra_contributions
+from api.v1.apps.projection.service.service import project_plans
+from typing import Any, Dict, List
+
+"""
+    Jobs executados pelo `worker.py`.
+
+    Cada função recebe o payload gravado pela rota que enfileirou o job e devolve o resultado
+    que fica disponível em `/jobs/get-one-job/{job_id}/`. As operações usam as mesmas funções de
+    serviço das rotas síncronas, na sessão do job: as linhas importadas só são gravadas junto
+    com a conclusão do job, e uma repetição não as importa novamente.
+
+"""
+
+CLIENTS_BULK_IMPORT = 'clients.bulk_import'
+EXTRA_CONTRIBUTIONS_BATCH_IMPORT = 'extra_contributions.batch_import'
+PROJECTIONS_BATCH = 'projections.batch'
+
+PROJECTION_JOB_CHUNK: int = 1000
+
+
+@job_handler(CLIENTS_BULK_IMPORT)
+async def clients_bulk_import(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await bulk_insert_clients(records=payload["records"], session=context.session)
+
+
+@job_handler(EXTRA_CONTRIBUTIONS_BATCH_IMPORT)
+async def extra_contributions_batch_import(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await batch_insert_extra_contributions(records=payload["records"], session=context.session)
+
+
+@job_handler(PROJECTIONS_BATCH)
+async def projections_batch(context: JobContext, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Projeta os planos em blocos de `PROJECTION_JOB_CHUNK`, registrando o progresso a cada bloco"""
+    plan_ids = payload["plan_ids"]
+    projections: List[Dict[str, Any]] = []
+    for start in range(0, len(plan_ids), PROJECTION_JOB_CHUNK):
+        chunk = plan_ids[start:start + PROJECTION_JOB_CHUNK]
+        projections.extend(await project_plans(chunk, payload["annual_rate"], payload["monthly_contribution"]))
+        await context.progress(start + len(chunk), len(plan_ids))
+    return projections
@@ -0,0 +1,41 @@
+from api.v1.apps.jobs.service.service import set_progress
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Awaitable, Callable, Dict
+from uuid import UUID
+
+"""
+    Registro dos tipos de job e o contexto entregue a cada execução.
+
+"""
+
+
+class JobContext:
+    """Dados da execução corrente de um job
+
+    As escritas do job devem usar `session`: elas são confirmadas junto com a conclusão do job.
+    """
+
+    __slots__ = ("job_id", "worker", "attempts", "session")
+
+    def __init__(self, job_id: UUID, worker: str, attempts: int, session: AsyncSession):
+        self.job_id = job_id
+        self.worker = worker
+        self.attempts = attempts
+        self.session = session
+
+    async def progress(self, done: int, total: int) -> None:
+        """Registra o progresso do job (e renova a sua reserva)"""
+        await set_progress(job_id=self.job_id, worker=self.worker, progress=done * 100 // max(total, 1))
+
+
+JobHandler = Callable[[JobContext, Dict[str, Any]], Awaitable[Any]]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Registra a função que executa os jobs do tipo `kind`"""
+    def register(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
@@ -0,0 +1,201 @@
+from api.v1.apps.jobs.models.models import Job
+from api.v1.apps.jobs.schemas.schemas import JobStatusEnum
+from api.v1.core.config import settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import async_session
+from sqlalchemy.future import select
+from sqlalchemy import text, update, func
+from typing import Any, Dict, List, Optional
+from datetime import timedelta
+from fastapi import HTTPException
+from uuid import UUID
+
+"""
+    Nesse aquivo contém as funções da fila de jobs em segundo plano.
+
+    As rotas gravam o job com `enqueue` e respondem 202; o `worker.py` reserva os jobs com
+    `FOR UPDATE SKIP LOCKED` (vários workers nunca pegam o mesmo job) e executa cada um fora da
+    transação da reserva. Um job cujo worker parou de enviar heartbeat por mais de
+    `JOB_LEASE_SECONDS` volta para a fila.
+
+    A entrega é at-least-once; para que uma repetição não grave os dados duas vezes, o job
+    recebe uma sessão própria (`JobContext.session`) e o `complete` acontece na mesma transação
+    das escritas do job. Se o worker morrer antes do commit, nada foi gravado; se a reserva
+    tiver passado para outro worker, o `complete` não encontra o job e a transação é desfeita.
+
+    Os jobs concluídos ou falhos há mais de `JOB_RETENTION_HOURS` são apagados pelo worker
+    (`purge`); até lá o resultado fica disponível na rota de acompanhamento.
+
+"""
+
+JOB_COLUMNS = (Job.id, Job.kind, Job.status, Job.progress, Job.attempts, Job.max_attempts, Job.result, Job.error,
+               Job.created_at, Job.started_at, Job.finished_at)
+
+CLAIM_JOBS = text("""
+    UPDATE job SET status = 'running', attempts = attempts + 1, worker = :worker,
+        started_at = now(), heartbeat_at = now(), error = NULL
+    WHERE id IN (
+        SELECT id FROM job
+        WHERE status = 'queued' AND run_at <= now()
+        ORDER BY run_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+""")
+
+PURGE_JOBS = text("""
+    DELETE FROM job WHERE id IN (
+        SELECT id FROM job
+        WHERE status IN ('succeeded', 'failed') AND finished_at < now() - CAST(:retention AS interval)
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Espera exponencial até a próxima tentativa, limitada a `JOB_RETRY_MAX_SECONDS`"""
+    seconds = settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.JOB_RETRY_MAX_SECONDS))
+
+
+def _running(job_id, worker: str):
+    return update(Job).where(Job.id == job_id, Job.status == JobStatusEnum.running.value, Job.worker == worker)
+
+
+@async_session
+async def enqueue(session: AsyncSession, kind: str, payload: Dict[str, Any], max_attempts: int = settings.JOB_MAX_ATTEMPTS) -> Dict[str, str]:
+    """Coloca um job na fila
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        kind (str): Tipo do job (veja `JOB_HANDLERS`).
+        payload (Dict[str, Any]): Parâmetros do job.
+        max_attempts (int): Quantidade máxima de tentativas.
+
+    Returns:
+        Dict[str, str]: Identificador do job e a rota de acompanhamento.
+    """
+    job = Job(kind=kind, payload=payload, max_attempts=max_attempts)
+    session.add(job)
+    await session.flush()
+    return {"job_id": str(job.id), "status": JobStatusEnum.queued.value, "status_url": f"/jobs/get-one-job/{job.id}/"}
+
+
+@async_session
+async def get_one(session: AsyncSession, job_id: str) -> Dict[str, Any]:
+    """Resgata o estado, o progresso e o resultado de um job
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        job_id (str): Identificador do job.
+
+    Returns:
+        Dict[str, Any]: Estado do job.
+    """
+    try:
+        UUID(str(job_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="job_id inválido. Deve ser um UUID válido.")
+
+    row = (await session.execute(select(*JOB_COLUMNS).where(Job.id == job_id))).mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return dict(row)
+
+
+@async_session
+async def claim(session: AsyncSession, worker: str, limit: int) -> List[Dict[str, Any]]:
+    """Reserva até `limit` jobs da fila para o worker
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        worker (str): Identificador do worker.
+        limit (int): Quantidade máxima de jobs reservados.
+
+    Returns:
+        List[Dict[str, Any]]: Jobs reservados.
+    """
+    result = await session.execute(CLAIM_JOBS, {"worker": worker, "limit": limit})
+    return [dict(row) for row in result.mappings()]
+
+
+@async_session
+async def heartbeat(session: AsyncSession, worker: str, job_ids: List[UUID]) -> None:
+    """Renova a reserva dos jobs em execução no worker"""
+    await session.execute(update(Job).where(Job.id.in_(job_ids), Job.worker == worker,
+                                            Job.status == JobStatusEnum.running.value).values(heartbeat_at=func.now()))
+
+
+@async_session
+async def set_progress(session: AsyncSession, job_id: UUID, worker: str, progress: int) -> None:
+    """Atualiza o progresso (0 a 100) do job, renovando a sua reserva"""
+    await session.execute(_running(job_id, worker).values(progress=max(0, min(int(progress), 100)), heartbeat_at=func.now()))
+
+
+@async_session
+async def complete(session: AsyncSession, job_id: UUID, worker: str, result: Any) -> bool:
+    """Marca o job como concluído, gravando o resultado
+
+    Returns:
+        bool: False quando o job não está mais reservado para o worker.
+    """
+    query = _running(job_id, worker).values(status=JobStatusEnum.succeeded.value, progress=100, result=result,
+                                            finished_at=func.now())
+    return (await session.execute(query)).rowcount == 1
+
+
+@async_session
+async def fail(session: AsyncSession, job_id: UUID, worker: str, error: str, attempts: int, retry: bool) -> JobStatusEnum:
+    """Registra a falha do job: volta para a fila com espera exponencial ou falha de vez
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        job_id (UUID): Identificador do job.
+        worker (str): Identificador do worker que executou o job.
+        error (str): Mensagem de erro.
+        attempts (int): Tentativas já realizadas.
+        retry (bool): Se o job ainda pode ser repetido.
+
+    Returns:
+        JobStatusEnum: Novo estado do job.
+    """
+    if retry:
+        status = JobStatusEnum.queued
+        values = {"run_at": func.now() + retry_delay(attempts), "worker": None}
+    else:
+        status = JobStatusEnum.failed
+        values = {"finished_at": func.now()}
+    await session.execute(_running(job_id, worker).values(status=status.value, error=error[:2000], **values))
+    return status
+
+
+@async_session
+async def requeue_stale(session: AsyncSession, lease_seconds: float = settings.JOB_LEASE_SECONDS) -> int:
+    """Devolve à fila os jobs cujo worker parou de enviar heartbeat
+
+    Os que já esgotaram as tentativas são marcados como falhos.
+
+    Returns:
+        int: Quantidade de jobs recuperados.
+    """
+    stale = (Job.status == JobStatusEnum.running.value) & (Job.heartbeat_at < func.now() - timedelta(seconds=lease_seconds))
+    error = "Reserva do job expirada: o worker parou de responder."
+    await session.execute(update(Job).where(stale, Job.attempts >= Job.max_attempts)
+                          .values(status=JobStatusEnum.failed.value, error=error, finished_at=func.now()))
+    result = await session.execute(update(Job).where(stale)
+                                   .values(status=JobStatusEnum.queued.value, error=error, worker=None, run_at=func.now()))
+    return result.rowcount
+
+
+@async_session
+async def purge(session: AsyncSession, retention: timedelta = timedelta(hours=settings.JOB_RETENTION_HOURS),
+                limit: int = settings.JOB_PURGE_BATCH_SIZE) -> int:
+    """Apaga até `limit` jobs concluídos ou falhos há mais de `retention`
+
+    Returns:
+        int: Quantidade de jobs apagados.
+    """
+    result = await session.execute(PURGE_JOBS, {"retention": retention, "limit": limit})
+    return result.rowcount
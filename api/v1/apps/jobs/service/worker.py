@@ -0,0 +1,141 @@
+from api.v1.apps.jobs.service.service import claim, complete, fail, heartbeat, requeue_stale, purge
+from api.v1.apps.jobs.service.registry import JobContext, JOB_HANDLERS
+from api.v1.core.config import settings
+from database.session import AsyncSessionLocal, unit_of_work
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+from loguru import logger
+from uuid import UUID
+import asyncio
+import socket
+import os
+
+"""
+    Pool de execução dos jobs, usado pelo `worker.py`.
+
+    O worker executa até `concurrency` jobs ao mesmo tempo e só reserva novos jobs quando há
+    vaga, de modo que a vazão (e o uso do pool de conexões do worker) fica limitada pela
+    configuração, independente do tamanho da fila. Enquanto executa, renova a reserva dos
+    seus jobs a cada terço de `JOB_LEASE_SECONDS` e devolve à fila os jobs de workers parados;
+    a cada `JOB_PURGE_INTERVAL_SECONDS` apaga os jobs finalizados há mais de `JOB_RETENTION_HOURS`.
+
+    Falhas de validação (HTTPException 4xx) não são repetidas; as demais voltam para a fila com
+    espera exponencial até `max_attempts`.
+
+"""
+
+
+def _is_permanent(error: Exception) -> bool:
+    return isinstance(error, HTTPException) and error.status_code < 500
+
+
+class JobLeaseLost(Exception):
+    """A reserva do job expirou e ele foi entregue a outro worker"""
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, HTTPException):
+        return str(error.detail)
+    return f"{type(error).__name__}: {error}"
+
+
+class JobWorker:
+    """Reserva e executa os jobs da fila com concorrência limitada"""
+
+    def __init__(self, concurrency: int = settings.JOB_WORKER_CONCURRENCY,
+                 poll_interval: float = settings.JOB_POLL_INTERVAL_SECONDS,
+                 lease_seconds: float = settings.JOB_LEASE_SECONDS, name: Optional[str] = None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._active: Dict[UUID, asyncio.Task] = {}
+        self._stopping: Optional[asyncio.Event] = None
+
+    def stop(self) -> None:
+        """Para de reservar jobs; os que estão em execução terminam normalmente"""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        job_id, kind = job["id"], job["kind"]
+        handler = JOB_HANDLERS.get(kind)
+        try:
+            if handler is None:
+                raise HTTPException(status_code=400, detail=f"Tipo de job desconhecido: {kind}")
+            async with AsyncSessionLocal() as session:
+                async with unit_of_work(session):
+                    result = await handler(JobContext(job_id, self.name, job["attempts"], session), job["payload"])
+                    if not await complete(session=session, job_id=job_id, worker=self.name, result=result):
+                        raise JobLeaseLost()
+        except JobLeaseLost:
+            logger.warning(f"Job {job_id} ({kind}) descartado: a reserva passou para outro worker")
+            return
+        except Exception as e:
+            retry = not _is_permanent(e) and job["attempts"] < job["max_attempts"]
+            status = await fail(job_id=job_id, worker=self.name, error=_describe(e), attempts=job["attempts"], retry=retry)
+            logger.warning(f"Job {job_id} ({kind}) falhou na tentativa {job['attempts']}, novo estado {status.value}: {_describe(e)}")
+            return
+        logger.success(f"Job {job_id} ({kind}) concluído")
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        try:
+            await self._execute(job)
+        except Exception as e:
+            logger.error(f"Erro ao registrar o resultado do job {job['id']}: {e}")
+        finally:
+            self._active.pop(job["id"], None)
+
+    async def _maintain(self) -> None:
+        if self._active:
+            await heartbeat(worker=self.name, job_ids=list(self._active))
+        recovered = await requeue_stale(lease_seconds=self.lease_seconds)
+        if recovered:
+            logger.warning(f"{recovered} jobs com reserva expirada devolvidos à fila")
+
+    async def _purge(self) -> None:
+        deleted = settings.JOB_PURGE_BATCH_SIZE
+        while deleted >= settings.JOB_PURGE_BATCH_SIZE:
+            deleted = await purge()
+
+    async def _wait(self, timeout: float) -> None:
+        waiters = [asyncio.ensure_future(self._stopping.wait()), *self._active.values()]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiters[0].cancel()
+
+    async def run(self, until_idle: bool = False) -> None:
+        """Executa jobs até `stop()` (ou, com `until_idle`, até a fila ficar vazia)"""
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        next_maintenance = next_purge = 0.0
+        logger.info(f"Worker de jobs {self.name} iniciado com concorrência {self.concurrency}")
+
+        while not self._stopping.is_set():
+            try:
+                if loop.time() >= next_maintenance:
+                    await self._maintain()
+                    next_maintenance = loop.time() + self.lease_seconds / 3
+                if loop.time() >= next_purge:
+                    next_purge = loop.time() + settings.JOB_PURGE_INTERVAL_SECONDS
+                    await self._purge()
+
+                claimed = []
+                free = self.concurrency - len(self._active)
+                if free > 0:
+                    claimed = await claim(worker=self.name, limit=free)
+                for job in claimed:
+                    self._active[job["id"]] = loop.create_task(self._run_job(job))
+            except Exception as e:
+                logger.error(f"Erro no worker de jobs: {e}")
+                claimed = []
+
+            if until_idle and not claimed and not self._active:
+                break
+            if not claimed or len(self._active) >= self.concurrency:
+                await self._wait(min(self.poll_interval, self.lease_seconds / 3))
+
+        if self._active:
+            await asyncio.gather(*self._active.values(), return_exceptions=True)
+        logger.info(f"Worker de jobs {self.name} encerrado")
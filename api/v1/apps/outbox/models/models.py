@@ -0,0 +1,25 @@
+from sqlalchemy import Column, UUID, String, Integer, BigInteger, DateTime, Text, Index, text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from database.session import Base
+
+PENDING = text("dispatched_at IS NULL AND failed_at IS NULL")
+
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_event'
+    __table_args__ = (
+        Index('ix_outbox_event_pending', 'id', postgresql_where=PENDING),
+        Index('ix_outbox_event_pending_aggregate', 'aggregate_id', 'id', postgresql_where=PENDING),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    aggregate_type = Column(String(32), nullable=False)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    attempts = Column(Integer, nullable=False, server_default='0')
+    last_error = Column(Text, nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)
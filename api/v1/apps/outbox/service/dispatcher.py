@@ -0,0 +1,97 @@
+from api.v1.apps.outbox.service.service import OutboxSink, dispatch_batch, purge, OUTBOX_PENDING
+from api.v1.core.config import settings
+from sqlalchemy.orm import Session
+from sqlalchemy import event
+from typing import List, Optional
+from loguru import logger
+import asyncio
+
+"""
+    Task de segundo plano que esvazia o outbox.
+
+    Cada worker da API roda um dispatcher; como os lotes são reservados com `SKIP LOCKED`,
+    vários dispatchers dividem os eventos sem entregá-los em duplicidade. Entre os lotes o
+    dispatcher aguarda `OUTBOX_POLL_INTERVAL_SECONDS`, mas é acordado assim que uma sessão
+    deste processo confirma uma transação que gravou eventos. A cada
+    `OUTBOX_PURGE_INTERVAL_SECONDS` o dispatcher também apaga os eventos já finalizados.
+
+"""
+
+
+class OutboxDispatcher:
+    """Entrega os eventos do outbox aos sinks registrados"""
+
+    def __init__(self, batch_size: int = settings.OUTBOX_BATCH_SIZE,
+                 poll_interval: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+                 purge_interval: float = settings.OUTBOX_PURGE_INTERVAL_SECONDS):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self.sinks: List[OutboxSink] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, sink: OutboxSink) -> None:
+        self.sinks.append(sink)
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _after_commit(self, session) -> None:
+        if session.info.pop(OUTBOX_PENDING, False):
+            self.wake()
+
+    async def _purge(self) -> None:
+        deleted = settings.OUTBOX_PURGE_BATCH_SIZE
+        while deleted >= settings.OUTBOX_PURGE_BATCH_SIZE:
+            deleted = await purge()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_purge = loop.time()
+        while True:
+            if loop.time() >= next_purge:
+                try:
+                    await self._purge()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Erro ao apagar eventos antigos do outbox: {e}")
+                next_purge = loop.time() + self.purge_interval
+
+            self._wakeup.clear()
+            try:
+                claimed = await dispatch_batch(self.sinks, batch_size=self.batch_size)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao despachar eventos do outbox: {e}")
+                claimed = 0
+
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """Inicia a task do dispatcher no event loop corrente"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            event.listen(Session, "after_commit", self._after_commit)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            event.remove(Session, "after_commit", self._after_commit)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+
+
+outbox_dispatcher = OutboxDispatcher()
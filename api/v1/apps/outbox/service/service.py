@@ -0,0 +1,170 @@
+from api.v1.apps.outbox.models.models import OutboxEvent
+from api.v1.core.config import settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import async_session
+from sqlalchemy import text, update, func
+from typing import Any, Dict, List, Sequence
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from loguru import logger
+import asyncio
+
+"""
+    Nesse aquivo contém as funções do outbox transacional.
+
+    Os serviços gravam o evento com `add_event` na mesma sessão (e transação) da operação, de
+    modo que ele existe se e somente se a operação foi confirmada, sem nenhuma chamada externa
+    no caminho da requisição. O `OutboxDispatcher` chama `dispatch_batch` em segundo plano.
+
+    `dispatch_batch` reserva com `FOR UPDATE SKIP LOCKED` apenas o evento mais antigo pendente
+    de cada agregado (a "cabeça") e, junto dele, os seguintes do mesmo agregado: enquanto a
+    cabeça estiver reservada ou aguardando nova tentativa, nenhum outro dispatcher entrega
+    eventos daquele agregado, o que preserva a ordem por agregado com vários dispatchers.
+    A entrega é at-least-once: uma falha repete o evento em todos os sinks.
+
+    Os eventos entregues ou descartados há mais de `OUTBOX_RETENTION_HOURS` são apagados
+    periodicamente pelo dispatcher (`purge`).
+
+"""
+
+OUTBOX_PENDING = 'outbox_pending'
+
+CLAIM_BATCH = text("""
+    WITH heads AS (
+        SELECT o.id, o.aggregate_id
+        FROM outbox_event o
+        WHERE o.dispatched_at IS NULL AND o.failed_at IS NULL AND o.available_at <= now()
+          AND NOT EXISTS (
+              SELECT 1 FROM outbox_event p
+              WHERE p.aggregate_id = o.aggregate_id AND p.id < o.id
+                AND p.dispatched_at IS NULL AND p.failed_at IS NULL
+          )
+        ORDER BY o.id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    SELECT e.id, e.aggregate_type, e.aggregate_id, e.event_type, e.payload, e.attempts
+    FROM outbox_event e
+    JOIN heads h ON h.aggregate_id = e.aggregate_id
+    WHERE e.dispatched_at IS NULL AND e.failed_at IS NULL AND e.id >= h.id
+    ORDER BY e.id
+    LIMIT :batch_size
+""")
+
+PURGE_EVENTS = text("""
+    DELETE FROM outbox_event WHERE id IN (
+        SELECT id FROM outbox_event
+        WHERE coalesce(dispatched_at, failed_at) < now() - CAST(:retention AS interval)
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+class OutboxSink(ABC):
+    """Destino dos eventos do outbox (websockets, e-mail, integração contábil...)"""
+
+    name = "sink"
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        return True
+
+    @abstractmethod
+    async def deliver(self, event: Dict[str, Any]) -> None:
+        """Entrega o evento; uma exceção faz o evento ser repetido"""
+
+
+async def add_event(session: AsyncSession, aggregate_type: str, aggregate_id, event_type: str, payload: Dict[str, Any]) -> None:
+    """Grava o evento no outbox, na transação da sessão
+
+    Args:
+        session (AsyncSession): Sessão da operação que originou o evento.
+        aggregate_type (str): Tipo do agregado (ex.: `plan`).
+        aggregate_id: Identificador do agregado; a entrega é ordenada por agregado.
+        event_type (str): Nome do evento (ex.: `rescue.processed`).
+        payload (Dict[str, Any]): Conteúdo do evento.
+    """
+    session.add(OutboxEvent(aggregate_type=aggregate_type, aggregate_id=aggregate_id, event_type=event_type, payload=payload))
+    session.info[OUTBOX_PENDING] = True
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Espera exponencial até a próxima tentativa, limitada a `OUTBOX_RETRY_MAX_SECONDS`"""
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+async def _deliver_aggregate(sinks: Sequence[OutboxSink], events: List[Dict[str, Any]],
+                             dispatched: List[int], failed: List[Dict[str, Any]], max_attempts: int) -> None:
+    for event in events:
+        try:
+            for sink in sinks:
+                if sink.accepts(event):
+                    await sink.deliver(event)
+        except Exception as e:
+            attempts = event["attempts"] + 1
+            failed.append({"id": event["id"], "attempts": attempts, "error": f"{type(e).__name__}: {e}"[:1000],
+                           "dead": attempts >= max_attempts})
+            if attempts >= max_attempts:
+                logger.error(f"Evento {event['id']} ({event['event_type']}) descartado após {attempts} tentativas: {e}")
+                continue
+            logger.warning(f"Falha ao entregar o evento {event['id']} ({event['event_type']}), tentativa {attempts}: {e}")
+            return
+        dispatched.append(event["id"])
+
+
+@async_session
+async def dispatch_batch(session: AsyncSession, sinks: Sequence[OutboxSink],
+                         batch_size: int = settings.OUTBOX_BATCH_SIZE,
+                         max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS) -> int:
+    """Reserva um lote de eventos pendentes e entrega aos sinks, em ordem por agregado
+
+    Os agregados do lote são entregues concorrentemente. Quando um evento falha, os seguintes
+    do mesmo agregado ficam para depois da nova tentativa; após `max_attempts` o evento é
+    marcado como falho (`failed_at`) e deixa de bloquear o agregado.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        sinks (Sequence[OutboxSink]): Destinos dos eventos.
+        batch_size (int): Quantidade máxima de eventos reservados.
+        max_attempts (int): Tentativas antes de descartar o evento.
+
+    Returns:
+        int: Quantidade de eventos reservados.
+    """
+    result = await session.execute(CLAIM_BATCH, {"batch_size": batch_size})
+    events = [dict(row) for row in result.mappings()]
+    if not events:
+        return 0
+
+    by_aggregate: Dict[Any, List[Dict[str, Any]]] = {}
+    for event in events:
+        by_aggregate.setdefault(event["aggregate_id"], []).append(event)
+
+    dispatched: List[int] = []
+    failed: List[Dict[str, Any]] = []
+    await asyncio.gather(*(_deliver_aggregate(sinks, aggregate_events, dispatched, failed, max_attempts)
+                           for aggregate_events in by_aggregate.values()))
+
+    if dispatched:
+        await session.execute(update(OutboxEvent).where(OutboxEvent.id.in_(dispatched)).values(dispatched_at=func.now()))
+    for failure in failed:
+        values = {"attempts": failure["attempts"], "last_error": failure["error"]}
+        if failure["dead"]:
+            values["failed_at"] = func.now()
+        else:
+            values["available_at"] = func.now() + retry_delay(failure["attempts"])
+        await session.execute(update(OutboxEvent).where(OutboxEvent.id == failure["id"]).values(**values))
+    return len(events)
+
+
+@async_session
+async def purge(session: AsyncSession, retention: timedelta = timedelta(hours=settings.OUTBOX_RETENTION_HOURS),
+                limit: int = settings.OUTBOX_PURGE_BATCH_SIZE) -> int:
+    """Apaga até `limit` eventos entregues ou descartados há mais de `retention`
+
+    Returns:
+        int: Quantidade de eventos apagados.
+    """
+    result = await session.execute(PURGE_EVENTS, {"retention": retention, "limit": limit})
+    return result.rowcount
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, UUID, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, Date, DateTime, UUID, DECIMAL, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from database.session import Base
 import uuid
@@ -6,6 +6,11 @@ import uuid
 
 class Plan(Base):
     __tablename__ = 'plan'
+    __table_args__ = (
+        Index('ix_plan_client_id_id', 'client_id', 'id'),
+        Index('ix_plan_product_id', 'product_id'),
+        Index('ix_plan_next_eligible_rescue_date', 'next_eligible_rescue_date'),
+    )
 
     id = Column(UUID(as_uuid=True), unique=True, primary_key=True, default=uuid.uuid4)
     client_id = Column(UUID(as_uuid=True), ForeignKey('client.id'), nullable=False)
@@ -13,8 +18,11 @@ class Plan(Base):
     contribution = Column(DECIMAL(10, 2), nullable=False)
     date_of_contract = Column(DateTime(timezone=True), nullable=False)
     age_of_retirement = Column(Integer, nullable=False)
+    next_eligible_rescue_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
     _clients = relationship('Client', back_populates='_plans')
     _products = relationship('Products', back_populates='_plans')
     _extra_contributions = relationship('ExtraContribution', back_populates='_plans')   
-    _rescues = relationship('Rescue', back_populates='_plans')  
\ No newline at end of file
+    _rescues = relationship('Rescue', back_populates='_plans')
+    _balance = relationship('PlanBalance', back_populates='_plans', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
\ No newline at end of file
@@ -1,10 +1,17 @@
 from api.v1.apps.plan.schemas.schemas import PlanSchema
-from api.v1.apps.products.models.models import Products
+from api.v1.apps.products.service.catalog import catalog
 from api.v1.apps.plan.models.models import Plan
+from api.v1.apps.plan_balance.service.service import open_balance, adjust as adjust_balance
+from api.v1.apps.analytics.service.rollup import record_flow, record_plan
+from api.v1.apps.rescue.service.eligibility import first_eligible_date, recompute_next_eligible
+from api.v1.websockets.events import emit_plan_event
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.session import async_session
-from typing import List, Dict, Optional
+from api.v1.core.pagination import paginate, decode_cursor, DEFAULT_PAGE_LIMIT
+from api.v1.core.export import stream_table, ExportFormatEnum, ExportCompressionEnum
+from typing import List, Dict, Optional, AsyncIterator
 from datetime import datetime, timezone
+from decimal import Decimal
 from sqlalchemy.future import select
 from loguru import logger
 from fastapi import HTTPException
@@ -52,8 +59,7 @@ async def insert(session: AsyncSession, args: Dict[str, any]) -> Dict[str, str]:
         raise HTTPException(status_code=400, detail="Informe uma idade de aposentadoria válida.")
 
     new_plan = Plan(**args)
-    product_query = select(Products).where(Products.id == new_plan.product_id)
-    product = await session.scalar(product_query)
+    product = await catalog.get(session, new_plan.product_id)
 
     min_value_aporte_extra: float = 100.00
     min_value_aporte_initial: float = 1000.00
@@ -75,27 +81,36 @@ async def insert(session: AsyncSession, args: Dict[str, any]) -> Dict[str, str]:
     if product and product.age_of_exit > max_age:
         raise HTTPException(status_code=400, detail="Não é possível contratar este produto porque a idade máxima de saída é maior que 60 anos.")
 
+    if product:
+        new_plan.next_eligible_rescue_date = first_eligible_date(new_plan.date_of_contract, product.lack_initial_of_rescue)
+
     session.add(new_plan)
-    await session.commit()
+    await session.flush()
+    await open_balance(session, new_plan.id, new_plan.contribution)
+    await record_flow(session, new_plan.id, plans=1, aum=new_plan.contribution, contributions=new_plan.contribution)
+    await emit_plan_event(session, "plan.created", new_plan.id, new_plan.client_id, new_plan.contribution,
+                          product_id=new_plan.product_id)
     logger.success("Novo plan registrado com sucesso")
     return {"id": str(new_plan.id)}
 
 @async_session
-async def get_all(session: AsyncSession, plan_schema) -> List[PlanSchema]:
+async def get_all(session: AsyncSession, plan_schema, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Função para listar todos os planos
     
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         plan_schema: Esquema do plano.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        List[PlanSchema]: Lista de planos.
+        Dict: Página com a lista de planos e o cursor da próxima página.
     """
+    after = decode_cursor(cursor)
+
     try:
-        query = select(Plan)
-        result = await session.execute(query)
-        list: List[plan_schema] = result.scalars().all()
-        return list
+        query = select(*Plan.__table__.c)
+        return await paginate(session, query, Plan.id, limit, after)
     except Exception as e:
         logger.error(f"Erro ao listar planos: {e}")
         raise HTTPException(status_code=500, detail="Erro ao listar planos")
@@ -120,14 +135,16 @@ async def get_one(session: AsyncSession, plan_id: str) -> Dict:
     return obj_client
 
 @async_session
-async def get_plan_by_client_id(session: AsyncSession, client_id: str) -> Dict:
+async def get_plan_by_client_id(session: AsyncSession, client_id: str, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Resgata um plano pelo id do cliente
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         client_name (str): Id do cliente a ser resgatado.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        Dict: Dicionário com mensagem de sucesso ou falha.
+        Dict: Página com a lista de planos e o cursor da próxima página.
 
     """
 
@@ -136,10 +153,45 @@ async def get_plan_by_client_id(session: AsyncSession, client_id: str) -> Dict:
     except ValueError:
         raise HTTPException(status_code=400, detail="client_id inválido. Deve ser um UUID válido.")
     
-    obj = await session.execute(select(Plan).where(Plan.client_id == client_id))
-    obj_plan = obj.scalars().all()
-    return obj_plan
+    after = decode_cursor(cursor)
+    query = select(*Plan.__table__.c).where(Plan.client_id == client_id)
+    return await paginate(session, query, Plan.id, limit, after)
     
+@async_session
+async def is_owned_by(session: AsyncSession, plan_id: str, client_id: str) -> bool:
+    """Verifica se o plano pertence ao cliente
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id (str): Identificador do plano.
+        client_id (str): Identificador do cliente.
+
+    Returns:
+        bool: True quando o plano existe e pertence ao cliente.
+    """
+    try:
+        UUID(str(plan_id))
+        UUID(str(client_id))
+    except ValueError:
+        return False
+
+    owner = await get_owner(session=session, plan_id=plan_id)
+    return owner is not None and str(owner) == str(client_id)
+
+
+@async_session
+async def get_owner(session: AsyncSession, plan_id: str) -> Optional[UUID]:
+    """Resgata o cliente dono do plano
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id (str): Identificador do plano.
+
+    Returns:
+        Optional[UUID]: Identificador do cliente, ou None quando o plano não existe.
+    """
+    return await session.scalar(select(Plan.client_id).where(Plan.id == plan_id))
+
 @async_session
 async def update(session: AsyncSession, plan_id: int, **kwargs) -> Dict[str, Optional[str]]:
     """Atualiza informações de um plano.
@@ -172,8 +224,7 @@ async def update(session: AsyncSession, plan_id: int, **kwargs) -> Dict[str, Opt
     except ValueError:
         raise HTTPException(status_code=400, detail="product_id inválido. Deve ser um UUID válido.")
 
-    product_query = select(Products).where(Products.id == product_id)
-    product = await session.scalar(product_query)
+    product = await catalog.get(session, product_id)
 
     if contribution <= 0:
         raise HTTPException(status_code=400, detail="Informe um valor válido para o aporte inicial.")
@@ -207,11 +258,20 @@ async def update(session: AsyncSession, plan_id: int, **kwargs) -> Dict[str, Opt
     if not existing_plan:
         raise HTTPException(status_code=404, detail="Plano não encontrado")
 
+    previous_contribution = existing_plan.contribution
+    await record_plan(session, existing_plan.id, -1)
+
     for key, value in kwargs.items():
         if value is not None and hasattr(existing_plan, key):  
             setattr(existing_plan, key, value)
 
-    await session.commit()
+    await session.flush()
+    balance = await adjust_balance(session, existing_plan.id, Decimal(str(contribution)) - previous_contribution,
+                                   "Não há saldo suficiente para reduzir o aporte inicial.")
+    await record_plan(session, existing_plan.id, 1)
+    await recompute_next_eligible(session, existing_plan.id)
+    await emit_plan_event(session, "plan.updated", existing_plan.id, existing_plan.client_id, balance,
+                          contribution=existing_plan.contribution)
     return {"message": f"Produto {existing_plan.id}: atualizado com sucesso"}
    
 @async_session
@@ -236,8 +296,21 @@ async def remove(session: AsyncSession, plan_id: str) -> Dict[str, str]:
     if obj_plan is None:
         raise HTTPException(status_code=404, detail="Plano não encontrado.")
 
+    await record_plan(session, obj_plan.id, -1)
     await session.delete(obj_plan)
-    await session.commit()
+    await session.flush()
     return {"message": f"Plan {obj_plan.id}: deletado com sucesso"}
-    
-   
\ No newline at end of file
+
+
+def export(session: AsyncSession, export_format: ExportFormatEnum, compression: Optional[ExportCompressionEnum] = None) -> AsyncIterator[bytes]:
+    """Exporta todos os planos em streaming por um cursor do servidor
+
+    Args:
+        session (AsyncSession): Sessão da requisição, mantida aberta até o fim do streaming.
+        export_format (ExportFormatEnum): Formato de saída (ndjson ou csv).
+        compression (Optional[ExportCompressionEnum]): Compressão aplicada à saída.
+
+    Returns:
+        AsyncIterator[bytes]: Blocos do arquivo exportado.
+    """
+    return stream_table(session, Plan.__table__, export_format, compression)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, UUID, DECIMAL, ForeignKey
+from sqlalchemy.orm import relationship
+from database.session import Base
+
+
+class PlanBalance(Base):
+    __tablename__ = 'plan_balance'
+
+    plan_id = Column(UUID(as_uuid=True), ForeignKey('plan.id', ondelete='CASCADE'), primary_key=True)
+    balance = Column(DECIMAL(12, 2), nullable=False, default=0)
+
+    _plans = relationship('Plan', back_populates='_balance')
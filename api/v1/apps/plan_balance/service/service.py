@@ -0,0 +1,98 @@
+from api.v1.apps.plan_balance.models.models import PlanBalance
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, update
+from fastapi import HTTPException
+from typing import Optional
+from decimal import Decimal
+
+"""
+    Nesse aquivo contém as funções que mantêm o saldo de cada plano.
+
+    O saldo é atualizado de forma incremental pelos serviços de planos, aportes extras e resgates,
+    na mesma transação da operação. Os débitos são feitos com um único UPDATE condicional,
+    que só é aplicado quando há saldo suficiente, sem precisar somar aportes e resgates.
+
+"""
+
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)).quantize(Decimal("0.01"))
+
+
+async def open_balance(session: AsyncSession, plan_id, value) -> None:
+    """Cria o saldo do plano com o aporte inicial
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id: Identificador do plano.
+        value: Valor do aporte inicial.
+    """
+    await session.execute(insert(PlanBalance).values(plan_id=plan_id, balance=_to_decimal(value)))
+
+
+async def credit(session: AsyncSession, plan_id, value) -> Optional[Decimal]:
+    """Soma o valor ao saldo do plano
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id: Identificador do plano.
+        value: Valor a ser creditado.
+
+    Returns:
+        Optional[Decimal]: Novo saldo ou None quando o plano não tem saldo.
+    """
+    query = (
+        update(PlanBalance)
+        .where(PlanBalance.plan_id == plan_id)
+        .values(balance=PlanBalance.balance + _to_decimal(value))
+        .returning(PlanBalance.balance)
+    )
+    return await session.scalar(query)
+
+
+async def debit(session: AsyncSession, plan_id, value) -> Optional[Decimal]:
+    """Debita o valor do saldo do plano somente se houver saldo suficiente
+
+    A verificação e o débito acontecem no mesmo UPDATE, então resgates simultâneos
+    no mesmo plano nunca deixam o saldo negativo.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id: Identificador do plano.
+        value: Valor a ser debitado.
+
+    Returns:
+        Optional[Decimal]: Novo saldo ou None quando o saldo é insuficiente.
+    """
+    amount = _to_decimal(value)
+    query = (
+        update(PlanBalance)
+        .where(PlanBalance.plan_id == plan_id, PlanBalance.balance >= amount)
+        .values(balance=PlanBalance.balance - amount)
+        .returning(PlanBalance.balance)
+    )
+    return await session.scalar(query)
+
+
+async def adjust(session: AsyncSession, plan_id, delta, detail: str) -> Optional[Decimal]:
+    """Aplica uma diferença (positiva ou negativa) ao saldo do plano
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id: Identificador do plano.
+        delta: Diferença a ser aplicada.
+        detail (str): Mensagem de erro quando o saldo não comporta o débito.
+
+    Returns:
+        Optional[Decimal]: Novo saldo ou None quando a diferença é zero.
+    """
+    delta = _to_decimal(delta)
+
+    if delta > 0:
+        return await credit(session, plan_id, delta)
+    if delta < 0:
+        balance = await debit(session, plan_id, -delta)
+        if balance is None:
+            raise HTTPException(status_code=400, detail=detail)
+        return balance
+    return None
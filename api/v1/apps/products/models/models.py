@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, UUID, DECIMAL
+from sqlalchemy import Column, Integer, String, DateTime, UUID, DECIMAL, Index
 from sqlalchemy.orm import relationship
 from database.session import Base
 import uuid
@@ -6,6 +6,9 @@ import uuid
 
 class Products(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        Index('ix_products_name', 'name'),
+    )
 
     id = Column(UUID(as_uuid=True), unique=True, primary_key=True, default=uuid.uuid4)
     name = Column(String(320), nullable=False)
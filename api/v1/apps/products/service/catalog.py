@@ -0,0 +1,177 @@
+from api.v1.apps.products.models.models import Products
+from database.session import create_listen_connection
+from api.v1.core.config import settings
+from api.v1.core.pagination import encode_cursor
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select, text
+from decimal import Decimal
+from loguru import logger
+from uuid import UUID
+import asyncio
+import hashlib
+import time
+
+"""
+    Snapshot do catálogo de produtos mantido em memória por cada worker.
+
+    O catálogo é pequeno e muda pouco, então planos e resgates consultam o snapshot em vez
+    de buscar o produto no banco a cada requisição. Toda escrita em produtos emite um
+    NOTIFY no canal `products_changed`; cada worker escuta o canal em uma conexão dedicada e
+    invalida o seu snapshot ao receber a notificação. Caso uma notificação se perca
+    (queda da conexão, por exemplo), o snapshot expira após `CATALOG_TTL_SECONDS`.
+
+"""
+
+PRODUCTS_CHANNEL = 'products_changed'
+LISTENER_RECONNECT_SECONDS: float = 5.0
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    id: UUID
+    name: str
+    susep: str
+    expiration_of_sale: datetime
+    value_minimum_aporte_initial: Decimal
+    value_minimum_aporte_extra: Decimal
+    entry_age: int
+    age_of_exit: int
+    lack_initial_of_rescue: int
+    lack_entre_resgates: int
+
+
+class ProductCatalog:
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.digest: Optional[str] = None
+        self._products: Dict[UUID, ProductSnapshot] = {}
+        self._loaded_at: Optional[float] = None
+        self._invalidations = 0
+        self._lock = asyncio.Lock()
+        self._listener_task: Optional[asyncio.Task] = None
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    def invalidate(self) -> None:
+        self._invalidations += 1
+        self._loaded_at = None
+
+    def _replace(self, products: Dict[UUID, ProductSnapshot]) -> None:
+        # O digest depende só do conteúdo, então é o mesmo em todos os workers com o mesmo catálogo
+        content = repr(sorted((str(product_id), product) for product_id, product in products.items()))
+        self.digest = hashlib.sha1(content.encode()).hexdigest()[:16]
+        self._products = products
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Recarrega o catálogo inteiro e substitui o snapshot de uma só vez
+
+        Uma invalidação recebida enquanto o SELECT está em andamento pode se referir a uma
+        escrita que a leitura não viu: nesse caso o snapshot é trocado, mas continua expirado
+        e é recarregado no próximo acesso.
+        """
+        invalidations = self._invalidations
+        rows = (await session.execute(select(*Products.__table__.c))).mappings().all()
+        self._replace({row['id']: ProductSnapshot(**row) for row in rows})
+        if invalidations == self._invalidations:
+            self._loaded_at = time.monotonic()
+        self.version += 1
+
+    async def all(self, session: AsyncSession) -> Dict[UUID, ProductSnapshot]:
+        """Retorna o snapshot atual, recarregando apenas quando expirado ou invalidado"""
+        if not self.is_fresh():
+            async with self._lock:
+                if not self.is_fresh():
+                    await self.refresh(session)
+        return self._products
+
+    async def get(self, session: AsyncSession, product_id) -> Optional[ProductSnapshot]:
+        """Busca o produto no snapshot
+
+        Um produto recém-criado em outro worker pode ainda não estar no snapshot; nesse caso
+        ele é buscado no banco e adicionado ao snapshot.
+
+        Args:
+            session (AsyncSession): Sessão usada apenas quando o snapshot precisa ser recarregado.
+            product_id: Identificador do produto.
+
+        Returns:
+            Optional[ProductSnapshot]: Produto ou None quando não existe.
+        """
+        product_id = UUID(str(product_id))
+        product = (await self.all(session)).get(product_id)
+        if product is not None:
+            return product
+
+        row = (await session.execute(select(*Products.__table__.c).where(Products.id == product_id))).mappings().first()
+        if row is None:
+            return None
+
+        product = ProductSnapshot(**row)
+        self._replace({**self._products, product.id: product})
+        return product
+
+    async def page(self, session: AsyncSession, limit: int, after: Optional[UUID]) -> Dict[str, object]:
+        """Página do catálogo ordenada por id, no mesmo formato de `paginate`"""
+        products = sorted((await self.all(session)).values(), key=lambda product: product.id)
+        if after is not None:
+            products = [product for product in products if product.id > after]
+
+        items: List[ProductSnapshot] = products[:limit]
+        next_cursor = encode_cursor(items[-1].id) if len(products) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.invalidate()
+
+    async def _listen(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await create_listen_connection()
+                await connection.add_listener(PRODUCTS_CHANNEL, self._on_notification)
+                self.invalidate()
+                while not connection.is_closed():
+                    await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro na escuta do catálogo de produtos: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            self.invalidate()
+            await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
+
+    def start_listener(self) -> None:
+        """Inicia a escuta das notificações de alteração de produtos neste worker"""
+        if self._listener_task is None:
+            self._listener_task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop_listener(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+
+catalog = ProductCatalog(settings.CATALOG_TTL_SECONDS)
+
+
+async def notify_catalog_change(session: AsyncSession, product_id) -> None:
+    """Invalida o snapshot local e avisa os demais workers quando a transação for confirmada
+
+    Args:
+        session (AsyncSession): Sessão da transação que alterou o produto.
+        product_id: Identificador do produto alterado.
+    """
+    catalog.invalidate()
+    await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": PRODUCTS_CHANNEL, "payload": str(product_id)})
@@ -1,7 +1,10 @@
 from api.v1.apps.products.schemas.schemas import ProductsSchema
 from api.v1.apps.products.models.models import Products
+from api.v1.apps.products.service.catalog import catalog, notify_catalog_change
+from api.v1.apps.rescue.service.eligibility import recompute_product_next_eligible
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.session import async_session
+from api.v1.core.pagination import decode_cursor, DEFAULT_PAGE_LIMIT
 from typing import List, Dict, Optional
 from sqlalchemy.future import select
 from loguru import logger
@@ -58,28 +61,28 @@ async def insert(session: AsyncSession, args: Dict[str, any]) -> Dict[str, str]:
         raise HTTPException(status_code=400, detail="Insira uma idade de saída maior que a idade de entrada.")
 
     session.add(new_products)
-    await session.commit()
-    await session.refresh(new_products)
+    await session.flush()
+    await notify_catalog_change(session, new_products.id)
     logger.success("Novo produto registrado com sucesso")
     return {"id": str(new_products.id)}
 
 @async_session
-async def get_all(session: AsyncSession, products_schema) -> List[ProductsSchema]:
+async def get_all(session: AsyncSession, products_schema, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Função para listar todos os produtos
     
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         produtcs_schema: Esquema do produto.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        List[ProductsSchema]: Lista de produtos.
+        Dict: Página com a lista de produtos e o cursor da próxima página.
     """
-    try:
+    after = decode_cursor(cursor)
 
-        query = select(Products)
-        result = await session.execute(query)
-        list: List[products_schema] = result.scalars().all()
-        return list
+    try:
+        return await catalog.page(session, limit, after)
     except Exception as e:
         logger.error(f"Erro ao listar produtos: {e}")
         raise HTTPException(status_code=500, detail="Erro ao listar produtos")
@@ -99,8 +102,11 @@ async def get_one(session: AsyncSession, product_id: str) -> Dict:
     except ValueError:
         raise HTTPException(status_code=400, detail="product_id inválido. Deve ser um UUID válido.")
 
-    obj = await session.execute(select(Products).where(Products.id == product_id))
-    obj_product = obj.scalar_one()
+    obj_product = await catalog.get(session, product_id)
+
+    if obj_product is None:
+        raise HTTPException(status_code=404, detail="Produto não encontrado.")
+
     return obj_product
 
 @async_session
@@ -120,9 +126,8 @@ async def get_products_by_name(session: AsyncSession, product_name: str) -> Dict
     if not product_name:
         raise HTTPException(status_code=400, detail="Informe um nome para o produto.")
     
-    obj = await session.execute(select(Products).where(Products.name == product_name))
-    obj_product = obj.scalars().all()
-    return obj_product
+    obj = await session.execute(select(*Products.__table__.c).where(Products.name == product_name))
+    return [dict(row) for row in obj.mappings()]
     
 @async_session
 async def update(session: AsyncSession, product_id: str, **kwargs) -> Dict[str, Optional[str]]:
@@ -172,11 +177,17 @@ async def update(session: AsyncSession, product_id: str, **kwargs) -> Dict[str,
     if not existing_product:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
 
+    lacks = (existing_product.lack_initial_of_rescue, existing_product.lack_entre_resgates)
+
     for key, value in kwargs.items():
         if value is not None and hasattr(existing_product, key):  
             setattr(existing_product, key, value)
 
-    await session.commit()
+    await session.flush()
+    # As novas carências valem também para os planos já contratados
+    if lacks != (existing_product.lack_initial_of_rescue, existing_product.lack_entre_resgates):
+        await recompute_product_next_eligible(session, existing_product.id)
+    await notify_catalog_change(session, existing_product.id)
     return {"message": f"Produto {existing_product.id}: atualizado com sucesso"}
 
 @async_session
@@ -203,7 +214,8 @@ async def remove(session: AsyncSession, product_id: str) -> Dict[str, str]:
         raise HTTPException(status_code=404, detail="Produto não encontrado.")
     
     await session.delete(obj_product)
-    await session.commit()
+    await session.flush()
+    await notify_catalog_change(session, obj_product.id)
     return {"message": f"Produto {obj_product.id}: deletado com sucesso"}
     
    
\ No newline at end of file
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+from api.v1.core.config import settings
+from typing import List
+
+
+class ProjectionBatchSchema(BaseModel):
+    plan_ids: List[str] = Field(..., min_items=1)
+    annual_rate: float = settings.PROJECTION_ANNUAL_RATE
+    monthly_contribution: float = 0.0
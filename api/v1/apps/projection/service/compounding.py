@@ -0,0 +1,59 @@
+from typing import Tuple
+import numpy as np
+
+"""
+    Cálculo vetorizado da projeção de saldo na aposentadoria.
+
+    Cada função recebe colunas (arrays NumPy) com um valor por plano, então um bloco inteiro de
+    planos é projetado de uma vez. A capitalização é mensal e feita mês a mês sobre o bloco todo:
+    os planos são ordenados pelo prazo restante, de forma que em cada mês os planos ainda ativos
+    formam um prefixo do array e são atualizados no lugar, sem cópias.
+
+"""
+
+
+def retirement_months(date_of_contract: np.ndarray, date_of_birth: np.ndarray, age_of_retirement: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Calcula o mês da aposentadoria e a quantidade de meses entre a contratação e a aposentadoria
+
+    Args:
+        date_of_contract (np.ndarray): Datas de contratação (datetime64).
+        date_of_birth (np.ndarray): Datas de nascimento dos clientes (datetime64).
+        age_of_retirement (np.ndarray): Idades de aposentadoria.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Mês da aposentadoria (datetime64[M]) e meses de capitalização.
+    """
+    retirement_month = date_of_birth.astype('datetime64[M]') + (age_of_retirement.astype(np.int64) * 12).astype('timedelta64[M]')
+    months = (retirement_month - date_of_contract.astype('datetime64[M]')).astype(np.int64)
+    return retirement_month, np.clip(months, 0, None)
+
+
+def project_balances(initial: np.ndarray, months: np.ndarray, annual_rate: float, monthly_contribution: float = 0.0) -> np.ndarray:
+    """Capitaliza mensalmente o aporte inicial de cada plano até a aposentadoria
+
+    Args:
+        initial (np.ndarray): Aporte inicial de cada plano.
+        months (np.ndarray): Meses de capitalização de cada plano.
+        annual_rate (float): Taxa de rentabilidade anual (0.06 = 6% a.a.).
+        monthly_contribution (float): Aporte mensal somado ao fim de cada mês.
+
+    Returns:
+        np.ndarray: Saldo projetado de cada plano, na mesma ordem da entrada.
+    """
+    growth = (1.0 + annual_rate) ** (1.0 / 12.0)
+
+    order = np.argsort(-months, kind='stable')
+    balances = initial.astype(np.float64)[order]
+    # Meses em ordem crescente para que searchsorted conte quantos planos ainda capitalizam
+    ascending = -months[order]
+
+    for month in range(int(months.max(initial=0))):
+        active = int(np.searchsorted(ascending, -month, side='left'))
+        prefix = balances[:active]
+        prefix *= growth
+        if monthly_contribution:
+            prefix += monthly_contribution
+
+    projected = np.empty_like(balances)
+    projected[order] = balances
+    return projected
@@ -0,0 +1,321 @@
+from api.v1.apps.projection.service.compounding import retirement_months, project_balances
+from api.v1.apps.projection.service.simulation import simulate, get_executor
+from api.v1.apps.plan.models.models import Plan
+from api.v1.apps.client.models.models import Client
+from api.v1.apps.plan_balance.models.models import PlanBalance
+from api.v1.apps.products.service.catalog import catalog
+from api.v1.core.config import settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import async_session
+from typing import List, Dict, Any, Tuple, AsyncIterator, Sequence, Optional
+from datetime import date
+from collections import OrderedDict
+from sqlalchemy import select, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from fastapi import HTTPException
+from loguru import logger
+from uuid import UUID
+import numpy as np
+import asyncio
+import secrets
+import json
+
+"""
+    Nesse aquivo contém as funções de projeção do saldo dos planos na aposentadoria.
+
+    Os planos são lidos em blocos colunares (um array NumPy por coluna) e projetados de uma
+    vez por `compounding.project_balances`. Os resultados ficam em cache por worker, com chave
+    no `updated_at` do plano e na data de nascimento do cliente: qualquer alteração no plano
+    (ou na data de nascimento) gera uma nova chave e a projeção antiga deixa de ser usada.
+
+"""
+
+PROJECTION_CHUNK_SIZE: int = 10000
+MAX_BATCH_PLANS: int = 5000
+MAX_JOB_PLANS: int = 50000
+
+
+class ProjectionCache:
+    """Cache LRU das projeções já calculadas neste worker"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key: Tuple) -> Dict[str, Any]:
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def set(self, key: Tuple, value: Dict[str, Any]) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+projection_cache = ProjectionCache(settings.PROJECTION_CACHE_SIZE)
+simulation_cache = ProjectionCache(settings.SIMULATION_CACHE_SIZE)
+_running_simulations: Dict[Tuple, asyncio.Future] = {}
+
+
+def _validate_assumptions(annual_rate: float, monthly_contribution: float) -> None:
+    if not -1 < annual_rate <= 1:
+        raise HTTPException(status_code=400, detail="Informe uma taxa anual válida.")
+
+    if monthly_contribution < 0:
+        raise HTTPException(status_code=400, detail="Informe um valor válido para o aporte mensal.")
+
+
+def validate_batch(plan_ids: List[str], annual_rate: float, monthly_contribution: float, max_plans: int = MAX_BATCH_PLANS) -> List[UUID]:
+    """Valida as premissas e os identificadores de uma projeção em lote
+
+    Returns:
+        List[UUID]: Identificadores dos planos.
+    """
+    _validate_assumptions(annual_rate, monthly_contribution)
+
+    if len(plan_ids) > max_plans:
+        raise HTTPException(status_code=400, detail=f"Informe no máximo {max_plans} planos por requisição.")
+
+    try:
+        return [UUID(str(plan_id)) for plan_id in plan_ids]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="plan_id inválido. Deve ser um UUID válido.")
+
+
+def _projection_query():
+    return (
+        select(Plan.id, Plan.contribution, Plan.date_of_contract, Plan.age_of_retirement, Plan.updated_at, Client.date_of_birth)
+        .join(Client, Client.id == Plan.client_id)
+    )
+
+
+def _project_chunk(rows: Sequence, annual_rate: float, monthly_contribution: float) -> List[Dict[str, Any]]:
+    """Projeta um bloco de planos de uma vez, a partir das linhas transpostas em colunas"""
+    if not rows:
+        return []
+
+    ids, contributions, dates_of_contract, ages_of_retirement, _, dates_of_birth = zip(*rows)
+
+    retirement_month, months = retirement_months(
+        np.array([value.date() for value in dates_of_contract], dtype='datetime64[D]'),
+        np.array(dates_of_birth, dtype='datetime64[D]'),
+        np.array(ages_of_retirement, dtype=np.int64),
+    )
+    balances = project_balances(np.array(contributions, dtype=np.float64), months, annual_rate, monthly_contribution)
+
+    return [
+        {
+            "plan_id": str(plan_id),
+            "retirement_month": str(retirement),
+            "months": int(month_count),
+            "projected_balance": round(float(balance), 2),
+        }
+        for plan_id, retirement, month_count, balance in zip(ids, retirement_month, months, balances)
+    ]
+
+
+def _cache_key(row, annual_rate: float, monthly_contribution: float) -> Tuple:
+    return (row.id, row.updated_at, row.date_of_birth, annual_rate, monthly_contribution)
+
+
+@async_session
+async def project_plans(session: AsyncSession, plan_ids: List[str], annual_rate: float, monthly_contribution: float = 0.0) -> List[Dict[str, Any]]:
+    """Projeta o saldo na aposentadoria de uma lista de planos
+
+    Apenas os planos sem projeção em cache (ou alterados desde a última projeção) são calculados.
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_ids (List[str]): Identificadores dos planos.
+        annual_rate (float): Taxa de rentabilidade anual.
+        monthly_contribution (float): Aporte mensal considerado na projeção.
+
+    Returns:
+        List[Dict[str, Any]]: Projeção de cada plano encontrado.
+    """
+    ids = validate_batch(plan_ids, annual_rate, monthly_contribution)
+
+    query = _projection_query().where(Plan.id == any_(bindparam('plan_ids', ids, type_=ARRAY(PG_UUID(as_uuid=True)))))
+    rows = (await session.execute(query)).all()
+
+    projections = {}
+    missing = []
+    for row in rows:
+        cached = projection_cache.get(_cache_key(row, annual_rate, monthly_contribution))
+        if cached is not None:
+            projections[row.id] = cached
+        else:
+            missing.append(row)
+
+    for row, projection in zip(missing, _project_chunk(missing, annual_rate, monthly_contribution)):
+        projection_cache.set(_cache_key(row, annual_rate, monthly_contribution), projection)
+        projections[row.id] = projection
+
+    logger.info(f"Projeção de {len(rows)} planos ({len(missing)} calculados)")
+    return [projections[plan_id] for plan_id in ids if plan_id in projections]
+
+
+@async_session
+async def get_projection(session: AsyncSession, plan_id: str, annual_rate: float, monthly_contribution: float = 0.0) -> Dict[str, Any]:
+    """Projeta o saldo na aposentadoria de um plano
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id (str): Identificador do plano.
+        annual_rate (float): Taxa de rentabilidade anual.
+        monthly_contribution (float): Aporte mensal considerado na projeção.
+
+    Returns:
+        Dict[str, Any]: Projeção do plano.
+    """
+    projections = await project_plans([plan_id], annual_rate, monthly_contribution, session=session)
+
+    if not projections:
+        raise HTTPException(status_code=404, detail="Plano não encontrado.")
+
+    return projections[0]
+
+
+async def _stream_projections(session: AsyncSession, annual_rate: float, monthly_contribution: float) -> AsyncIterator[bytes]:
+    query = _projection_query().execution_options(yield_per=PROJECTION_CHUNK_SIZE)
+    result = await session.stream(query)
+    async for rows in result.partitions(PROJECTION_CHUNK_SIZE):
+        projections = _project_chunk(rows, annual_rate, monthly_contribution)
+        if projections:
+            yield ("\n".join(json.dumps(projection) for projection in projections) + "\n").encode()
+
+
+def export(session: AsyncSession, annual_rate: float, monthly_contribution: float = 0.0) -> AsyncIterator[bytes]:
+    """Projeta todos os planos em blocos colunares, enviando cada bloco em NDJSON assim que calculado
+
+    Args:
+        session (AsyncSession): Sessão da requisição, mantida aberta até o fim do streaming.
+        annual_rate (float): Taxa de rentabilidade anual.
+        monthly_contribution (float): Aporte mensal considerado na projeção.
+
+    Returns:
+        AsyncIterator[bytes]: Blocos NDJSON com a projeção de cada plano.
+    """
+    _validate_assumptions(annual_rate, monthly_contribution)
+    return _stream_projections(session, annual_rate, monthly_contribution)
+
+
+@async_session
+async def _load_simulation_plan(session: AsyncSession, plan_id: str) -> Tuple[Any, Optional[str]]:
+    """Lê o plano e o nome do produto usados na simulação
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        plan_id (str): Identificador do plano.
+
+    Returns:
+        Tuple[Any, Optional[str]]: Linha do plano (com saldo e data de nascimento) e o nome do produto.
+    """
+    query = (
+        select(Plan.id, Plan.product_id, Plan.age_of_retirement, Plan.updated_at, Client.date_of_birth, PlanBalance.balance)
+        .join(Client, Client.id == Plan.client_id)
+        .outerjoin(PlanBalance, PlanBalance.plan_id == Plan.id)
+        .where(Plan.id == plan_id)
+    )
+    plan = (await session.execute(query)).first()
+
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plano não encontrado.")
+
+    product = await catalog.get(session, plan.product_id)
+    return plan, product.name if product else None
+
+
+def _finish_simulation(key: Tuple, running: asyncio.Future) -> None:
+    """Guarda o resultado da simulação no cache e libera a chave para novas execuções"""
+    _running_simulations.pop(key, None)
+    if not running.cancelled() and running.exception() is None:
+        simulation_cache.set(key, running.result())
+
+
+async def simulate_plan(plan_id: str, paths: int = settings.SIMULATION_DEFAULT_PATHS, seed: Optional[int] = None,
+                        annual_rate: float = settings.PROJECTION_ANNUAL_RATE, volatility: float = settings.SIMULATION_VOLATILITY,
+                        monthly_contribution: float = 0.0, payout_years: int = 20) -> Dict[str, Any]:
+    """Simula o saldo e a renda na aposentadoria do plano com caminhos de rentabilidade aleatórios
+
+    A simulação parte do saldo atual do plano até o mês em que o cliente atinge a idade de
+    aposentadoria e roda no pool de processos. Pedidos com a mesma semente e o mesmo cenário
+    são respondidos pelo cache (ou aguardam a simulação que já está em andamento).
+
+    O plano é lido numa sessão própria, encerrada antes de a simulação ir para o pool de
+    processos: simulações lentas não seguram conexões do banco. A simulação em andamento é
+    compartilhada entre os pedidos e aguardada com `asyncio.shield`, então a desconexão de
+    um cliente não a cancela para os demais.
+
+    Args:
+        plan_id (str): Identificador do plano.
+        paths (int): Quantidade de caminhos simulados.
+        seed (Optional[int]): Semente do gerador. Quando não informada, uma nova é sorteada e devolvida.
+        annual_rate (float): Rentabilidade anual esperada.
+        volatility (float): Volatilidade anual dos retornos.
+        monthly_contribution (float): Aporte mensal considerado na simulação.
+        payout_years (int): Anos de recebimento da renda após a aposentadoria.
+
+    Returns:
+        Dict[str, Any]: Percentis P10/P50/P90 do saldo e da renda mensal na aposentadoria.
+    """
+    _validate_assumptions(annual_rate, monthly_contribution)
+
+    if not 0 < paths <= settings.SIMULATION_MAX_PATHS:
+        raise HTTPException(status_code=400, detail=f"Informe uma quantidade de caminhos entre 1 e {settings.SIMULATION_MAX_PATHS}.")
+
+    if not 0 <= volatility <= 1:
+        raise HTTPException(status_code=400, detail="Informe uma volatilidade válida.")
+
+    if payout_years <= 0:
+        raise HTTPException(status_code=400, detail="Informe uma quantidade de anos de renda válida.")
+
+    if seed is not None and seed < 0:
+        raise HTTPException(status_code=400, detail="Informe uma semente maior ou igual a zero.")
+
+    try:
+        UUID(str(plan_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="plan_id inválido. Deve ser um UUID válido.")
+
+    plan, product_name = await _load_simulation_plan(plan_id=plan_id)
+    retirement_month, months = retirement_months(
+        np.array([date.today()], dtype='datetime64[D]'),
+        np.array([plan.date_of_birth], dtype='datetime64[D]'),
+        np.array([plan.age_of_retirement], dtype=np.int64),
+    )
+
+    if seed is None:
+        seed = secrets.randbits(32)
+
+    initial = float(plan.balance or 0)
+    scenario = (initial, int(months[0]), monthly_contribution, annual_rate, volatility, paths, seed, payout_years * 12)
+    key = (plan.id, plan.updated_at) + scenario
+
+    result = simulation_cache.get(key)
+    if result is None:
+        running = _running_simulations.get(key)
+        if running is None:
+            running = asyncio.get_running_loop().run_in_executor(get_executor(settings.SIMULATION_WORKERS), simulate, *scenario)
+            _running_simulations[key] = running
+            running.add_done_callback(lambda future: _finish_simulation(key, future))
+        result = await asyncio.shield(running)
+
+    return {
+        "plan_id": str(plan.id),
+        "product": product_name,
+        "retirement_month": str(retirement_month[0]),
+        "months": int(months[0]),
+        "paths": paths,
+        "seed": seed,
+        **result,
+    }
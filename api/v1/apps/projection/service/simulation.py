@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+import numpy as np
+
+"""
+    Simulação de Monte Carlo do saldo e da renda na aposentadoria.
+
+    As funções deste módulo são puras e executadas em um `ProcessPoolExecutor`, fora do event
+    loop do uvicorn. Os caminhos são simulados em blocos de `PATHS_PER_BLOCK`, então a memória
+    usada não depende do número de caminhos pedidos. Cada worker do gunicorn tem o seu pool;
+    por padrão `SIMULATION_WORKERS` divide os núcleos entre os `WEB_CONCURRENCY` workers.
+
+"""
+
+PATHS_PER_BLOCK: int = 10000
+PERCENTILES = (10, 50, 90)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Cria (na primeira chamada) o pool de processos usado pelas simulações"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max_workers)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def monthly_income(balance: np.ndarray, annual_rate: float, payout_months: int) -> np.ndarray:
+    """Renda mensal que consome o saldo em `payout_months` meses rendendo `annual_rate` ao ano"""
+    rate = (1.0 + annual_rate) ** (1.0 / 12.0) - 1.0
+    if rate == 0:
+        return balance / payout_months
+    return balance * rate / (1.0 - (1.0 + rate) ** -payout_months)
+
+
+def simulate(initial: float, months: int, monthly_contribution: float, annual_rate: float, volatility: float,
+             paths: int, seed: int, payout_months: int) -> Dict[str, Dict[str, float]]:
+    """Simula os caminhos de rentabilidade e devolve os percentis de saldo e renda
+
+    Os retornos mensais são log-normais, com média igual à taxa anual informada e desvio
+    padrão anual `volatility`.
+
+    Args:
+        initial (float): Saldo atual do plano.
+        months (int): Meses até a aposentadoria.
+        monthly_contribution (float): Aporte mensal somado ao fim de cada mês.
+        annual_rate (float): Rentabilidade anual esperada.
+        volatility (float): Volatilidade anual dos retornos.
+        paths (int): Quantidade de caminhos simulados.
+        seed (int): Semente do gerador, para reprodutibilidade.
+        payout_months (int): Meses de recebimento da renda após a aposentadoria.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Percentis (P10, P50, P90) do saldo e da renda mensal.
+    """
+    rng = np.random.default_rng(seed)
+    sigma = volatility / np.sqrt(12.0)
+    mu = np.log1p(annual_rate) / 12.0 - sigma ** 2 / 2.0
+
+    balances = np.empty(paths, dtype=np.float64)
+    for start in range(0, paths, PATHS_PER_BLOCK):
+        block = balances[start:start + PATHS_PER_BLOCK]
+        block.fill(initial)
+        for _ in range(months):
+            block *= np.exp(rng.normal(mu, sigma, block.size))
+            if monthly_contribution:
+                block += monthly_contribution
+
+    balance_percentiles = np.percentile(balances, PERCENTILES)
+    income_percentiles = monthly_income(balance_percentiles, annual_rate, payout_months)
+
+    return {
+        "balance": {f"p{p}": round(float(value), 2) for p, value in zip(PERCENTILES, balance_percentiles)},
+        "monthly_income": {f"p{p}": round(float(value), 2) for p, value in zip(PERCENTILES, income_percentiles)},
+    }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, UUID, DECIMAL, ForeignKey
+from sqlalchemy import Column, UUID, DECIMAL, DateTime, ForeignKey, Index, func, text
 from database.session import Base
 from sqlalchemy.orm import relationship
 import uuid
@@ -6,9 +6,14 @@ import uuid
 
 class Rescue(Base):
     __tablename__ = 'rescue'
+    __table_args__ = (
+        Index('ix_rescue_plan_id_id', 'plan_id', 'id'),
+        Index('ix_rescue_plan_id_created_at', 'plan_id', text('created_at DESC')),
+    )
 
     id = Column(UUID(as_uuid=True), unique=True, primary_key=True, default=uuid.uuid4)
     plan_id = Column(UUID(as_uuid=True), ForeignKey('plan.id'), nullable=False)
     rescue_value = Column(DECIMAL(10, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     _plans = relationship('Plan', back_populates='_rescues')
@@ -0,0 +1,69 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+"""
+    Carências de resgate calculadas a partir das datas reais.
+
+    Cada plano guarda em `next_eligible_rescue_date` a primeira data em que um novo resgate é
+    permitido: a data de contratação mais a carência inicial do produto ou, havendo resgates,
+    a data do último resgate mais a carência entre resgates. A verificação e a reserva da
+    próxima janela são feitas no mesmo UPDATE, então dois resgates simultâneos no mesmo
+    plano não passam ambos pela carência.
+
+"""
+
+# Todas as datas de carência usam o dia em UTC, independente do fuso da sessão do banco
+UTC_TODAY = "(now() AT TIME ZONE 'UTC')::date"
+
+CLAIM_RESCUE_WINDOW = text(f"""
+    UPDATE plan SET next_eligible_rescue_date = {UTC_TODAY} + CAST(:lack_entre_resgates AS integer)
+    WHERE id = :plan_id AND (next_eligible_rescue_date IS NULL OR next_eligible_rescue_date <= {UTC_TODAY})
+    RETURNING next_eligible_rescue_date
+""")
+
+NEXT_ELIGIBLE = """
+    UPDATE plan p SET next_eligible_rescue_date = GREATEST(
+        (p.date_of_contract AT TIME ZONE 'UTC')::date + pr.lack_initial_of_rescue,
+        (SELECT (r.created_at AT TIME ZONE 'UTC')::date + pr.lack_entre_resgates
+         FROM rescue r WHERE r.plan_id = p.id ORDER BY r.created_at DESC LIMIT 1)
+    )
+    FROM products pr
+    WHERE pr.id = p.product_id AND {condition}
+"""
+
+RECOMPUTE_NEXT_ELIGIBLE = text(NEXT_ELIGIBLE.format(condition="p.id = :plan_id"))
+
+RECOMPUTE_PRODUCT_NEXT_ELIGIBLE = text(NEXT_ELIGIBLE.format(condition="p.product_id = :product_id"))
+
+
+def first_eligible_date(date_of_contract: datetime, lack_initial_of_rescue: int) -> date:
+    """Data a partir da qual o primeiro resgate do plano é permitido"""
+    if date_of_contract.tzinfo is not None:
+        date_of_contract = date_of_contract.astimezone(timezone.utc)
+    return date_of_contract.date() + timedelta(days=lack_initial_of_rescue)
+
+
+async def claim_rescue_window(session: AsyncSession, plan_id, lack_entre_resgates: int) -> Optional[date]:
+    """Verifica a carência e reserva a próxima janela de resgate do plano
+
+    Args:
+        session (AsyncSession): Sessão da transação do resgate.
+        plan_id: Identificador do plano.
+        lack_entre_resgates (int): Carência entre resgates do produto, em dias.
+
+    Returns:
+        Optional[date]: Próxima data de resgate permitida ou None quando a carência não foi cumprida.
+    """
+    return await session.scalar(CLAIM_RESCUE_WINDOW, {"plan_id": plan_id, "lack_entre_resgates": lack_entre_resgates})
+
+
+async def recompute_next_eligible(session: AsyncSession, plan_id) -> None:
+    """Recalcula a próxima data de resgate do plano (após remover um resgate ou alterar o plano)"""
+    await session.execute(RECOMPUTE_NEXT_ELIGIBLE, {"plan_id": plan_id})
+
+
+async def recompute_product_next_eligible(session: AsyncSession, product_id) -> None:
+    """Recalcula a próxima data de resgate de todos os planos do produto (após alterar as carências)"""
+    await session.execute(RECOMPUTE_PRODUCT_NEXT_ELIGIBLE, {"product_id": product_id})
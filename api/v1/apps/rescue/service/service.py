@@ -1,11 +1,21 @@
 from api.v1.apps.rescue.schemas.schemas import RescueSchema
-from api.v1.apps.products.models.models import Products
+from api.v1.apps.products.service.catalog import catalog
 from api.v1.apps.rescue.models.models import Rescue
 from sqlalchemy.ext.asyncio import AsyncSession
 from api.v1.apps.plan.models.models import Plan
+from api.v1.apps.plan_balance.service.service import credit, debit, adjust as adjust_balance
+from api.v1.apps.analytics.service.rollup import record_flow
+from api.v1.apps.plan_balance.models.models import PlanBalance
+from api.v1.apps.rescue.service.eligibility import claim_rescue_window, recompute_next_eligible, UTC_TODAY
+from api.v1.apps.plan.service.service import get_owner as get_plan_owner
+from api.v1.websockets.events import emit_plan_event
 from database.session import async_session
-from typing import List, Dict, Optional
+from api.v1.core.pagination import paginate, decode_cursor, DEFAULT_PAGE_LIMIT
+from api.v1.core.export import stream_table, ExportFormatEnum, ExportCompressionEnum
+from typing import List, Dict, Optional, AsyncIterator
+from decimal import Decimal
 from sqlalchemy.future import select
+from sqlalchemy import literal_column
 from loguru import logger
 from fastapi import HTTPException
 from uuid import UUID
@@ -41,39 +51,47 @@ async def insert(session: AsyncSession, args: Dict[str, any]) -> Dict[str, str]:
     if not plan:
         raise HTTPException(status_code=404, detail="Plano não encontrado.")
 
-    product_query = select(Products).where(Products.id == plan.product_id)
-    product = await session.scalar(product_query)
+    product = await catalog.get(session, plan.product_id)
 
     if not product:
         raise HTTPException(status_code=404, detail="Produto associado ao plano não encontrado.")
 
-    if new_rescue.rescue_value > plan.contribution:
-        raise HTTPException(status_code=400, detail="Não há saldo suficiente para resgatar o valor informado.")
-
     if product.lack_initial_of_rescue < 60:
         raise HTTPException(status_code=400, detail="Carência inicial de resgate de 60 dias não foi cumprida.")
 
+    if await claim_rescue_window(session, plan.id, product.lack_entre_resgates) is None:
+        raise HTTPException(status_code=400, detail=f"Carência de resgate não cumprida. Próximo resgate permitido em {plan.next_eligible_rescue_date:%d/%m/%Y}.")
+
+    balance = await debit(session, plan.id, new_rescue.rescue_value)
+    if balance is None:
+        raise HTTPException(status_code=400, detail="Não há saldo suficiente para resgatar o valor informado.")
+
     session.add(new_rescue)
-    await session.commit()
+    await session.flush()
+    await record_flow(session, plan.id, aum=-new_rescue.rescue_value, rescues=new_rescue.rescue_value)
+    await emit_plan_event(session, "rescue.processed", plan.id, plan.client_id, balance,
+                          rescue_id=new_rescue.id, rescue_value=new_rescue.rescue_value)
     logger.success("Novo resgate registrado com sucesso")
     return {"id": str(new_rescue.id)}
 
 @async_session
-async def get_all(session: AsyncSession, rescue_schema) -> List[RescueSchema]:
+async def get_all(session: AsyncSession, rescue_schema, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Função para listar todos os resgates realizados
     
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         rescue_schema: Esquema do resgate.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        List[RescueSchema]: Lista de resgates.
+        Dict: Página com a lista de resgates e o cursor da próxima página.
     """
-    try: 
-        query = select(Rescue)
-        result = await session.execute(query)
-        list: List[rescue_schema] = result.scalars().all()
-        return list
+    after = decode_cursor(cursor)
+
+    try:
+        query = select(*Rescue.__table__.c)
+        return await paginate(session, query, Rescue.id, limit, after)
     except Exception as e:
         logger.error(f"Erro ao listar resgates: {e}")
         raise HTTPException(status_code=500, detail="Erro ao listar resgates")
@@ -98,14 +116,16 @@ async def get_one(session: AsyncSession, rescue_id: str) -> Dict:
     return obj_rescue
 
 @async_session
-async def get_rescue_by_plan_id(session: AsyncSession, plan_id: str) -> Dict:
+async def get_rescue_by_plan_id(session: AsyncSession, plan_id: str, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
     """Filtra um resgate pelo id do plano
     Args:
         session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
         plan_id (str): Id do plano a ser resgatado.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
 
     Returns:
-        Dict: Dicionário com mensagem de sucesso ou falha.
+        Dict: Página com a lista de resgates e o cursor da próxima página.
 
     """
     try:
@@ -113,9 +133,29 @@ async def get_rescue_by_plan_id(session: AsyncSession, plan_id: str) -> Dict:
     except ValueError:
         raise HTTPException(status_code=400, detail="plan_id inválido. Deve ser um UUID válido.")
     
-    obj = await session.execute(select(Rescue).where(Rescue.plan_id == plan_id))
-    obj_plan = obj.scalars().all()
-    return obj_plan
+    after = decode_cursor(cursor)
+    query = select(*Rescue.__table__.c).where(Rescue.plan_id == plan_id)
+    return await paginate(session, query, Rescue.id, limit, after)
+
+@async_session
+async def get_eligible_plans(session: AsyncSession, limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[str] = None) -> Dict:
+    """Lista os planos com carência cumprida e saldo disponível para resgate
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        limit (int): Quantidade máxima de itens na página.
+        cursor (Optional[str]): Cursor retornado pela página anterior.
+
+    Returns:
+        Dict: Página com a lista de planos e o cursor da próxima página.
+    """
+    after = decode_cursor(cursor)
+    query = (
+        select(*Plan.__table__.c)
+        .join(PlanBalance, PlanBalance.plan_id == Plan.id)
+        .where(Plan.next_eligible_rescue_date <= literal_column(UTC_TODAY), PlanBalance.balance > 0)
+    )
+    return await paginate(session, query, Plan.id, limit, after)
 
 @async_session
 async def update(session: AsyncSession, rescue_id: str, **kwargs) -> Dict[str, Optional[str]]:
@@ -145,14 +185,23 @@ async def update(session: AsyncSession, rescue_id: str, **kwargs) -> Dict[str, O
     if not existing_rescue:
         raise HTTPException(status_code=404, detail="Resgate não encontrado")
 
-    plan_result = await session.execute(select(Plan).where(Plan.id == existing_rescue.plan_id))
-    plan = plan_result.scalars().first()
+    previous_plan = await session.scalar(select(Plan).where(Plan.id == existing_rescue.plan_id))
+    plan_id = kwargs.get('plan_id') or existing_rescue.plan_id
 
-    if not plan:
+    try:
+        UUID(str(plan_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="plan_id inválido. Deve ser um UUID válido.")
+
+    if str(plan_id) == str(existing_rescue.plan_id):
+        plan = previous_plan
+    else:
+        plan = await session.scalar(select(Plan).where(Plan.id == plan_id))
+
+    if not plan or not previous_plan:
         raise HTTPException(status_code=404, detail="Plano associado não encontrado")
 
-    product_result = await session.execute(select(Products).where(Products.id == plan.product_id))
-    product = product_result.scalars().first()
+    product = await catalog.get(session, plan.product_id)
 
     if not product:
         raise HTTPException(status_code=400, detail="Produto associado ao plano não encontrado")
@@ -160,11 +209,33 @@ async def update(session: AsyncSession, rescue_id: str, **kwargs) -> Dict[str, O
     if product.lack_entre_resgates < 30:
         raise HTTPException(status_code=400, detail=f"Carência de 30 dias entre resgates não foi cumprida.")
 
+    previous_value = existing_rescue.rescue_value
+
     for key, value in kwargs.items():
         if value is not None and hasattr(existing_rescue, key):
             setattr(existing_rescue, key, value)
 
-    await session.commit()
+    await session.flush()
+
+    if plan is not previous_plan:
+        value = Decimal(str(rescue_value))
+        previous_balance = await credit(session, previous_plan.id, previous_value)
+        balance = await debit(session, plan.id, value)
+        if balance is None:
+            raise HTTPException(status_code=400, detail="Não há saldo suficiente no novo plano para transferir o resgate.")
+        await record_flow(session, previous_plan.id, aum=previous_value, rescues=-previous_value)
+        await record_flow(session, plan.id, aum=-value, rescues=value)
+        await recompute_next_eligible(session, previous_plan.id)
+        await recompute_next_eligible(session, plan.id)
+        await emit_plan_event(session, "rescue.updated", previous_plan.id, previous_plan.client_id, previous_balance,
+                              rescue_id=existing_rescue.id)
+    else:
+        delta = Decimal(str(rescue_value)) - previous_value
+        balance = await adjust_balance(session, plan.id, -delta, "Não há saldo suficiente para resgatar o valor informado.")
+        await record_flow(session, plan.id, aum=-delta, rescues=delta)
+
+    await emit_plan_event(session, "rescue.updated", plan.id, plan.client_id, balance,
+                          rescue_id=existing_rescue.id, rescue_value=existing_rescue.rescue_value)
     return {"message": f"Resgate {existing_rescue.id}: atualizado com sucesso"}
 
 @async_session
@@ -191,7 +262,25 @@ async def remove(session: AsyncSession, rescue_id: str) -> Dict[str, str]:
         raise HTTPException(status_code=404, detail="Resgate não encontrado.")
 
     await session.delete(obj_rescue)
-    await session.commit()
+    await session.flush()
+    balance = await credit(session, obj_rescue.plan_id, obj_rescue.rescue_value)
+    await recompute_next_eligible(session, obj_rescue.plan_id)
+    await record_flow(session, obj_rescue.plan_id, aum=obj_rescue.rescue_value, rescues=-obj_rescue.rescue_value)
+    await emit_plan_event(session, "rescue.removed", obj_rescue.plan_id,
+                          await get_plan_owner(session=session, plan_id=obj_rescue.plan_id), balance,
+                          rescue_id=obj_rescue.id, rescue_value=obj_rescue.rescue_value)
     return {"message": f"Resgate {obj_rescue.id}: deletado com sucesso"}
-    
-   
\ No newline at end of file
+
+
+def export(session: AsyncSession, export_format: ExportFormatEnum, compression: Optional[ExportCompressionEnum] = None) -> AsyncIterator[bytes]:
+    """Exporta todos os resgates em streaming por um cursor do servidor
+
+    Args:
+        session (AsyncSession): Sessão da requisição, mantida aberta até o fim do streaming.
+        export_format (ExportFormatEnum): Formato de saída (ndjson ou csv).
+        compression (Optional[ExportCompressionEnum]): Compressão aplicada à saída.
+
+    Returns:
+        AsyncIterator[bytes]: Blocos do arquivo exportado.
+    """
+    return stream_table(session, Rescue.__table__, export_format, compression)
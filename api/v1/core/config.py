@@ -6,5 +6,61 @@ class Settings:
     DB_HOST: str = os.getenv("DB_HOST")
     DB_USER: str = os.getenv("DB_USER")
     DB_PORT: str = os.getenv("DB_PORT")
+    DB_DIRECT_HOST: str = os.getenv("DB_DIRECT_HOST", os.getenv("DB_HOST"))
+    DB_DIRECT_PORT: str = os.getenv("DB_DIRECT_PORT", os.getenv("DB_PORT"))
+    ENVIRONMENT: str = os.getenv("ENVIRONMENT", "production")
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    CATALOG_TTL_SECONDS: int = int(os.getenv("CATALOG_TTL_SECONDS", "60"))
+    CATALOG_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("CATALOG_CACHE_MAX_AGE_SECONDS", "60"))
+    CATALOG_STALE_WHILE_REVALIDATE_SECONDS: int = int(os.getenv("CATALOG_STALE_WHILE_REVALIDATE_SECONDS", "300"))
+    PROJECTION_ANNUAL_RATE: float = float(os.getenv("PROJECTION_ANNUAL_RATE", "0.06"))
+    PROJECTION_CACHE_SIZE: int = int(os.getenv("PROJECTION_CACHE_SIZE", "100000"))
+    SIMULATION_WORKERS: int = int(os.getenv("SIMULATION_WORKERS", str(max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "2"))))))
+    SIMULATION_DEFAULT_PATHS: int = int(os.getenv("SIMULATION_DEFAULT_PATHS", "20000"))
+    SIMULATION_MAX_PATHS: int = int(os.getenv("SIMULATION_MAX_PATHS", "100000"))
+    SIMULATION_VOLATILITY: float = float(os.getenv("SIMULATION_VOLATILITY", "0.12"))
+    SIMULATION_CACHE_SIZE: int = int(os.getenv("SIMULATION_CACHE_SIZE", "1024"))
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    LOG_PATH: str = os.getenv("LOG_PATH", "logs/logs.log")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG")
+    LOG_SERIALIZE: bool = os.getenv("LOG_SERIALIZE", "true").lower() == "true"
+    LOG_DIAGNOSE: bool = os.getenv("LOG_DIAGNOSE", "false").lower() == "true"
+    LOG_ROTATION_SIZE_MB: int = int(os.getenv("LOG_ROTATION_SIZE_MB", "100"))
+    LOG_ROTATION_INTERVAL_HOURS: int = int(os.getenv("LOG_ROTATION_INTERVAL_HOURS", "24"))
+    LOG_RETENTION_DAYS: int = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+    LOG_COMPRESSION_LEVEL: int = int(os.getenv("LOG_COMPRESSION_LEVEL", "3"))
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "SUCCESS:10")
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    QUERY_STATS_MAX_FINGERPRINTS: int = int(os.getenv("QUERY_STATS_MAX_FINGERPRINTS", "1000"))
+    QUERY_STATS_SAMPLES: int = int(os.getenv("QUERY_STATS_SAMPLES", "512"))
+    WEBSOCKET_BACKPLANE: str = os.getenv("WEBSOCKET_BACKPLANE", "postgres")
+    WEBSOCKET_SEND_QUEUE_SIZE: int = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "256"))
+    WEBSOCKET_SLOW_CONSUMER_POLICY: str = os.getenv("WEBSOCKET_SLOW_CONSUMER_POLICY", "drop")
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL_SECONDS: float = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1.0"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    OUTBOX_RETRY_BASE_SECONDS: float = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "1.0"))
+    OUTBOX_RETRY_MAX_SECONDS: float = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "300"))
+    OUTBOX_RETENTION_HOURS: float = float(os.getenv("OUTBOX_RETENTION_HOURS", "168"))
+    OUTBOX_PURGE_INTERVAL_SECONDS: float = float(os.getenv("OUTBOX_PURGE_INTERVAL_SECONDS", "3600"))
+    OUTBOX_PURGE_BATCH_SIZE: int = int(os.getenv("OUTBOX_PURGE_BATCH_SIZE", "5000"))
+    JOB_WORKER_CONCURRENCY: int = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+    JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+    JOB_RETRY_MAX_SECONDS: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+    JOB_RETENTION_HOURS: float = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+    JOB_PURGE_INTERVAL_SECONDS: float = float(os.getenv("JOB_PURGE_INTERVAL_SECONDS", "3600"))
+    JOB_PURGE_BATCH_SIZE: int = int(os.getenv("JOB_PURGE_BATCH_SIZE", "5000"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,72 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select, literal_column
+from typing import Any, Awaitable, Callable, Optional
+from api.v1.core.config import settings
+from uuid import UUID
+
+"""
+    ETag e GET condicional (If-None-Match) para as rotas de leitura.
+
+    As entidades usam a versão da linha no Postgres (`xmin`, alterada a cada UPDATE), lida com
+    uma consulta pela chave primária, sem carregar nem serializar a linha. As rotas do catálogo
+    de produtos usam o digest do snapshot em memória e respondem 304 sem acessar o banco.
+
+"""
+
+ENTITY_CACHE_CONTROL = "private, no-cache"
+CATALOG_CACHE_CONTROL = (
+    f"public, max-age={settings.CATALOG_CACHE_MAX_AGE_SECONDS}, "
+    f"stale-while-revalidate={settings.CATALOG_STALE_WHILE_REVALIDATE_SECONDS}"
+)
+
+
+def make_etag(*parts: Any) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara o header If-None-Match com o ETag atual (comparação fraca, como pede a RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+async def row_version(session: AsyncSession, model, row_id: str) -> Optional[str]:
+    """Busca apenas a versão (`xmin`) da linha pela chave primária
+
+    Returns:
+        Optional[str]: Versão da linha ou None quando o identificador é inválido ou não existe.
+    """
+    try:
+        UUID(str(row_id))
+    except ValueError:
+        return None
+    query = select(literal_column("xmin::text")).select_from(model).where(model.id == row_id)
+    return await session.scalar(query)
+
+
+async def conditional_response(if_none_match: Optional[str], etag: Optional[str], cache_control: str,
+                               load: Callable[[], Awaitable[Any]]) -> Response:
+    """Responde 304 quando o cliente já tem a versão atual; caso contrário carrega e serializa o conteúdo
+
+    Args:
+        if_none_match (Optional[str]): Header If-None-Match da requisição.
+        etag (Optional[str]): ETag da versão atual (None quando não há versão, ex.: registro inexistente).
+        cache_control (str): Valor do header Cache-Control.
+        load (Callable[[], Awaitable[Any]]): Função que carrega o conteúdo da resposta.
+
+    Returns:
+        Response: Resposta 304 sem corpo ou 200 com o conteúdo e o ETag.
+    """
+    headers = {"Cache-Control": cache_control}
+    if etag is not None:
+        headers["ETag"] = etag
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=jsonable_encoder(await load()), headers=headers)
@@ -0,0 +1,105 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+from sqlalchemy import Table, select
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+import zstandard
+import orjson
+import csv
+import io
+
+"""
+    Exportação em streaming das tabelas para as extrações noturnas.
+
+    As linhas são lidas por um cursor do lado do servidor (`AsyncSession.stream`) em blocos
+    de `EXPORT_CHUNK_SIZE` e cada bloco é serializado (e opcionalmente comprimido) e enviado
+    antes do próximo ser lido. Nenhum objeto ORM é construído e o uso de memória não depende
+    do tamanho da tabela.
+
+"""
+
+EXPORT_CHUNK_SIZE: int = 5000
+
+
+class ExportFormatEnum(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ExportCompressionEnum(str, Enum):
+    zstd = "zstd"
+
+
+MEDIA_TYPES = {
+    ExportFormatEnum.ndjson: "application/x-ndjson",
+    ExportFormatEnum.csv: "text/csv",
+}
+
+
+def _to_text(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def _serialize(rows, columns, export_format: ExportFormatEnum) -> bytes:
+    if export_format == ExportFormatEnum.csv:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([[_to_text(value) for value in row] for row in rows])
+        return buffer.getvalue().encode()
+
+    lines = [orjson.dumps(dict(zip(columns, row)), default=_to_text) for row in rows]
+    return b"\n".join(lines) + b"\n"
+
+
+async def stream_table(session: AsyncSession, table: Table, export_format: ExportFormatEnum,
+                       compression: Optional[ExportCompressionEnum] = None) -> AsyncIterator[bytes]:
+    """Lê a tabela inteira por um cursor do servidor e gera os blocos já serializados
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        table (Table): Tabela a ser exportada.
+        export_format (ExportFormatEnum): Formato de saída (ndjson ou csv).
+        compression (Optional[ExportCompressionEnum]): Compressão aplicada à saída.
+
+    Returns:
+        AsyncIterator[bytes]: Blocos do arquivo exportado.
+    """
+    compressor = zstandard.ZstdCompressor().compressobj() if compression == ExportCompressionEnum.zstd else None
+    columns = [column.name for column in table.c]
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    if export_format == ExportFormatEnum.csv:
+        yield emit((",".join(columns) + "\r\n").encode())
+
+    query = select(*table.c).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    result = await session.stream(query)
+    async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+        chunk = emit(_serialize(rows, columns, export_format))
+        if chunk:
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+def export_response(stream: AsyncIterator[bytes], name: str, export_format: ExportFormatEnum,
+                    compression: Optional[ExportCompressionEnum] = None) -> StreamingResponse:
+    """Monta a resposta em streaming com o nome de arquivo adequado"""
+    filename = f"{name}.{export_format.value}"
+    media_type = MEDIA_TYPES[export_format]
+
+    if compression == ExportCompressionEnum.zstd:
+        filename = f"{filename}.zst"
+        media_type = "application/zstd"
+
+    return StreamingResponse(stream, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
@@ -0,0 +1,73 @@
+from typing import Dict, List, Any
+from fastapi import HTTPException, UploadFile
+import json
+import csv
+import io
+
+"""
+    Leitura dos arquivos enviados para as rotas de carga em lote (CSV ou NDJSON).
+
+"""
+
+CSV_SUFFIXES = (".csv",)
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+async def read_records(file: UploadFile) -> List[Dict[str, Any]]:
+    """Lê o arquivo enviado e devolve uma lista de registros (um dicionário por linha)
+
+    Args:
+        file (UploadFile): Arquivo CSV (com cabeçalho) ou NDJSON.
+
+    Returns:
+        List[Dict[str, Any]]: Registros na ordem em que aparecem no arquivo.
+    """
+    filename = (file.filename or "").lower()
+    content_type = file.content_type or ""
+    text = (await file.read()).decode("utf-8-sig")
+
+    if filename.endswith(CSV_SUFFIXES) or content_type == "text/csv":
+        return list(csv.DictReader(io.StringIO(text)))
+
+    if filename.endswith(NDJSON_SUFFIXES) or content_type in ("application/x-ndjson", "application/jsonl"):
+        records = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                raise HTTPException(status_code=400, detail=f"Linha {line_number} do arquivo não é um JSON válido.")
+            if not isinstance(record, dict):
+                raise HTTPException(status_code=400, detail=f"Linha {line_number} do arquivo não é um objeto JSON.")
+            records.append(record)
+        return records
+
+    raise HTTPException(status_code=400, detail="Formato de arquivo não suportado. Envie um arquivo CSV ou NDJSON.")
+
+
+def to_columns(records: List[Dict[str, Any]], fields: List[str]) -> Dict[str, List[Any]]:
+    """Transpõe os registros em colunas, uma lista de valores por campo"""
+    return {field: [record.get(field) for record in records] for field in fields}
+
+
+def check_column(values: List[Any], parse, message: str, errors: List[List[str]]) -> List[Any]:
+    """Converte os valores de uma coluna, um a um, registrando a mensagem nas linhas inválidas
+
+    Args:
+        values (List[Any]): Valores da coluna.
+        parse: Função que converte o valor e lança ValueError/TypeError quando inválido.
+        message (str): Mensagem registrada nas linhas inválidas.
+        errors (List[List[str]]): Erros de cada linha, atualizados no lugar.
+
+    Returns:
+        List[Any]: Valores convertidos (None nas linhas inválidas).
+    """
+    parsed = []
+    for index, value in enumerate(values):
+        try:
+            parsed.append(parse(value))
+        except (ValueError, TypeError, ArithmeticError):
+            parsed.append(None)
+            errors[index].append(message)
+    return parsed
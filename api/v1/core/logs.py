@@ -0,0 +1,109 @@
+from api.v1.core.config import settings
+from datetime import timedelta
+from typing import Dict
+from loguru import logger
+import itertools
+import zstandard
+import sys
+import os
+
+"""
+    Pipeline de logs da aplicação.
+
+    Todos os sinks usam `enqueue=True`: a chamada ao logger apenas coloca a mensagem numa fila
+    e uma thread do loguru faz a escrita, a rotação e a compressão, fora do event loop.
+    O arquivo é gravado em JSON (uma linha por registro), rotacionado por tamanho ou por tempo
+    (o que ocorrer primeiro) e os arquivos rotacionados são comprimidos com zstd.
+    Os níveis configurados em `LOG_SAMPLING` (ex.: "SUCCESS:10") são amostrados: apenas um a
+    cada N registros desse nível é emitido.
+
+"""
+
+STDOUT_FORMAT = "<green>{time}</green> <level>{message}</level>"
+
+
+class SizeOrTimeRotation:
+    """Rotaciona o arquivo quando ele atingir `max_bytes` ou quando `interval` tiver passado"""
+
+    def __init__(self, max_bytes: int, interval: timedelta):
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._next_rotation = None
+
+    def __call__(self, message, file) -> bool:
+        now = message.record["time"]
+        if self._next_rotation is None:
+            self._next_rotation = now + self.interval
+
+        if now >= self._next_rotation or file.tell() + len(message) > self.max_bytes:
+            self._next_rotation = now + self.interval
+            return True
+        return False
+
+
+def compress_zstd(path: str) -> None:
+    """Comprime o arquivo rotacionado para `<arquivo>.zst` e remove o original"""
+    with open(path, "rb") as source, open(f"{path}.zst", "wb") as target:
+        zstandard.ZstdCompressor(level=settings.LOG_COMPRESSION_LEVEL).copy_stream(source, target)
+    os.remove(path)
+
+
+def parse_sampling(spec: str) -> Dict[str, int]:
+    """Converte "SUCCESS:10,INFO:2" em {"SUCCESS": 10, "INFO": 2}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        level, _, rate = item.partition(":")
+        rates[level.strip().upper()] = max(int(rate), 1)
+    return rates
+
+
+class LevelSampler:
+    """Filtro que emite apenas um a cada N registros dos níveis amostrados
+
+    Erros e avisos não devem ser configurados aqui; os níveis ausentes passam sempre.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        self.rates = rates
+        self._counters = {level: itertools.count() for level in rates}
+
+    def __call__(self, record) -> bool:
+        counter = self._counters.get(record["level"].name)
+        if counter is None:
+            return True
+        return next(counter) % self.rates[record["level"].name] == 0
+
+
+def configure_logging() -> None:
+    """Substitui os sinks padrão do loguru pelos sinks assíncronos da aplicação"""
+    rates = parse_sampling(settings.LOG_SAMPLING)
+
+    logger.remove()
+    logger.add(
+        settings.LOG_PATH,
+        level=settings.LOG_LEVEL,
+        serialize=settings.LOG_SERIALIZE,
+        enqueue=True,
+        rotation=SizeOrTimeRotation(settings.LOG_ROTATION_SIZE_MB * 1024 * 1024,
+                                    timedelta(hours=settings.LOG_ROTATION_INTERVAL_HOURS)),
+        compression=compress_zstd,
+        retention=f"{settings.LOG_RETENTION_DAYS} days",
+        filter=LevelSampler(rates),
+        backtrace=False,
+        diagnose=False,
+    )
+    logger.add(
+        sys.stdout,
+        level=settings.LOG_LEVEL,
+        colorize=True,
+        format=STDOUT_FORMAT,
+        enqueue=True,
+        filter=LevelSampler(rates),
+        backtrace=True,
+        diagnose=settings.LOG_DIAGNOSE,
+    )
+
+
+def shutdown_logging() -> None:
+    """Esvazia as filas e encerra as threads dos sinks"""
+    logger.remove()
@@ -0,0 +1,151 @@
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, REGISTRY
+from prometheus_client import multiprocess
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.engine import Engine
+from sqlalchemy import event
+from fastapi.responses import Response
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from time import perf_counter
+import os
+
+"""
+    Métricas da aplicação no formato texto do Prometheus (`GET /metrics`).
+
+    - `MetricsMiddleware` (ASGI puro) registra latência e status por template de rota
+      (`/plans/get-one-plan/{plan_id}/`, e não a URL com o id) e, ao final da requisição,
+      o número de queries e o tempo gasto no banco por ela.
+    - Os eventos do engine contam as queries da requisição corrente (via contextvar) e mantêm
+      os gauges do pool (conexões em uso e overflow); `InstrumentedQueuePool` mede a espera
+      por uma conexão livre.
+
+    Com vários workers do gunicorn, `PROMETHEUS_MULTIPROC_DIR` deve apontar para um diretório
+    vazio compartilhado antes de iniciar os processos: cada worker grava seus valores em
+    arquivos mmap e o `/metrics` de qualquer worker agrega todos eles. O nginx não expõe o
+    `/metrics`: a coleta é feita direto no serviço `web` (porta 8080), pela rede interna.
+
+"""
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter("http_requests_total", "Requisições HTTP por rota e status", ["method", "route", "status"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Latência das requisições HTTP por rota",
+                            ["method", "route"], buckets=LATENCY_BUCKETS)
+DB_QUERIES = Counter("http_request_db_queries_total", "Queries executadas pelas requisições por rota", ["method", "route"])
+DB_SECONDS = Counter("http_request_db_seconds_total", "Tempo gasto no banco pelas requisições por rota", ["method", "route"])
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Conexões do pool em uso", multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Conexões abertas além do pool_size", multiprocess_mode="livesum")
+POOL_WAIT = Histogram("db_pool_wait_seconds", "Espera por uma conexão do pool", buckets=POOL_WAIT_BUCKETS)
+
+_request_db: ContextVar[Optional[list]] = ContextVar("request_db", default=None)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra as métricas HTTP de cada requisição"""
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[object, str] = {}
+        self._children: Dict[Tuple[str, str], tuple] = {}
+        self._statuses: Dict[Tuple[str, str, int], Counter] = {}
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+
+        template = self._templates.get(endpoint)
+        if template is None:
+            template = next((route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+                            UNMATCHED_ROUTE)
+            self._templates[endpoint] = template
+        return template
+
+    def _series(self, method: str, route: str) -> tuple:
+        key = (method, route)
+        children = self._children.get(key)
+        if children is None:
+            children = (REQUEST_LATENCY.labels(method, route), DB_QUERIES.labels(method, route), DB_SECONDS.labels(method, route))
+            self._children[key] = children
+        return children
+
+    def _requests(self, method: str, route: str, status_code: int):
+        key = (method, route, status_code)
+        counter = self._statuses.get(key)
+        if counter is None:
+            counter = self._statuses[key] = REQUESTS.labels(method, route, str(status_code))
+        return counter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        db = [0, 0.0]
+        token = _request_db.set(db)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            _request_db.reset(token)
+            method, route = scope["method"], self._route_template(scope)
+            latency, queries, db_seconds = self._series(method, route)
+            latency.observe(elapsed)
+            self._requests(method, route, status_code).inc()
+            if db[0]:
+                queries.inc(db[0])
+                db_seconds.inc(db[1])
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool do engine assíncrono que mede a espera por uma conexão"""
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra os eventos que contam as queries por requisição e atualizam os gauges do pool"""
+    pool = engine.pool
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        db = _request_db.get()
+        if db is not None and context is not None:
+            db[0] += 1
+            db[1] += perf_counter() - context._metrics_start
+
+    def _update_pool_gauges(*args):
+        POOL_CHECKED_OUT.set(pool.checkedout())
+        POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", _update_pool_gauges)
+    event.listen(pool, "checkin", _update_pool_gauges)
+
+
+def metrics_response() -> Response:
+    """Exporta as métricas; no modo multiprocesso agrega os arquivos de todos os workers"""
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
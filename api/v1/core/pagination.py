@@ -0,0 +1,73 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+from uuid import UUID
+import base64
+import json
+
+"""
+    Paginação por cursor (keyset) utilizada pelas rotas de listagem e filtro.
+
+    O cursor é opaco para o cliente: contém apenas a chave de ordenação do último
+    item da página, de modo que a próxima página é buscada com `WHERE chave > cursor`
+    usando o índice da chave, sem OFFSET. O custo de cada página não depende da profundidade.
+
+    As consultas selecionam apenas as colunas (`select(*Model.__table__.c)`) e os itens são
+    devolvidos como dicionários, prontos para a `FastJSONResponse`, sem construir objetos ORM.
+
+"""
+
+DEFAULT_PAGE_LIMIT: int = 50
+MAX_PAGE_LIMIT: int = 500
+
+
+def encode_cursor(key: Any) -> str:
+    """Gera o cursor opaco a partir da chave de ordenação do último item da página"""
+    raw = json.dumps({"k": str(key)}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[UUID]:
+    """Recupera a chave de ordenação contida no cursor
+
+    Args:
+        cursor (Optional[str]): Cursor recebido na requisição.
+
+    Returns:
+        Optional[UUID]: Chave do último item da página anterior ou None na primeira página.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return UUID(json.loads(base64.urlsafe_b64decode(padded))["k"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="cursor inválido.")
+
+
+async def paginate(session: AsyncSession, query, key_column, limit: int, after: Optional[UUID]) -> Dict[str, Any]:
+    """Executa a consulta retornando uma página ordenada pela chave informada
+
+    Args:
+        session (AsyncSession): Sessão assíncrona do SQLAlchemy para execução de consultas.
+        query: Consulta base (select das colunas) sem ordenação.
+        key_column: Coluna única usada como chave de ordenação.
+        limit (int): Quantidade máxima de itens na página.
+        after (Optional[UUID]): Chave decodificada do cursor.
+
+    Returns:
+        Dict[str, Any]: Itens da página (dicionários coluna-valor) e o cursor da próxima página (None quando não houver).
+    """
+    if after is not None:
+        query = query.where(key_column > after)
+
+    result = await session.execute(query.order_by(key_column).limit(limit + 1))
+    items = [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1][key_column.key])
+
+    return {"items": items, "next_cursor": next_cursor}
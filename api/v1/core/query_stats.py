@@ -0,0 +1,159 @@
+from api.v1.core.config import settings
+from sqlalchemy.engine import Engine
+from sqlalchemy import event
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from time import perf_counter
+from enum import Enum
+from loguru import logger
+import hashlib
+import re
+
+"""
+    Estatísticas de latência por statement e log de queries lentas.
+
+    Cada statement executado é reduzido a um fingerprint (literais, parâmetros e listas do IN
+    substituídos por `?`), de modo que as execuções da mesma query com valores diferentes
+    são agregadas. As estatísticas ficam em memória, por worker, limitadas a
+    `QUERY_STATS_MAX_FINGERPRINTS` fingerprints (os menos recentes são descartados) e às
+    últimas `QUERY_STATS_SAMPLES` durações de cada um, usadas no p99.
+
+    A função de serviço em execução é guardada em `current_caller` pelo `async_session`, sem
+    inspecionar a pilha, e aparece no log das queries acima de `SLOW_QUERY_THRESHOLD_MS`.
+
+"""
+
+class QueryStatsOrderEnum(str, Enum):
+    total = "total"
+    p99 = "p99"
+
+
+current_caller: ContextVar[Optional[str]] = ContextVar("current_caller", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+")
+_VALUE = r"\?(?:::\w+(?:\[\])?)?"
+_IN_LIST = re.compile(rf"\(\s*{_VALUE}(?:\s*,\s*{_VALUE})+\s*\)")
+_VALUES_ROWS = re.compile(rf"(\({_VALUE}(?:, {_VALUE})*\))(?:, \({_VALUE}(?:, {_VALUE})*\))+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """Remove os valores do statement, mantendo apenas a sua forma"""
+    text = _SPACES.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _VALUES_ROWS.sub(r"\1, ...", text)
+    return _IN_LIST.sub("(?...)", text)
+
+
+class QueryStats:
+    """Estatísticas de um fingerprint"""
+
+    __slots__ = ("fingerprint", "statement", "calls", "total", "max", "samples", "caller")
+
+    def __init__(self, fingerprint: str, statement: str, samples: int):
+        self.fingerprint = fingerprint
+        self.statement = statement
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=samples)
+        self.caller = None
+
+    def record(self, elapsed: float, caller: Optional[str]) -> None:
+        self.calls += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.samples.append(elapsed)
+        if caller is not None:
+            self.caller = caller
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.calls * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "caller": self.caller,
+        }
+
+
+class QueryStatsStore:
+    """Estatísticas por fingerprint com número limitado de entradas (LRU)"""
+
+    def __init__(self, max_fingerprints: int, samples: int, threshold_ms: float):
+        self.max_fingerprints = max_fingerprints
+        self.samples = samples
+        self.threshold = threshold_ms / 1000
+        self._stats: "OrderedDict[str, QueryStats]" = OrderedDict()
+        self._fingerprints: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _fingerprint(self, statement: str) -> tuple:
+        known = self._fingerprints.get(statement)
+        if known is not None:
+            self._fingerprints.move_to_end(statement)
+            return known
+
+        normalized = normalize(statement)
+        known = (hashlib.sha1(normalized.encode()).hexdigest()[:16], normalized)
+        self._fingerprints[statement] = known
+        if len(self._fingerprints) > self.max_fingerprints:
+            self._fingerprints.popitem(last=False)
+        return known
+
+    def record(self, statement: str, elapsed: float) -> None:
+        fingerprint, normalized = self._fingerprint(statement)
+        caller = current_caller.get()
+
+        stats = self._stats.get(fingerprint)
+        if stats is None:
+            stats = self._stats[fingerprint] = QueryStats(fingerprint, normalized, self.samples)
+            if len(self._stats) > self.max_fingerprints:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(fingerprint)
+        stats.record(elapsed, caller)
+
+        if elapsed >= self.threshold:
+            logger.warning(f"Query lenta ({elapsed * 1000:.1f} ms) [{fingerprint}] em {caller or 'desconhecido'}: {normalized[:500]}")
+
+    def top(self, limit: int, order_by: QueryStatsOrderEnum) -> List[Dict[str, Any]]:
+        """Fingerprints com maior tempo total ou maior p99"""
+        if order_by == QueryStatsOrderEnum.p99:
+            key = lambda stats: stats.percentile(0.99)
+        else:
+            key = lambda stats: stats.total
+        return [stats.as_dict() for stats in sorted(self._stats.values(), key=key, reverse=True)[:limit]]
+
+    def clear(self) -> None:
+        self._stats.clear()
+        self._fingerprints.clear()
+
+
+query_stats = QueryStatsStore(settings.QUERY_STATS_MAX_FINGERPRINTS, settings.QUERY_STATS_SAMPLES,
+                              settings.SLOW_QUERY_THRESHOLD_MS)
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Registra os eventos que medem cada statement executado pelo engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            query_stats.record(statement, perf_counter() - context._query_start)
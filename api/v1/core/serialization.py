@@ -0,0 +1,35 @@
+from fastapi.responses import JSONResponse
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+import orjson
+
+"""
+    Serialização rápida das rotas de listagem, filtro e exportação.
+
+    Essas rotas selecionam apenas as colunas da tabela (linhas do Core, sem objetos ORM) e
+    retornam `FastJSONResponse` diretamente, de modo que o FastAPI não passa o conteúdo pelo
+    `jsonable_encoder`. O orjson serializa UUID, datas, enums e dataclasses nativamente;
+    passam pelo `default` apenas `Decimal` (convertido para float, como o `jsonable_encoder` faz)
+    e o UUID do asyncpg, que é uma subclasse de `uuid.UUID` e não é reconhecido pelo orjson.
+
+"""
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,50 @@
+from api.v1.core.query_stats import query_stats, QueryStatsOrderEnum
+from api.v1.core.config import settings
+from fastapi import APIRouter, status, Query, Header, Depends, HTTPException
+from typing import Optional
+import secrets
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Libera as rotas administrativas apenas com o header X-Admin-Token igual a `ADMIN_TOKEN`
+
+    Sem `ADMIN_TOKEN` configurado as rotas ficam bloqueadas.
+    """
+    if not settings.ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Acesso restrito aos administradores.")
+
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get('/query-stats/', responses={
+    200: {
+        "description": "Fingerprints de queries com maior tempo total ou p99 neste worker",
+        "content": {
+            "application/json": {
+                "example": [
+                    {
+                        "fingerprint": "3f2a9c0d1b7e4a55",
+                        "statement": "SELECT plan.id, plan.client_id FROM plan WHERE plan.id = ?::UUID",
+                        "calls": 1520,
+                        "total_ms": 912.4,
+                        "mean_ms": 0.6,
+                        "p99_ms": 2.8,
+                        "max_ms": 14.1,
+                        "caller": "api.v1.apps.rescue.service.service.update"
+                    }
+                ]
+            }
+        },
+    },
+    403: {"description": "Acesso restrito aos administradores."},
+}, status_code=status.HTTP_200_OK)
+async def get_query_stats(limit: int = Query(20, ge=1, le=500), order_by: QueryStatsOrderEnum = QueryStatsOrderEnum.total):
+    """Top N fingerprints de queries por tempo total ou p99"""
+    return query_stats.top(limit, order_by)
+
+
+@router.delete('/query-stats/', status_code=status.HTTP_204_NO_CONTENT)
+async def reset_query_stats():
+    """Zera as estatísticas de queries deste worker"""
+    query_stats.clear()
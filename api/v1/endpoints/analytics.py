@@ -0,0 +1,63 @@
+from api.v1.apps.analytics.service.service import get_aum_by_product, get_aum_by_age_band, get_aum_by_contract_month
+from fastapi import APIRouter, status, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import get_async_session
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get('/aum-by-product/', responses={
+    200: {
+        "description": "Patrimônio, aportes e resgates por produto",
+        "content": {
+            "application/json": {
+                "example": [
+                    {
+                        "product_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                        "product": "Produto Teste",
+                        "plans": 120,
+                        "aum": 250000.00,
+                        "contributions": 270000.00,
+                        "rescues": 20000.00
+                    }
+                ]
+            }
+        },
+}}, status_code=status.HTTP_200_OK)
+async def aum_by_product(session: AsyncSession = Depends(get_async_session)):
+    """Consolida a carteira por produto a partir dos rollups"""
+    return await get_aum_by_product(session=session)
+
+
+@router.get('/aum-by-age-band/', responses={
+    200: {
+        "description": "Patrimônio, aportes e resgates por faixa etária do cliente na contratação",
+        "content": {
+            "application/json": {
+                "example": [
+                    {"age_band": 30, "plans": 80, "aum": 160000.00, "contributions": 170000.00, "rescues": 10000.00}
+                ]
+            }
+        },
+}}, status_code=status.HTTP_200_OK)
+async def aum_by_age_band(session: AsyncSession = Depends(get_async_session)):
+    """Consolida a carteira por faixa etária (10 anos) a partir dos rollups"""
+    return await get_aum_by_age_band(session=session)
+
+
+@router.get('/aum-by-contract-month/', responses={
+    200: {
+        "description": "Patrimônio, aportes e resgates por mês de contratação",
+        "content": {
+            "application/json": {
+                "example": [
+                    {"contract_month": "2024-11-01", "plans": 15, "aum": 30000.00, "contributions": 31000.00, "rescues": 1000.00}
+                ]
+            }
+        },
+        400: {"description": "product_id inválido. Deve ser um UUID válido."},
+}}, status_code=status.HTTP_200_OK)
+async def aum_by_contract_month(product_id: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
+    """Consolida a carteira por mês de contratação, opcionalmente filtrando um produto"""
+    return await get_aum_by_contract_month(session=session, product_id=product_id)
@@ -1,8 +1,18 @@
-from api.v1.apps.client.service.service import insert, get_all, get_one, update, remove, get_client_by_email
-from fastapi import APIRouter, status, Depends
+from api.v1.apps.client.service.service import insert, get_all, get_one, update, remove, get_client_by_email, get_summary, export, bulk_insert
+from fastapi import APIRouter, status, Depends, Query, File, UploadFile, Header
+from api.v1.apps.client.models.models import Client
+from api.v1.core.etag import row_version, make_etag, conditional_response, ENTITY_CACHE_CONTROL
 from api.v1.apps.client.schemas.schemas import ClientSchema, ClientUpdateSchema
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.session import get_async_session
+from api.v1.core.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from typing import Optional
+from api.v1.core.export import ExportFormatEnum, ExportCompressionEnum, export_response
+from api.v1.core.ingest import read_records
+from api.v1.core.serialization import FastJSONResponse
+from api.v1.apps.jobs.service.service import enqueue
+from api.v1.apps.jobs.service.handlers import CLIENTS_BULK_IMPORT
+from api.v1.endpoints.jobs import JOB_ACCEPTED_RESPONSE
 
 router = APIRouter()
 
@@ -29,7 +39,7 @@ router = APIRouter()
 async def create_client(client: ClientSchema, session: AsyncSession = Depends(get_async_session)):
     """Cadastro de clientes que vão utilizar os benefícios da empresa"""
     client_data_create = client.dict() 
-    return await insert(args=client_data_create)
+    return await insert(session=session, args=client_data_create)
     
 
 @router.get('/get-client/', responses={
@@ -37,7 +47,8 @@ async def create_client(client: ClientSchema, session: AsyncSession = Depends(ge
         "description": "Listagem de clientes realizada com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "cpf": "12345678901",
@@ -47,14 +58,16 @@ async def create_client(client: ClientSchema, session: AsyncSession = Depends(ge
                         "gender": "Masculino",
                         "monthly_income": 5000.00
                     }
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         400: {"description": "Erro ao listar clientes"},
 }}, status_code=status.HTTP_200_OK)
-async def get_client(session: AsyncSession = Depends(get_async_session)):
+async def get_client(limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
     """Faz a listagem de todos os clientes cadastrados"""
-    return await get_all(ClientSchema)
+    return FastJSONResponse(await get_all(ClientSchema, session=session, limit=limit, cursor=cursor))
     
 
 @router.get('/get-one-client/{client_id}/', responses={
@@ -77,11 +90,52 @@ async def get_client(session: AsyncSession = Depends(get_async_session)):
         },
         500: {"description": "client_id inválido. Deve ser um UUID válido."},
 }}, status_code=status.HTTP_200_OK)
-async def get_one_client(client_id: str, session: AsyncSession = Depends(get_async_session)):
+async def get_one_client(client_id: str, if_none_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_session)):
     """Filtra o cliente por id e retorna todas as suas informações para consultas"""  
-    return await get_one(client_id=client_id)
+    version = await row_version(session, Client, client_id)
+    etag = make_etag('client', client_id, version) if version else None
+    return await conditional_response(if_none_match, etag, ENTITY_CACHE_CONTROL,
+                                      lambda: get_one(session=session, client_id=client_id))
     
 
+@router.get('/summary-client/{client_id}/', responses={
+    200: {
+        "description": "Resumo do cliente com planos, produtos, aportes extras, resgates e saldos",
+        "content": {
+            "application/json": {
+                "example": {
+                    "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                    "cpf": "12345678901",
+                    "name": "Cliente Teste",
+                    "email": "cliente@teste.com",
+                    "date_of_birth": "1991-01-01",
+                    "gender": "Masculino",
+                    "monthly_income": 5000.00,
+                    "plans": [
+                        {
+                            "id": "2f6c1d8e-4b7a-4c3e-9a51-0d2b8e7f6a13",
+                            "client_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                            "product_id": "7a1e3c9b-2d4f-4e8a-b6c5-1f0e9d8c7b6a",
+                            "contribution": 1500.00,
+                            "date_of_contract": "2024-11-02T20:46:03.566000+00:00",
+                            "age_of_retirement": 65,
+                            "balance": 2500.00,
+                            "product": {"id": "7a1e3c9b-2d4f-4e8a-b6c5-1f0e9d8c7b6a", "name": "Produto Teste"},
+                            "extra_contributions": [{"id": "5d3b...", "contribution_value": 1500.00}],
+                            "rescues": [{"id": "8e2a...", "rescue_value": 500.00}]
+                        }
+                    ]
+                }
+            }
+        },
+        400: {"description": "client_id inválido. Deve ser um UUID válido."},
+        404: {"description": "Cliente não encontrado."},
+}}, status_code=status.HTTP_200_OK)
+async def summary_client(client_id: str, session: AsyncSession = Depends(get_async_session)):
+    """Retorna o cliente com todos os seus planos, produtos, aportes extras, resgates e saldos em uma única chamada"""
+    return await get_summary(session=session, client_id=client_id)
+
+
 @router.get('/filter-client-by-email/{client_email}/', responses={
     200: {
         "description": "Filtragem de clientes por email realizada com sucesso",
@@ -104,7 +158,7 @@ async def get_one_client(client_id: str, session: AsyncSession = Depends(get_asy
 }}, status_code=status.HTTP_200_OK)
 async def filter_client_by_email(client_email: str, session: AsyncSession = Depends(get_async_session)):
     """Filtra cliente por email e retorna todas as suas informações para consultas"""
-    return await get_client_by_email(client_email=client_email)
+    return FastJSONResponse(await get_client_by_email(session=session, client_email=client_email))
     
    
 @router.put('/update-client/{client_id}/', responses={
@@ -125,7 +179,7 @@ async def filter_client_by_email(client_email: str, session: AsyncSession = Depe
 async def update_client(client_id: str, client: ClientUpdateSchema, session: AsyncSession = Depends(get_async_session)):
     """Atualiza informações do cliente cadastrado"""
     client_data_update = client.dict(exclude_unset=True) 
-    return await update(client_id=client_id, **client_data_update)
+    return await update(session=session, client_id=client_id, **client_data_update)
     
 
 @router.delete('/delete-client/{client_id}/', responses={
@@ -144,6 +198,53 @@ async def update_client(client_id: str, client: ClientUpdateSchema, session: Asy
 }}, status_code=status.HTTP_200_OK)
 async def delete_client(client_id: str, session: AsyncSession = Depends(get_async_session)):
     """Deleta clientes cadastrados"""
-    return await remove(client_id=client_id)
-    
-    
\ No newline at end of file
+    return await remove(session=session, client_id=client_id)
+
+
+@router.get('/export-client/', responses={
+    200: {
+        "description": "Exportação dos clientes em streaming (NDJSON ou CSV, opcionalmente comprimida com zstd)",
+        "content": {
+            "application/x-ndjson": {},
+            "text/csv": {},
+            "application/zstd": {}
+        }
+    },
+}, status_code=status.HTTP_200_OK)
+async def export_client(export_format: ExportFormatEnum = ExportFormatEnum.ndjson, compression: Optional[ExportCompressionEnum] = None, session: AsyncSession = Depends(get_async_session)):
+    """Exporta todos os clientes em streaming, sem carregar a tabela em memória"""
+    return export_response(export(session, export_format, compression), 'client', export_format, compression)
+
+
+@router.post('/bulk/', responses={
+    200: {
+        "description": "Cadastro de clientes em lote processado. Cada linha do arquivo possui seu resultado",
+        "content": {
+            "application/json": {
+                "example": {
+                    "created": 1,
+                    "rejected": 1,
+                    "results": [
+                        {"row": 1, "status": "created", "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a"},
+                        {"row": 2, "status": "rejected", "errors": ["Informe um valor válido para o cpf"]}
+                    ]
+                }
+            }
+        },
+    },
+    400: {"description": "Formato de arquivo não suportado. Envie um arquivo CSV ou NDJSON."},
+}, status_code=status.HTTP_200_OK)
+async def bulk_create_client(file: UploadFile = File(...), session: AsyncSession = Depends(get_async_session)):
+    """Cadastro em lote de clientes a partir de um arquivo CSV ou NDJSON"""
+    records = await read_records(file)
+    return await bulk_insert(session=session, records=records)
+
+
+@router.post('/bulk-job/', responses={
+    **JOB_ACCEPTED_RESPONSE,
+    400: {"description": "Formato de arquivo não suportado. Envie um arquivo CSV ou NDJSON."},
+}, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_create_client_job(file: UploadFile = File(...), session: AsyncSession = Depends(get_async_session)):
+    """Enfileira o cadastro em lote de clientes; o relatório fica no resultado do job"""
+    records = await read_records(file)
+    return await enqueue(session=session, kind=CLIENTS_BULK_IMPORT, payload={"records": records})
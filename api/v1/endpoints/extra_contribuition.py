@@ -1,8 +1,19 @@
-from api.v1.apps.extra_contribution.service.service import insert, get_all, get_one, update, remove, get_extra_contribution_by_client_id
-from fastapi import APIRouter, status, Depends
+from api.v1.apps.extra_contribution.service.service import insert, get_all, get_one, update, remove, get_extra_contribution_by_client_id, export, batch_insert
+from fastapi import APIRouter, status, Depends, Query, File, UploadFile, Header
+from api.v1.apps.extra_contribution.models.models import ExtraContribution
+from api.v1.core.etag import row_version, make_etag, conditional_response, ENTITY_CACHE_CONTROL
+from api.v1.apps.idempotency.service.service import run_idempotent
 from api.v1.apps.extra_contribution.schemas.schemas import ExtraContributionSchema, ExtraContributionUpdateSchema
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.session import get_async_session
+from api.v1.core.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from typing import Optional
+from api.v1.core.export import ExportFormatEnum, ExportCompressionEnum, export_response
+from api.v1.core.ingest import read_records
+from api.v1.core.serialization import FastJSONResponse
+from api.v1.apps.jobs.service.service import enqueue
+from api.v1.apps.jobs.service.handlers import EXTRA_CONTRIBUTIONS_BATCH_IMPORT
+from api.v1.endpoints.jobs import JOB_ACCEPTED_RESPONSE
 
 router = APIRouter()
 
@@ -22,10 +33,11 @@ router = APIRouter()
         400: {"description": "plan_id inválido. Deve ser um UUID válido."},
         400: {"description": "client_id inválido. Deve ser um UUID válido."}
 }}, status_code=status.HTTP_201_CREATED)
-async def create_extra_contribution(extra_contribution: ExtraContributionSchema, session: AsyncSession = Depends(get_async_session)):
+async def create_extra_contribution(extra_contribution: ExtraContributionSchema, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255), session: AsyncSession = Depends(get_async_session)):
     """Realiza aportes extras para clientes que já estão cadastrados e segue o plano de benefícios"""
     extra_contribution_data_create = extra_contribution.dict()
-    return await insert(args=extra_contribution_data_create)
+    return await run_idempotent(session, 'create-extra-contribution', idempotency_key, extra_contribution_data_create,
+                                lambda: insert(session=session, args=extra_contribution_data_create))
     
 
 @router.get('/get-extra_contribution/', responses={
@@ -33,7 +45,8 @@ async def create_extra_contribution(extra_contribution: ExtraContributionSchema,
         "description": "Listagem de aportes extras realizada com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "client_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
@@ -41,14 +54,16 @@ async def create_extra_contribution(extra_contribution: ExtraContributionSchema,
                         "contribution_value": 100.00
 
                     }
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         500: {"description": "Erro ao listar aportes extra"},
 }}, status_code=status.HTTP_200_OK)
-async def get_extra_contribution(session: AsyncSession = Depends(get_async_session)):
+async def get_extra_contribution(limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
     """Faz a listagem de todos os aportes extras realizados"""   
-    return await get_all(ExtraContributionSchema)
+    return FastJSONResponse(await get_all(ExtraContributionSchema, session=session, limit=limit, cursor=cursor))
     
 
 @router.get('/get-one-extra-contribution/{extra_contribution_id}/', responses={
@@ -69,9 +84,12 @@ async def get_extra_contribution(session: AsyncSession = Depends(get_async_sessi
         },
         400: {"description": "extra_contribution_id inválido. Deve ser um UUID válido."},
 }}, status_code=status.HTTP_200_OK)
-async def get_one_extra_contribution(extra_contribution_id: str, session: AsyncSession = Depends(get_async_session)):
+async def get_one_extra_contribution(extra_contribution_id: str, if_none_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_session)):
     """Filtra aportes extras realizados pelo id"""
-    return await get_one(extra_contribution_id=extra_contribution_id)
+    version = await row_version(session, ExtraContribution, extra_contribution_id)
+    etag = make_etag('extra-contribution', extra_contribution_id, version) if version else None
+    return await conditional_response(if_none_match, etag, ENTITY_CACHE_CONTROL,
+                                      lambda: get_one(session=session, extra_contribution_id=extra_contribution_id))
 
 
 @router.get('/filter-extra-contribution-by-client/{client_id}/', responses={
@@ -79,7 +97,8 @@ async def get_one_extra_contribution(extra_contribution_id: str, session: AsyncS
         "description": "Filtragem de aportes extras pelo id do client realizada com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "client_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
@@ -87,14 +106,16 @@ async def get_one_extra_contribution(extra_contribution_id: str, session: AsyncS
                         "contribution_value": 100.00
 
                     }
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         400: {"description": "client_id inválido. Deve ser um UUID válido."},
 }}, status_code=status.HTTP_200_OK)
-async def filter_extra_contribution_by_client(client_id: str, session: AsyncSession = Depends(get_async_session)):
+async def filter_extra_contribution_by_client(client_id: str, limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
     """Filtra aportes extras realizados pelo id do cliente"""
-    return await get_extra_contribution_by_client_id(client_id=client_id)
+    return FastJSONResponse(await get_extra_contribution_by_client_id(session=session, client_id=client_id, limit=limit, cursor=cursor))
     
 
 @router.put('/update-extra-contribution/{extra_contribution_id}/', responses={
@@ -122,7 +143,7 @@ async def filter_extra_contribution_by_client(client_id: str, session: AsyncSess
 async def update_extra_contribution(extra_contribution_id: str, extra_contribution: ExtraContributionUpdateSchema, session: AsyncSession = Depends(get_async_session)):
     """Atualiza aportes extras realizados"""
     extra_contribution_data_update = extra_contribution.dict()
-    return await update(extra_contribution_id=extra_contribution_id, **extra_contribution_data_update)
+    return await update(session=session, extra_contribution_id=extra_contribution_id, **extra_contribution_data_update)
     
 
 @router.delete('/delete-extra-contribution/{extra_contribution_id}/', responses={
@@ -145,6 +166,51 @@ async def update_extra_contribution(extra_contribution_id: str, extra_contributi
 }}, status_code=status.HTTP_200_OK)
 async def delete_extra_contribution(extra_contribution_id: str, session: AsyncSession = Depends(get_async_session)):
     """Remove aportes extras realizados""" 
-    return await remove(extra_contribution_id=extra_contribution_id)
-    
-    
\ No newline at end of file
+    return await remove(session=session, extra_contribution_id=extra_contribution_id)
+
+
+@router.get('/export-extra-contribution/', responses={
+    200: {
+        "description": "Exportação dos aportes extras em streaming (NDJSON ou CSV, opcionalmente comprimida com zstd)",
+        "content": {
+            "application/x-ndjson": {},
+            "text/csv": {},
+            "application/zstd": {}
+        }
+    },
+}, status_code=status.HTTP_200_OK)
+async def export_extra_contribution(export_format: ExportFormatEnum = ExportFormatEnum.ndjson, compression: Optional[ExportCompressionEnum] = None, session: AsyncSession = Depends(get_async_session)):
+    """Exporta todos os aportes extras em streaming, sem carregar a tabela em memória"""
+    return export_response(export(session, export_format, compression), 'extra_contribution', export_format, compression)
+
+
+@router.post('/batch/', responses={
+    200: {
+        "description": "Arquivo de aportes extras da folha de pagamento processado",
+        "content": {
+            "application/json": {
+                "example": {
+                    "inserted": 1,
+                    "rejected": [
+                        {"row": 2, "reason": "O plano informado não pertence ao cliente."}
+                    ]
+                }
+            }
+        },
+    },
+    400: {"description": "Formato de arquivo não suportado. Envie um arquivo CSV ou NDJSON."},
+}, status_code=status.HTTP_200_OK)
+async def batch_create_extra_contribution(file: UploadFile = File(...), session: AsyncSession = Depends(get_async_session)):
+    """Registra em lote os aportes extras enviados pela folha de pagamento (CSV ou NDJSON)"""
+    records = await read_records(file)
+    return await batch_insert(session=session, records=records)
+
+
+@router.post('/batch-job/', responses={
+    **JOB_ACCEPTED_RESPONSE,
+    400: {"description": "Formato de arquivo não suportado. Envie um arquivo CSV ou NDJSON."},
+}, status_code=status.HTTP_202_ACCEPTED)
+async def batch_create_extra_contribution_job(file: UploadFile = File(...), session: AsyncSession = Depends(get_async_session)):
+    """Enfileira o arquivo de aportes extras da folha de pagamento; o relatório fica no resultado do job"""
+    records = await read_records(file)
+    return await enqueue(session=session, kind=EXTRA_CONTRIBUTIONS_BATCH_IMPORT, payload={"records": records})
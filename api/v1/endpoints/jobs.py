@@ -0,0 +1,51 @@
+from api.v1.apps.jobs.service.service import get_one
+from fastapi import APIRouter, status, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import get_async_session
+from api.v1.core.serialization import FastJSONResponse
+
+router = APIRouter()
+
+JOB_ACCEPTED_RESPONSE = {
+    202: {
+        "description": "Job enfileirado; acompanhe o estado e o resultado pela rota informada em status_url",
+        "content": {
+            "application/json": {
+                "example": {
+                    "job_id": "5f0c9a1e-6a3b-4a53-9d2e-2b8f7c1d4e90",
+                    "status": "queued",
+                    "status_url": "/jobs/get-one-job/5f0c9a1e-6a3b-4a53-9d2e-2b8f7c1d4e90/"
+                }
+            }
+        },
+    },
+}
+
+
+@router.get('/get-one-job/{job_id}/', responses={
+    200: {
+        "description": "Estado, progresso e resultado do job",
+        "content": {
+            "application/json": {
+                "example": {
+                    "id": "5f0c9a1e-6a3b-4a53-9d2e-2b8f7c1d4e90",
+                    "kind": "projections.batch",
+                    "status": "running",
+                    "progress": 40,
+                    "attempts": 1,
+                    "max_attempts": 5,
+                    "result": None,
+                    "error": None,
+                    "created_at": "2026-10-17T23:58:31.204617+00:00",
+                    "started_at": "2026-10-17T23:58:31.914022+00:00",
+                    "finished_at": None
+                }
+            }
+        },
+    },
+    400: {"description": "job_id inválido. Deve ser um UUID válido."},
+    404: {"description": "Job não encontrado."},
+}, status_code=status.HTTP_200_OK)
+async def get_one_job(job_id: str, session: AsyncSession = Depends(get_async_session)):
+    """Consulta o estado de um job em segundo plano"""
+    return FastJSONResponse(await get_one(session=session, job_id=job_id))
@@ -1,8 +1,15 @@
-from api.v1.apps.plan.service.service import insert, get_all, get_one, update, remove, get_plan_by_client_id
-from fastapi import APIRouter, status, Depends
+from api.v1.apps.plan.service.service import insert, get_all, get_one, update, remove, get_plan_by_client_id, export
+from fastapi import APIRouter, status, Depends, Query, Header
+from api.v1.apps.plan.models.models import Plan
+from api.v1.core.etag import row_version, make_etag, conditional_response, ENTITY_CACHE_CONTROL
+from api.v1.apps.idempotency.service.service import run_idempotent
 from api.v1.apps.plan.schemas.schemas import PlanSchema, PlanUpdateSchema
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.session import get_async_session
+from api.v1.core.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from typing import Optional
+from api.v1.core.export import ExportFormatEnum, ExportCompressionEnum, export_response
+from api.v1.core.serialization import FastJSONResponse
 
 router = APIRouter()
 
@@ -27,10 +34,11 @@ router = APIRouter()
         400: {"description": "Não é possível contratar este produto porque a idade mínima de entrada é menor que  18 anos."},
         400: {"description": "Não é possível contratar este produto porque a idade máxima de saída é maior que 60 anos."}
 }}, status_code=status.HTTP_201_CREATED)
-async def create_plan(plan: PlanSchema, session: AsyncSession = Depends(get_async_session)):
+async def create_plan(plan: PlanSchema, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255), session: AsyncSession = Depends(get_async_session)):
     """Adquire planos para clientes que já estão cadastrados"""
     plan_data_create = plan.dict()
-    return await insert(args=plan_data_create)
+    return await run_idempotent(session, 'create-plan', idempotency_key, plan_data_create,
+                                lambda: insert(session=session, args=plan_data_create))
     
     
 @router.get('/get-plan/', responses={
@@ -38,7 +46,8 @@ async def create_plan(plan: PlanSchema, session: AsyncSession = Depends(get_asyn
         "description": "Planos listados com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "client_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
@@ -49,14 +58,16 @@ async def create_plan(plan: PlanSchema, session: AsyncSession = Depends(get_asyn
         
             }
                     
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         500: {"description": "Erro ao listar planos"},
 }}, status_code=status.HTTP_200_OK)
-async def get_plan(session: AsyncSession = Depends(get_async_session)):
+async def get_plan(limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
     """Realiza a listagem dos planos cadastrados"""   
-    return await get_all(PlanSchema)
+    return FastJSONResponse(await get_all(PlanSchema, session=session, limit=limit, cursor=cursor))
     
     
 @router.get('/get-one-plan/{plan_id}/', responses={
@@ -79,9 +90,12 @@ async def get_plan(session: AsyncSession = Depends(get_async_session)):
         },
         400: {"description": "plan_id inválido. Deve ser um UUID válido."},
 }}, status_code=status.HTTP_200_OK)
-async def get_one_plan(plan_id: str, session: AsyncSession = Depends(get_async_session)):
+async def get_one_plan(plan_id: str, if_none_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_session)):
     """Filtra planos pelo id"""
-    return await get_one(plan_id=plan_id)
+    version = await row_version(session, Plan, plan_id)
+    etag = make_etag('plan', plan_id, version) if version else None
+    return await conditional_response(if_none_match, etag, ENTITY_CACHE_CONTROL,
+                                      lambda: get_one(session=session, plan_id=plan_id))
     
     
 @router.get('/filter-plan-by-client/{client_id}/', responses={
@@ -89,7 +103,8 @@ async def get_one_plan(plan_id: str, session: AsyncSession = Depends(get_async_s
         "description": "Filtragem de planos pelo id do cliente realizada com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "client_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
@@ -99,14 +114,16 @@ async def get_one_plan(plan_id: str, session: AsyncSession = Depends(get_async_s
                         "age_of_retirement": 65
             }
                     
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         400: {"description": "client_id inválido. Deve ser um UUID válido."},
 }}, status_code=status.HTTP_200_OK)
-async def filter_plan_by_client(client_id: str, session: AsyncSession = Depends(get_async_session)):
+async def filter_plan_by_client(client_id: str, limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
     """Filtra planos pelo id do cliente"""
-    return await get_plan_by_client_id(client_id=client_id)
+    return FastJSONResponse(await get_plan_by_client_id(session=session, client_id=client_id, limit=limit, cursor=cursor))
     
 
 @router.put('/update-plan/{plan_id}/', 
@@ -134,7 +151,7 @@ async def filter_plan_by_client(client_id: str, session: AsyncSession = Depends(
 async def update_plan(plan_id: str, plan: PlanUpdateSchema, session: AsyncSession = Depends(get_async_session)):
     """Atualiza planos cadastrados"""
     plan_data_update = plan.dict(exclude_unset=True)
-    return await update(plan_id=plan_id, **plan_data_update)
+    return await update(session=session, plan_id=plan_id, **plan_data_update)
     
 
 @router.delete('/delete-plan/{plan_id}/', responses={
@@ -155,6 +172,19 @@ async def update_plan(plan_id: str, plan: PlanUpdateSchema, session: AsyncSessio
 }}, status_code=status.HTTP_200_OK)
 async def delete_plan(plan_id: str, session: AsyncSession = Depends(get_async_session)):
     """Deleta planos cadastrados"""
-    return await remove(plan_id=plan_id)
-    
-    
\ No newline at end of file
+    return await remove(session=session, plan_id=plan_id)
+
+
+@router.get('/export-plan/', responses={
+    200: {
+        "description": "Exportação dos planos em streaming (NDJSON ou CSV, opcionalmente comprimida com zstd)",
+        "content": {
+            "application/x-ndjson": {},
+            "text/csv": {},
+            "application/zstd": {}
+        }
+    },
+}, status_code=status.HTTP_200_OK)
+async def export_plan(export_format: ExportFormatEnum = ExportFormatEnum.ndjson, compression: Optional[ExportCompressionEnum] = None, session: AsyncSession = Depends(get_async_session)):
+    """Exporta todos os planos em streaming, sem carregar a tabela em memória"""
+    return export_response(export(session, export_format, compression), 'plan', export_format, compression)
@@ -1,11 +1,21 @@
 from api.v1.apps.products.service.service import insert, get_all, get_one, update, remove, get_products_by_name
 from api.v1.apps.products.schemas.schemas import ProductsSchema, ProductsUpdateSchema
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Header
+from api.v1.apps.products.service.catalog import catalog
+from api.v1.core.etag import make_etag, conditional_response, CATALOG_CACHE_CONTROL
 from database.session import get_async_session
+from api.v1.core.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from typing import Optional
+from api.v1.core.serialization import FastJSONResponse
 
 router = APIRouter()
 
+
+async def _catalog_etag(session: AsyncSession) -> str:
+    await catalog.all(session)
+    return make_etag('catalog', catalog.digest)
+
 @router.post('/create-product/', responses={
     201: {
         "description": "Produto adquirido com sucesso",
@@ -28,7 +38,7 @@ router = APIRouter()
 async def create_product(product: ProductsSchema, session: AsyncSession = Depends(get_async_session)):
     """Adquire produtos para clientes que já estão cadastrados"""
     product_data_create = product.dict()
-    return await insert(args=product_data_create)
+    return await insert(session=session, args=product_data_create)
     
 
 @router.get('/get-product/', responses={
@@ -36,7 +46,8 @@ async def create_product(product: ProductsSchema, session: AsyncSession = Depend
         "description": "Listagem de produtos realizada com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "name": "Produto Teste",
@@ -49,14 +60,17 @@ async def create_product(product: ProductsSchema, session: AsyncSession = Depend
                         "lack_initial_of_rescue": 60,
                         "lack_entre_resgates": 30 
                     }
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         500: {"description": "Erro ao listar produtos"},
 }}, status_code=status.HTTP_200_OK)
-async def get_product(session: AsyncSession = Depends(get_async_session)):
+async def get_product(limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, if_none_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_session)):
     """Listagem dos produtos cadastrados"""   
-    return await get_all(ProductsSchema)
+    return await conditional_response(if_none_match, await _catalog_etag(session), CATALOG_CACHE_CONTROL,
+                                      lambda: get_all(ProductsSchema, session=session, limit=limit, cursor=cursor))
 
 
 @router.get('/get-one-product/{product_id}/', responses={
@@ -81,10 +95,17 @@ async def get_product(session: AsyncSession = Depends(get_async_session)):
             }
         },
         400: {"description": "product_id inválido. Deve ser um UUID válido."},
+        404: {"description": "Produto não encontrado."},
 }}, status_code=status.HTTP_200_OK)
-async def get_one_product(product_id: str, session: AsyncSession = Depends(get_async_session)):
+async def get_one_product(product_id: str, if_none_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_session)):
     """Filtra produtos pelo id"""
-    return await get_one(product_id=product_id)
+    # A busca é feita no snapshot do catálogo, então validar o id antes do 304 não custa uma query
+    product = await get_one(session=session, product_id=product_id)
+
+    async def load():
+        return product
+
+    return await conditional_response(if_none_match, await _catalog_etag(session), CATALOG_CACHE_CONTROL, load)
     
 
 @router.get('/filter-product-by-name/', responses={
@@ -113,7 +134,7 @@ async def get_one_product(product_id: str, session: AsyncSession = Depends(get_a
 }}, status_code=status.HTTP_200_OK)
 async def filter_product_by_name(product_name: str, session: AsyncSession = Depends(get_async_session)):
     """Filtra produtos pelo nome"""
-    return await get_products_by_name(product_name=product_name)
+    return FastJSONResponse(await get_products_by_name(session=session, product_name=product_name))
     
 
 @router.put('/update-product/{product_id}/', responses={
@@ -147,7 +168,7 @@ async def filter_product_by_name(product_name: str, session: AsyncSession = Depe
 async def update_product(product_id: str, product: ProductsUpdateSchema, session: AsyncSession = Depends(get_async_session)):
     """Atualiza produtos cadastrados"""
     product_data_update = product.dict(exclude_unset=True)
-    return await update(product_id=product_id, **product_data_update)
+    return await update(session=session, product_id=product_id, **product_data_update)
     
 
 @router.delete('/delete-product/{product_id}/', responses={
@@ -166,6 +187,6 @@ async def update_product(product_id: str, product: ProductsUpdateSchema, session
 }}, status_code=status.HTTP_200_OK)
 async def delete_product(product_id: str, session: AsyncSession = Depends(get_async_session)):
     """Deleta produtos cadastrados"""
-    return await remove(product_id=product_id)
+    return await remove(session=session, product_id=product_id)
     
     
\ No newline at end of file
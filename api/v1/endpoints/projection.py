@@ -0,0 +1,106 @@
+from api.v1.apps.projection.service.service import project_plans, get_projection, simulate_plan, export, validate_batch, MAX_JOB_PLANS
+from fastapi import APIRouter, status, Depends
+from typing import Optional
+from api.v1.apps.projection.schemas.schemas import ProjectionBatchSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import get_async_session
+from api.v1.core.config import settings
+from api.v1.core.export import ExportFormatEnum, export_response
+from api.v1.apps.jobs.service.service import enqueue
+from api.v1.apps.jobs.service.handlers import PROJECTIONS_BATCH
+from api.v1.endpoints.jobs import JOB_ACCEPTED_RESPONSE
+
+router = APIRouter()
+
+
+@router.get('/projection-plan/{plan_id}/', responses={
+    200: {
+        "description": "Projeção do saldo do plano na aposentadoria",
+        "content": {
+            "application/json": {
+                "example": {
+                    "plan_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                    "retirement_month": "2055-05",
+                    "months": 366,
+                    "projected_balance": 9083.47
+                }
+            }
+        },
+        400: {"description": "Informe uma taxa anual válida."},
+        404: {"description": "Plano não encontrado."},
+}}, status_code=status.HTTP_200_OK)
+async def projection_plan(plan_id: str, annual_rate: float = settings.PROJECTION_ANNUAL_RATE, monthly_contribution: float = 0.0, session: AsyncSession = Depends(get_async_session)):
+    """Projeta o saldo do plano na idade de aposentadoria com capitalização mensal"""
+    return await get_projection(session=session, plan_id=plan_id, annual_rate=annual_rate, monthly_contribution=monthly_contribution)
+
+
+@router.get('/simulation-plan/{plan_id}/', responses={
+    200: {
+        "description": "Simulação de Monte Carlo do saldo e da renda do plano na aposentadoria",
+        "content": {
+            "application/json": {
+                "example": {
+                    "plan_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                    "product": "Produto Teste",
+                    "retirement_month": "2055-05",
+                    "months": 343,
+                    "paths": 20000,
+                    "seed": 42,
+                    "balance": {"p10": 5210.33, "p50": 8950.12, "p90": 15402.87},
+                    "monthly_income": {"p10": 37.05, "p50": 63.65, "p90": 109.54}
+                }
+            }
+        },
+        400: {"description": "Informe uma quantidade de caminhos entre 1 e 100000."},
+        404: {"description": "Plano não encontrado."},
+}}, status_code=status.HTTP_200_OK)
+async def simulation_plan(plan_id: str, paths: int = settings.SIMULATION_DEFAULT_PATHS, seed: Optional[int] = None,
+                          annual_rate: float = settings.PROJECTION_ANNUAL_RATE, volatility: float = settings.SIMULATION_VOLATILITY,
+                          monthly_contribution: float = 0.0, payout_years: int = 20):
+    """Simula percentis de saldo e renda na aposentadoria a partir de caminhos de rentabilidade aleatórios"""
+    return await simulate_plan(plan_id=plan_id, paths=paths, seed=seed, annual_rate=annual_rate, volatility=volatility,
+                               monthly_contribution=monthly_contribution, payout_years=payout_years)
+
+
+@router.post('/batch/', responses={
+    200: {
+        "description": "Projeção do saldo na aposentadoria de cada plano informado",
+        "content": {
+            "application/json": {
+                "example": [
+                    {
+                        "plan_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                        "retirement_month": "2055-05",
+                        "months": 366,
+                        "projected_balance": 9083.47
+                    }
+                ]
+            }
+        },
+        400: {"description": "Informe no máximo 5000 planos por requisição."},
+}}, status_code=status.HTTP_200_OK)
+async def projection_batch(projection: ProjectionBatchSchema, session: AsyncSession = Depends(get_async_session)):
+    """Projeta o saldo na aposentadoria de vários planos de uma vez"""
+    return await project_plans(projection.plan_ids, projection.annual_rate, projection.monthly_contribution, session=session)
+
+
+@router.post('/batch-job/', responses={
+    **JOB_ACCEPTED_RESPONSE,
+    400: {"description": "Informe no máximo 50000 planos por requisição."},
+}, status_code=status.HTTP_202_ACCEPTED)
+async def projection_batch_job(projection: ProjectionBatchSchema, session: AsyncSession = Depends(get_async_session)):
+    """Enfileira a projeção de até `MAX_JOB_PLANS` planos, calculada em blocos pelo worker"""
+    validate_batch(projection.plan_ids, projection.annual_rate, projection.monthly_contribution, max_plans=MAX_JOB_PLANS)
+    return await enqueue(session=session, kind=PROJECTIONS_BATCH, payload=projection.dict())
+
+
+@router.get('/export-projection/', responses={
+    200: {
+        "description": "Projeção de todos os planos em streaming (NDJSON)",
+        "content": {"application/x-ndjson": {}}
+    },
+    400: {"description": "Informe uma taxa anual válida."},
+}, status_code=status.HTTP_200_OK)
+async def export_projection(annual_rate: float = settings.PROJECTION_ANNUAL_RATE, monthly_contribution: float = 0.0, session: AsyncSession = Depends(get_async_session)):
+    """Projeta todos os planos em blocos e envia o resultado em streaming"""
+    return export_response(export(session, annual_rate, monthly_contribution), 'projection', ExportFormatEnum.ndjson)
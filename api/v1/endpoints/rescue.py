@@ -1,8 +1,15 @@
-from api.v1.apps.rescue.service.service import insert, get_all, get_one, update, remove, get_rescue_by_plan_id
+from api.v1.apps.rescue.service.service import insert, get_all, get_one, update, remove, get_rescue_by_plan_id, get_eligible_plans, export
 from api.v1.apps.rescue.schemas.schemas import RescueSchema, RescueUpdateSchema
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Header
+from api.v1.apps.rescue.models.models import Rescue
+from api.v1.core.etag import row_version, make_etag, conditional_response, ENTITY_CACHE_CONTROL
+from api.v1.apps.idempotency.service.service import run_idempotent
 from database.session import get_async_session
+from api.v1.core.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from typing import Optional
+from api.v1.core.export import ExportFormatEnum, ExportCompressionEnum, export_response
+from api.v1.core.serialization import FastJSONResponse
 
 router = APIRouter()
 
@@ -24,10 +31,11 @@ router = APIRouter()
         400: {"description": "Carência inicial de resgate de 60 dias não foi cumprida."}
     }
 }, status_code=status.HTTP_201_CREATED)
-async def create_rescue(rescue: RescueSchema, session: AsyncSession = Depends(get_async_session)):
+async def create_rescue(rescue: RescueSchema, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255), session: AsyncSession = Depends(get_async_session)):
     """Realiza resgates para clientes que já estão cadastrados e segue o plano de benefícios"""
     rescue_data_create = rescue.dict()
-    return await insert(args=rescue_data_create)
+    return await run_idempotent(session, 'create-rescue', idempotency_key, rescue_data_create,
+                                lambda: insert(session=session, args=rescue_data_create))
 
 
 @router.get('/get-rescue/', responses={
@@ -35,21 +43,24 @@ async def create_rescue(rescue: RescueSchema, session: AsyncSession = Depends(ge
         "description": "Listagrem de resgates realizados com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "plan_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "rescue_value": 2000.00
                     }
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         500: {"description": "Erro ao listar resgates"},
     }
 }, status_code=status.HTTP_200_OK)
-async def get_rescue(session: AsyncSession = Depends(get_async_session)):
+async def get_rescue(limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
     """Faz a listagem de todos os resgates realizados"""   
-    return await get_all(RescueSchema)
+    return FastJSONResponse(await get_all(RescueSchema, session=session, limit=limit, cursor=cursor))
     
 
 @router.get('/get-one-rescue/{rescue_id}/', responses={
@@ -70,9 +81,12 @@ async def get_rescue(session: AsyncSession = Depends(get_async_session)):
         400: {"description": "rescue_id inválido. Deve ser um UUID válido."},
     }
 }, status_code=status.HTTP_200_OK)
-async def get_one_rescue(rescue_id: str, session: AsyncSession = Depends(get_async_session)):
+async def get_one_rescue(rescue_id: str, if_none_match: Optional[str] = Header(None), session: AsyncSession = Depends(get_async_session)):
     """Filtra resgate pelo id"""
-    return await get_one(rescue_id=rescue_id)
+    version = await row_version(session, Rescue, rescue_id)
+    etag = make_etag('rescue', rescue_id, version) if version else None
+    return await conditional_response(if_none_match, etag, ENTITY_CACHE_CONTROL,
+                                      lambda: get_one(session=session, rescue_id=rescue_id))
 
 
 @router.get('/filter-rescue-by-plan/', responses={
@@ -80,24 +94,54 @@ async def get_one_rescue(rescue_id: str, session: AsyncSession = Depends(get_asy
         "description": "Filtro de resgate realizado com sucesso",
         "content": {
             "application/json": {
-                "example": [
+                "example": {
+                    "items": [
                     {   
                         "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "plan_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
                         "rescue_value": 2000.00
                     }
                     
-                ]
+                    ],
+                    "next_cursor": "eyJrIjogIjljM2E1YjUyLThmMGQtNGI1OC05YmZiLTk4N2YzYTFjNDU3YSJ9"
+                }
             }
         },
         400: {"description": "plan_id inválido. Deve ser um UUID válido."},
     }
 }, status_code=status.HTTP_200_OK)
-async def filter_rescue_by_plan(plan_id: str, session: AsyncSession = Depends(get_async_session)):
+async def filter_rescue_by_plan(plan_id: str, limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
     """Filtra resgate pelo id do plano"""    
-    return await get_rescue_by_plan_id(plan_id=plan_id)
+    return FastJSONResponse(await get_rescue_by_plan_id(session=session, plan_id=plan_id, limit=limit, cursor=cursor))
     
 
+@router.get('/eligible-plans/', responses={
+    200: {
+        "description": "Planos com carência de resgate cumprida e saldo disponível",
+        "content": {
+            "application/json": {
+                "example": {
+                    "items": [
+                    {
+                        "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                        "client_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                        "product_id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+                        "contribution": 1500.00,
+                        "date_of_contract": "2024-11-02T20:46:03.566Z",
+                        "age_of_retirement": 65,
+                        "next_eligible_rescue_date": "2025-01-01"
+                    }
+                    ],
+                    "next_cursor": None
+                }
+            }
+        },
+}}, status_code=status.HTTP_200_OK)
+async def eligible_plans(limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT), cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
+    """Lista os planos que já podem realizar resgate (uso do back office)"""
+    return FastJSONResponse(await get_eligible_plans(session=session, limit=limit, cursor=cursor))
+
+
 @router.put('/update-rescue/{rescue_id}/', responses={
     200: {
         "description": "Resgate atualizado com sucesso",
@@ -121,7 +165,7 @@ async def filter_rescue_by_plan(plan_id: str, session: AsyncSession = Depends(ge
 async def update_rescue(rescue_id: str, rescue: RescueUpdateSchema, session: AsyncSession = Depends(get_async_session)):
     """Atualiza resgate"""
     rescue_data_update = rescue.dict(exclude_unset=True)    
-    return await update(rescue_id=rescue_id, **rescue_data_update)
+    return await update(session=session, rescue_id=rescue_id, **rescue_data_update)
     
 
 @router.delete('/delete-rescue/{rescue_id}/', responses={
@@ -142,4 +186,19 @@ async def update_rescue(rescue_id: str, rescue: RescueUpdateSchema, session: Asy
 }, status_code=status.HTTP_200_OK)
 async def delete_rescue(rescue_id: str, session: AsyncSession = Depends(get_async_session)):
     """Deleta resgate"""
-    return await remove(rescue_id=rescue_id)
\ No newline at end of file
+    return await remove(session=session, rescue_id=rescue_id)
+
+
+@router.get('/export-rescue/', responses={
+    200: {
+        "description": "Exportação dos resgates em streaming (NDJSON ou CSV, opcionalmente comprimida com zstd)",
+        "content": {
+            "application/x-ndjson": {},
+            "text/csv": {},
+            "application/zstd": {}
+        }
+    },
+}, status_code=status.HTTP_200_OK)
+async def export_rescue(export_format: ExportFormatEnum = ExportFormatEnum.ndjson, compression: Optional[ExportCompressionEnum] = None, session: AsyncSession = Depends(get_async_session)):
+    """Exporta todos os resgates em streaming, sem carregar a tabela em memória"""
+    return export_response(export(session, export_format, compression), 'rescue', export_format, compression)
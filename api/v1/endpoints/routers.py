@@ -5,6 +5,10 @@ from api.v1.endpoints import plan
 from api.v1.endpoints import extra_contribuition
 from api.v1.endpoints import rescue
 from api.v1.endpoints import websockets
+from api.v1.endpoints import projection
+from api.v1.endpoints import analytics
+from api.v1.endpoints import admin
+from api.v1.endpoints import jobs
 
 api_router = APIRouter()
 
@@ -14,4 +18,8 @@ api_router.include_router(products.router, prefix='/products', tags=['products']
 api_router.include_router(plan.router, prefix='/plans', tags=['plans'])
 api_router.include_router(extra_contribuition.router, prefix='/extra_contribuitions', tags=['extra_contribuitions'])
 api_router.include_router(rescue.router, prefix='/rescues', tags=['rescues'])
+api_router.include_router(projection.router, prefix='/projections', tags=['projections'])
+api_router.include_router(analytics.router, prefix='/analytics', tags=['analytics'])
+api_router.include_router(admin.router, prefix='/admin', tags=['admin'])
+api_router.include_router(jobs.router, prefix='/jobs', tags=['jobs'])
 api_router.include_router(websockets.router, prefix='/websockets', tags=['websockets'])
\ No newline at end of file
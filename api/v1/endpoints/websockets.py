@@ -1,11 +1,17 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from api.v1.websockets.manager import ConnectionManager
+from api.v1.websockets.manager import manager, plan_topic
+from api.v1.apps.plan.service import service as plan_service
 from fastapi.responses import HTMLResponse
+from typing import Optional
 from pathlib import Path
+from loguru import logger
+import orjson
 
 router = APIRouter()
 
-manager = ConnectionManager()
+SUBSCRIPTION_ACTIONS = ("subscribe", "unsubscribe")
+CHAT_MESSAGE_MAX_BYTES = 4000
+
 
 @router.get("/")
 async def websocket_page():
@@ -16,14 +22,72 @@ async def websocket_page():
     return HTMLResponse(html)
 
 
+def _subscription_command(data: str) -> Optional[dict]:
+    try:
+        command = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return None
+    if isinstance(command, dict) and command.get("action") in SUBSCRIPTION_ACTIONS and command.get("plan_id"):
+        return command
+    return None
+
+
+async def _handle_subscription(websocket: WebSocket, client_id: str, command: dict):
+    plan_id = str(command["plan_id"])
+    if command["action"] == "unsubscribe":
+        manager.unsubscribe(websocket, plan_topic(plan_id))
+        await manager.send_personal_message(orjson.dumps({"unsubscribed": plan_id}).decode(), websocket)
+        return
+
+    if not await plan_service.is_owned_by(plan_id=plan_id, client_id=client_id):
+        await manager.send_personal_message(orjson.dumps({"error": "Plano não encontrado para o cliente.", "plan_id": plan_id}).decode(), websocket)
+        return
+
+    manager.subscribe(websocket, plan_topic(plan_id))
+    await manager.send_personal_message(orjson.dumps({"subscribed": plan_id}).decode(), websocket)
+
+
+def _error(message: str) -> str:
+    return orjson.dumps({"error": message}).decode()
+
+
+async def _broadcast(message: str) -> bool:
+    """Publica a mensagem do chat; uma falha do backplane não derruba a conexão"""
+    try:
+        await manager.broadcast(message)
+        return True
+    except Exception as e:
+        logger.error(f"Erro ao publicar mensagem no backplane: {e}")
+        return False
+
+
 @router.websocket("/ws/{client_id}")
-async def websocket_handler(websocket: WebSocket, client_id: int):
-    await manager.connect(websocket)
+async def websocket_handler(websocket: WebSocket, client_id: str):
+    """Conexão do cliente: recebe os eventos dos seus planos
+
+    Ao conectar, o websocket assina os eventos de todos os planos do cliente. Mensagens
+    `{"action": "subscribe" | "unsubscribe", "plan_id": ...}` assinam (ou cancelam) os eventos
+    de um plano específico; as demais mensagens seguem o chat de demonstração, limitadas a
+    `CHAT_MESSAGE_MAX_BYTES`.
+    """
+    await manager.connect(websocket, client_id)
     try:
         while True:
             data = await websocket.receive_text()
+            command = _subscription_command(data)
+            if command is not None:
+                await _handle_subscription(websocket, client_id, command)
+                continue
+
+            if len(data.encode()) > CHAT_MESSAGE_MAX_BYTES:
+                await manager.send_personal_message(_error(f"Mensagem excede o limite de {CHAT_MESSAGE_MAX_BYTES} bytes."), websocket)
+                continue
+
             await manager.send_personal_message(f"You wrote: {data}", websocket)
-            await manager.broadcast(f"Client #{client_id} says: {data}")
+            if not await _broadcast(f"Client #{client_id} says: {data}"):
+                await manager.send_personal_message(_error("Não foi possível enviar a mensagem. Tente novamente."), websocket)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
-        await manager.broadcast(f"Client #{client_id} has left the chat")
\ No newline at end of file
+    await _broadcast(f"Client #{client_id} has left the chat")
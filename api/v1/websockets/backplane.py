@@ -0,0 +1,186 @@
+from database.session import create_listen_connection
+from typing import Awaitable, Callable, Iterable, List, Optional
+from abc import ABC, abstractmethod
+from loguru import logger
+import asyncpg
+import asyncio
+import orjson
+
+"""
+    Backplane de pub/sub para as mensagens de WebSocket entre workers.
+
+    Cada worker publica a mensagem uma única vez no backplane e entrega às suas conexões
+    apenas o que recebe dele, inclusive as próprias publicações. Assim todos os workers (e
+    nós atrás do nginx) entregam a mesma sequência de mensagens, sem duplicidade.
+
+    - `PostgresBackplane`: NOTIFY/LISTEN num canal do Postgres, com uma conexão dedicada para
+      escutar (reconectada automaticamente) e outra para publicar. O payload do NOTIFY é
+      limitado a 8000 bytes e mensagens emitidas enquanto a escuta está caída são perdidas.
+    - `InMemoryBackplane`: entrega dentro do processo; backplanes que compartilham o mesmo
+      `hub` simulam workers diferentes nos testes.
+
+    As mensagens recebidas passam por uma fila e são entregues em ordem por uma única task,
+    que cede o event loop após cada entrega para que as conexões esvaziem suas filas.
+
+    Cada mensagem leva a lista de tópicos a que se destina; o `ConnectionManager` a entrega
+    apenas às conexões inscritas neles.
+
+"""
+
+WEBSOCKET_CHANNEL = 'websocket_events'
+NOTIFY_PAYLOAD_LIMIT = 8000
+LISTENER_RECONNECT_SECONDS: float = 5.0
+
+Handler = Callable[[List[str], str], Awaitable[None]]
+
+
+def encode_event(topics: Iterable[str], message: str) -> str:
+    return orjson.dumps({"topics": list(topics), "message": message}).decode()
+
+
+def decode_event(payload: str) -> tuple:
+    decoded = orjson.loads(payload)
+    return decoded["topics"], decoded["message"]
+
+
+class Backplane(ABC):
+    """Base dos backplanes: fila de recebimento e entrega ordenada ao handler do worker"""
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler) -> None:
+        """Começa a receber as mensagens publicadas, entregando-as ao handler"""
+        self._handler = handler
+        self._queue = asyncio.Queue()
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+        await self._subscribe()
+
+    async def stop(self) -> None:
+        await self._unsubscribe()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+    async def publish(self, topics: Iterable[str], message: str) -> None:
+        """Publica a mensagem para todos os workers (inclusive este)"""
+        await self._send(encode_event(topics, message))
+
+    def _receive(self, payload: str) -> None:
+        if self._queue is not None:
+            self._queue.put_nowait(payload)
+
+    async def _dispatch(self) -> None:
+        while True:
+            payload = await self._queue.get()
+            try:
+                await self._handler(*decode_event(payload))
+            except Exception as e:
+                logger.error(f"Erro ao entregar mensagem do backplane: {e}")
+            await asyncio.sleep(0)
+
+    @abstractmethod
+    async def _subscribe(self) -> None:
+        """Começa a escutar as publicações, chamando `_receive` para cada uma"""
+
+    @abstractmethod
+    async def _unsubscribe(self) -> None:
+        """Para de escutar as publicações"""
+
+    @abstractmethod
+    async def _send(self, payload: str) -> None:
+        """Publica o payload já codificado para todos os workers"""
+
+
+class InMemoryBackplane(Backplane):
+    """Backplane dentro do processo; instâncias com o mesmo `hub` recebem as mesmas mensagens"""
+
+    def __init__(self, hub: Optional[List["InMemoryBackplane"]] = None):
+        super().__init__()
+        self.hub = hub if hub is not None else []
+
+    async def _subscribe(self) -> None:
+        self.hub.append(self)
+
+    async def _unsubscribe(self) -> None:
+        if self in self.hub:
+            self.hub.remove(self)
+
+    async def _send(self, payload: str) -> None:
+        for backplane in self.hub:
+            backplane._receive(payload)
+
+
+class PostgresBackplane(Backplane):
+    """Backplane sobre NOTIFY/LISTEN do Postgres"""
+
+    def __init__(self, channel: str = WEBSOCKET_CHANNEL):
+        super().__init__()
+        self.channel = channel
+        self._listener_task: Optional[asyncio.Task] = None
+        self._publisher: Optional[asyncpg.Connection] = None
+        self._publish_lock = asyncio.Lock()
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self._receive(payload)
+
+    async def _listen(self, ready: asyncio.Event) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await create_listen_connection()
+                await connection.add_listener(self.channel, self._on_notification)
+                ready.set()
+                while not connection.is_closed():
+                    await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro na escuta do backplane de websockets: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
+
+    async def _subscribe(self) -> None:
+        ready = asyncio.Event()
+        self._listener_task = asyncio.get_running_loop().create_task(self._listen(ready))
+        try:
+            await asyncio.wait_for(ready.wait(), LISTENER_RECONNECT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.error("Escuta do backplane de websockets ainda não conectada; tentando novamente em segundo plano")
+
+    async def _unsubscribe(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+        if self._publisher is not None and not self._publisher.is_closed():
+            await self._publisher.close()
+        self._publisher = None
+
+    async def _send(self, payload: str) -> None:
+        if len(payload.encode()) >= NOTIFY_PAYLOAD_LIMIT:
+            raise ValueError(f"Mensagem excede o limite de {NOTIFY_PAYLOAD_LIMIT} bytes do NOTIFY.")
+
+        async with self._publish_lock:
+            if self._publisher is None or self._publisher.is_closed():
+                self._publisher = await create_listen_connection()
+            await self._publisher.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+
+def create_backplane(name: str) -> Backplane:
+    """Cria o backplane configurado em `WEBSOCKET_BACKPLANE` (postgres ou memory)"""
+    if name == "memory":
+        return InMemoryBackplane()
+    return PostgresBackplane()
@@ -0,0 +1,52 @@
+from api.v1.websockets.manager import ConnectionManager, client_topic, plan_topic
+from api.v1.apps.outbox.service.service import OutboxSink, add_event
+from api.v1.core.serialization import dumps
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
+from decimal import Decimal
+
+"""
+    Eventos de planos enviados aos websockets inscritos.
+
+    Os serviços de planos, aportes extras e resgates chamam `emit_plan_event` na mesma
+    sessão da escrita; o evento é gravado no outbox e o `WebSocketSink` o publica no backplane,
+    nos tópicos do plano e do cliente dono dele, depois do commit.
+
+"""
+
+PLAN_AGGREGATE = 'plan'
+
+
+async def emit_plan_event(session: AsyncSession, name: str, plan_id, client_id,
+                          balance: Optional[Decimal] = None, **data) -> None:
+    """Grava no outbox um evento do plano para os websockets do cliente e do plano
+
+    Args:
+        session (AsyncSession): Sessão da escrita que originou o evento.
+        name (str): Nome do evento (ex.: `extra_contribution.created`).
+        plan_id: Identificador do plano.
+        client_id: Identificador do cliente dono do plano.
+        balance (Optional[Decimal]): Saldo do plano após a operação, quando conhecido.
+        **data: Demais campos do evento.
+    """
+    message = {"event": name, "plan_id": str(plan_id), "client_id": str(client_id), **data}
+    if balance is not None:
+        message["balance"] = balance
+    await add_event(session, PLAN_AGGREGATE, plan_id, name, message)
+
+
+class WebSocketSink(OutboxSink):
+    """Publica os eventos de planos do outbox no backplane dos websockets"""
+
+    name = "websocket"
+
+    def __init__(self, manager: ConnectionManager):
+        self.manager = manager
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        return event["aggregate_type"] == PLAN_AGGREGATE
+
+    async def deliver(self, event: Dict[str, Any]) -> None:
+        payload = event["payload"]
+        topics = [plan_topic(payload["plan_id"]), client_topic(payload["client_id"])]
+        await self.manager.backplane.publish(topics, dumps(payload).decode())
@@ -1,21 +1,183 @@
-from fastapi import APIRouter, WebSocket
+from fastapi import WebSocket
+from api.v1.core.config import settings
+from api.v1.websockets.backplane import Backplane, create_backplane
+from typing import Dict, List, Optional, Set
+from loguru import logger
+from enum import Enum
+import asyncio
+
+BROADCAST_TOPIC = 'broadcast'
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def client_topic(client_id) -> str:
+    return f"client:{client_id}"
+
+
+def plan_topic(plan_id) -> str:
+    return f"plan:{plan_id}"
+
+
+class SlowConsumerPolicyEnum(str, Enum):
+    drop = "drop"
+    coalesce = "coalesce"
+
+
+class Connection:
+    """Uma conexão de WebSocket com a sua fila de envio limitada e a task que a esvazia"""
+
+    __slots__ = ("websocket", "client_id", "topics", "queue", "coalesced", "_sender")
+
+    def __init__(self, websocket: WebSocket, client_id: Optional[str], queue_size: int):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.topics: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.coalesced = 0
+        self._sender: Optional[asyncio.Task] = None
+
+    def start(self, on_error) -> None:
+        self._sender = asyncio.get_running_loop().create_task(self._send_loop(on_error))
+
+    def offer(self, message: str) -> bool:
+        """Enfileira a mensagem sem bloquear; retorna False quando a fila está cheia"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def coalesce(self, message: str) -> None:
+        """Descarta as mensagens pendentes e mantém apenas a mais recente"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.coalesced += 1
+        self.queue.put_nowait(message)
+
+    async def _send_loop(self, on_error) -> None:
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_text(message)
+            except Exception as e:
+                logger.error(f"Erro ao enviar mensagem ao websocket: {e}")
+                on_error(self.websocket)
+                return
+
+    def cancel(self) -> None:
+        if self._sender is not None and self._sender is not asyncio.current_task():
+            self._sender.cancel()
+        self._sender = None
 
 
 class ConnectionManager:
+    """Conexões de WebSocket deste worker
 
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
+    `broadcast` publica a mensagem no backplane; a entrega às conexões locais acontece quando
+    ela volta do backplane, da mesma forma que nos demais workers. A entrega apenas enfileira
+    a mensagem na fila de cada conexão (limitada a `WEBSOCKET_SEND_QUEUE_SIZE`), que é
+    esvaziada por uma task própria: um cliente lento não atrasa os demais. Com a fila cheia,
+    a conexão é encerrada (`drop`) ou as mensagens pendentes são substituídas pela mais
+    recente (`coalesce`), conforme `WEBSOCKET_SLOW_CONSUMER_POLICY`.
 
-    async def connect(self, websocket: WebSocket):
+    As conexões assinam tópicos (`client:{id}` ao conectar, `plan:{id}` sob demanda) e o
+    índice `topics` leva cada mensagem apenas às conexões interessadas; somente o tópico
+    `broadcast` é entregue a todas.
+    """
+
+    def __init__(self, backplane: Backplane, queue_size: int = settings.WEBSOCKET_SEND_QUEUE_SIZE,
+                 slow_consumer_policy: SlowConsumerPolicyEnum = SlowConsumerPolicyEnum(settings.WEBSOCKET_SLOW_CONSUMER_POLICY)):
+        self.backplane = backplane
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.active_connections: Dict[WebSocket, Connection] = {}
+        self.topics: Dict[str, Set[Connection]] = {}
+        self.evicted = 0
+
+    async def start(self):
+        await self.backplane.start(self._deliver)
+
+    async def stop(self):
+        await self.backplane.stop()
+        for websocket in list(self.active_connections):
+            self.disconnect(websocket)
+
+    async def connect(self, websocket: WebSocket, client_id: Optional[str] = None):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = Connection(websocket, client_id, self.queue_size)
+        self.active_connections[websocket] = connection
+        if client_id is not None:
+            self.subscribe(websocket, client_topic(client_id))
+        connection.start(self.disconnect)
+
+    def subscribe(self, websocket: WebSocket, topic: str):
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.topics.add(topic)
+            self.topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.topics.discard(topic)
+            self._remove_from_index(self.topics, topic, connection)
+
+    @staticmethod
+    def _remove_from_index(index: Dict[str, Set[Connection]], key: str, connection: Connection):
+        connections = index.get(key)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del index[key]
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        connection = self.active_connections.pop(websocket, None)
+        if connection is None:
+            return
+
+        connection.cancel()
+        for topic in connection.topics:
+            self._remove_from_index(self.topics, topic, connection)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, message)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
\ No newline at end of file
+        await self.backplane.publish([BROADCAST_TOPIC], message)
+
+    def _enqueue(self, connection: Connection, message: str) -> None:
+        if connection.offer(message):
+            return
+
+        if self.slow_consumer_policy == SlowConsumerPolicyEnum.coalesce:
+            connection.coalesce(message)
+            return
+
+        self.evicted += 1
+        logger.warning(f"Websocket removido por não acompanhar as mensagens (cliente {connection.client_id})")
+        self.disconnect(connection.websocket)
+        asyncio.get_running_loop().create_task(self._close(connection.websocket))
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    async def _deliver(self, topics: List[str], message: str):
+        if BROADCAST_TOPIC in topics:
+            recipients = list(self.active_connections.values())
+        elif len(topics) == 1:
+            recipients = list(self.topics.get(topics[0], ()))
+        else:
+            recipients = set()
+            for topic in topics:
+                recipients.update(self.topics.get(topic, ()))
+
+        for connection in recipients:
+            self._enqueue(connection, message)
+
+
+manager = ConnectionManager(create_backplane(settings.WEBSOCKET_BACKPLANE))
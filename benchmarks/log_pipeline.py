@@ -0,0 +1,86 @@
+from api.v1.core.logs import configure_logging, shutdown_logging
+from api.v1.core.config import settings
+from loguru import logger
+import argparse
+import tempfile
+import asyncio
+import time
+import sys
+import os
+
+"""
+    Benchmark do impacto dos logs na latência (p50/p99) a uma taxa fixa de requisições.
+
+    Cada "requisição" cede o event loop uma vez e registra o `logger.success` dos inserts.
+    A latência é medida do instante agendado até o fim do handler, de modo que o tempo
+    bloqueado em escrita de arquivo no event loop aparece como fila nas requisições seguintes.
+
+    Cenários:
+        sem logs    nenhum sink
+        síncrono    configuração anterior (arquivo texto + stdout com diagnose, sem fila)
+        pipeline    `configure_logging` (fila, JSON, rotação, amostragem)
+
+    Uso: python -m benchmarks.log_pipeline --rate 5000 --seconds 5
+
+"""
+
+TICK_SECONDS = 0.01
+
+
+async def _handler(scheduled: float, latencies: list) -> None:
+    await asyncio.sleep(0)
+    logger.success("Novo plan registrado com sucesso")
+    latencies.append(time.perf_counter() - scheduled)
+
+
+async def _drive(rate: int, seconds: float) -> list:
+    latencies, tasks = [], []
+    per_tick = max(int(rate * TICK_SECONDS), 1)
+    start = time.perf_counter()
+    for tick in range(int(seconds / TICK_SECONDS)):
+        scheduled = start + tick * TICK_SECONDS
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.extend(asyncio.ensure_future(_handler(scheduled, latencies)) for _ in range(per_tick))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def _configure(scenario: str, directory: str, devnull) -> None:
+    logger.remove()
+    if scenario == "síncrono":
+        logger.add(os.path.join(directory, "sync.log"), serialize=False)
+        logger.add(devnull, colorize=True, format="<green>{time}</green> <level>{message}</level>", backtrace=True, diagnose=True)
+    elif scenario == "pipeline":
+        settings.LOG_PATH = os.path.join(directory, "pipeline.log")
+        configure_logging()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        for scenario in ("sem logs", "síncrono", "pipeline"):
+            sys.stdout = devnull
+            try:
+                _configure(scenario, directory, devnull)
+                latencies = asyncio.run(_drive(args.rate, args.seconds))
+                shutdown_logging()
+            finally:
+                sys.stdout = stdout
+            print(f"{scenario:<10} p50={_percentile(latencies, 0.50) * 1e3:7.2f} ms  "
+                  f"p99={_percentile(latencies, 0.99) * 1e3:7.2f} ms  ({len(latencies)} requisições)")
+
+
+if __name__ == "__main__":
+    main()
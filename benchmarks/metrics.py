@@ -0,0 +1,60 @@
+from api.v1.core.metrics import MetricsMiddleware
+from types import SimpleNamespace
+import argparse
+import asyncio
+import time
+
+"""
+    Microbenchmark do custo do `MetricsMiddleware` por requisição.
+
+    Executa a mesma aplicação ASGI mínima com e sem o middleware e reporta a diferença
+    média por requisição. Não inclui os eventos do engine (queries).
+
+    Uso: python -m benchmarks.metrics --requests 200000
+
+"""
+
+
+async def _endpoint():
+    pass
+
+
+ROUTE = SimpleNamespace(path="/plans/get-one-plan/{plan_id}/", endpoint=_endpoint)
+
+
+async def _app(scope, receive, send):
+    scope["endpoint"] = _endpoint
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+async def _run(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/plans/get-one-plan/1/", "app": SimpleNamespace(routes=[ROUTE])}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), _receive, _send)
+    return (time.perf_counter() - start) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = asyncio.run(_run(_app, args.requests))
+    instrumented = asyncio.run(_run(MetricsMiddleware(_app), args.requests))
+    print(f"sem middleware  {baseline * 1e6:6.2f} µs/requisição")
+    print(f"com middleware  {instrumented * 1e6:6.2f} µs/requisição")
+    print(f"overhead        {(instrumented - baseline) * 1e6:6.2f} µs/requisição")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+from fastapi.encoders import jsonable_encoder
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from api.v1.apps.client.models.models import Client
+from api.v1.apps.products.models.models import Products
+from api.v1.apps.plan.models.models import Plan
+from api.v1.apps.extra_contribution.models.models import ExtraContribution
+from api.v1.apps.rescue.models.models import Rescue
+from api.v1.apps.plan_balance.models.models import PlanBalance
+from api.v1.core.serialization import dumps
+import argparse
+import timeit
+import uuid
+import json
+
+"""
+    Microbenchmark do custo por linha da serialização das rotas de listagem.
+
+    Compara o caminho antigo (instâncias ORM -> `jsonable_encoder` -> `json.dumps`, como o
+    `JSONResponse` do FastAPI faz) com o caminho atual (dicionários coluna-valor -> orjson).
+    Não acessa o banco: mede apenas a serialização de uma página de planos.
+
+    Uso: python -m benchmarks.serialization --rows 500 --repeat 20
+
+"""
+
+
+def _rows(count: int):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "client_id": uuid.uuid4(),
+            "product_id": uuid.uuid4(),
+            "contribution": Decimal("1500.00"),
+            "date_of_contract": now,
+            "age_of_retirement": 65,
+            "next_eligible_rescue_date": date.today(),
+            "updated_at": now,
+        }
+        for _ in range(count)
+    ]
+
+
+def orm_path(plans) -> bytes:
+    content = jsonable_encoder({"items": plans, "next_cursor": None})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def core_path(rows) -> bytes:
+    return dumps({"items": rows, "next_cursor": None})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    plans = [Plan(**row) for row in rows]
+    assert json.loads(orm_path(plans)) == json.loads(core_path(rows))
+
+    for name, run in (("orm + jsonable_encoder", lambda: orm_path(plans)), ("core rows + orjson", lambda: core_path(rows))):
+        seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{name:<24} {seconds * 1e6 / args.rows:8.2f} µs/linha")
+
+
+if __name__ == "__main__":
+    main()
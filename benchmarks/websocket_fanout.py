@@ -0,0 +1,75 @@
+from api.v1.websockets.manager import ConnectionManager, SlowConsumerPolicyEnum
+from api.v1.websockets.backplane import InMemoryBackplane
+import argparse
+import asyncio
+import time
+
+"""
+    Benchmark de fan-out do `ConnectionManager` para milhares de websockets simulados.
+
+    Publica `--messages` mensagens no backplane em memória e mede o tempo até todas as
+    conexões rápidas receberem todas elas. As conexões lentas (`--slow`) nunca concluem o
+    envio e devem ser removidas (drop) ou ter as mensagens agrupadas (coalesce) sem atrasar
+    as demais.
+
+    Uso: python -m benchmarks.websocket_fanout --sockets 10000 --messages 50 --slow 100
+
+"""
+
+
+class SimulatedWebSocket:
+    __slots__ = ("received",)
+
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.received += 1
+
+    async def close(self, code=1000):
+        pass
+
+
+class StalledWebSocket(SimulatedWebSocket):
+    async def send_text(self, message):
+        await asyncio.Event().wait()
+
+
+async def _run(sockets: int, messages: int, slow: int, policy: SlowConsumerPolicyEnum, queue_size: int) -> None:
+    manager = ConnectionManager(InMemoryBackplane(), queue_size=queue_size, slow_consumer_policy=policy)
+    fast = [SimulatedWebSocket() for _ in range(sockets - slow)]
+    for index, websocket in enumerate(fast + [StalledWebSocket() for _ in range(slow)]):
+        await manager.connect(websocket, str(index))
+    await manager.start()
+
+    start = time.perf_counter()
+    for index in range(messages):
+        await manager.broadcast(f"mensagem {index}")
+    while any(websocket.received < messages for websocket in fast):
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    await manager.stop()
+
+    deliveries = messages * len(fast)
+    print(f"{policy.value:<9} {sockets} sockets ({slow} lentos), {messages} mensagens: "
+          f"{elapsed:.3f} s, {deliveries / elapsed:,.0f} entregas/s, {messages / elapsed:,.1f} broadcasts/s, "
+          f"{manager.evicted} removidos")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sockets", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--slow", type=int, default=100)
+    parser.add_argument("--queue-size", type=int, default=16)
+    args = parser.parse_args()
+
+    for policy in SlowConsumerPolicyEnum:
+        asyncio.run(_run(args.sockets, args.messages, args.slow, policy, args.queue_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 import ssl
+import asyncpg
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Any, Dict
+from uuid import uuid4
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from api.v1.core.config import settings
+from api.v1.core.metrics import InstrumentedQueuePool, instrument_engine
+from api.v1.core.query_stats import instrument_queries, current_caller
+from api.v1.core.serialization import dumps
 
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
@@ -16,17 +25,51 @@ DATABASE_URL = (
     f"{settings.DB_NAME}"
 )
 
-print(DATABASE_URL)
 
-engine = create_async_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    echo=True,
-    connect_args={
+def engine_options() -> Dict[str, Any]:
+    """Perfil do engine montado a partir das configurações (`DB_*`).
+
+    O pool é por processo: com N workers do gunicorn o banco recebe até
+    N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexões, que devem caber no `max_connections`.
+
+    Com `DB_PGBOUNCER` (modo transaction) os prepared statements não podem ser reaproveitados
+    entre transações: os caches do asyncpg e do SQLAlchemy são desligados e cada statement
+    recebe um nome único. O echo dos statements só é aceito em `ENVIRONMENT=development`.
+    As colunas JSON/JSONB são serializadas com o orjson, aceitando `Decimal` e `UUID`.
+    """
+    connect_args: Dict[str, Any] = {
         "password": settings.DB_PASSWORD,
         "ssl": ssl_context,
-    },
-)
+    }
+
+    if settings.DB_PGBOUNCER:
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+    else:
+        connect_args.update(
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            prepared_statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        )
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "echo": settings.DB_ECHO and settings.ENVIRONMENT == "development",
+        "json_serializer": lambda value: dumps(value).decode(),
+        "connect_args": connect_args,
+    }
+
+
+engine = create_async_engine(DATABASE_URL, **engine_options())
+instrument_engine(engine.sync_engine)
+instrument_queries(engine.sync_engine)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -36,6 +79,67 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+
+class PoolCheckoutCounter:
+    """Conta quantas conexões foram retiradas do pool do engine.
+
+    Usado nos testes para garantir que cada requisição utiliza apenas uma conexão.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def increment(self):
+        self.value += 1
+
+    def reset(self):
+        self.value = 0
+
+
+pool_checkouts = PoolCheckoutCounter()
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _count_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_checkouts.increment()
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession):
+    """Agrupa as operações feitas na sessão em uma única transação.
+
+    Blocos aninhados reutilizam a transação do bloco mais externo, que é o único
+    responsável pelo commit (ou rollback em caso de erro).
+    """
+    depth = session.info.get("uow_depth", 0)
+    session.info["uow_depth"] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            await session.commit()
+    except Exception:
+        if depth == 0:
+            await session.rollback()
+        raise
+    finally:
+        session.info["uow_depth"] = depth
+
+
+async def create_listen_connection() -> asyncpg.Connection:
+    """Abre uma conexão dedicada (fora do pool) para LISTEN/NOTIFY
+
+    Usa `DB_DIRECT_HOST`/`DB_DIRECT_PORT`, pois LISTEN não funciona através do PgBouncer em modo transaction.
+    """
+    return await asyncpg.connect(
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        host=settings.DB_DIRECT_HOST,
+        port=settings.DB_DIRECT_PORT,
+        database=settings.DB_NAME,
+        ssl=ssl_context,
+    )
+
+
 async def get_async_session():
     async with AsyncSessionLocal() as session:
         try:
@@ -47,15 +151,25 @@ async def get_async_session():
             await session.close()
 
 def async_session(func):
-    async def wrapper(*args, **kwargs):
-        async with AsyncSessionLocal() as session:
-            try:
-                result = await func(session, *args, **kwargs)
-                await session.commit()
-                return result
-            except Exception:
-                await session.rollback()
-                raise
-            finally:
-                await session.close()
-    return wrapper
\ No newline at end of file
+    """Executa a função de serviço dentro de uma unidade de trabalho.
+
+    Quando a rota informa a sessão da requisição (``session=...``) ela é reutilizada,
+    evitando abrir uma segunda conexão. Sem sessão, uma nova é aberta apenas para a chamada.
+    O nome da função fica em `current_caller` para o log de queries lentas.
+    """
+    caller = f"{func.__module__}.{func.__qualname__}"
+
+    @wraps(func)
+    async def wrapper(*args, session: AsyncSession = None, **kwargs):
+        token = current_caller.set(caller)
+        try:
+            if session is not None:
+                async with unit_of_work(session):
+                    return await func(session, *args, **kwargs)
+
+            async with AsyncSessionLocal() as session:
+                async with unit_of_work(session):
+                    return await func(session, *args, **kwargs)
+        finally:
+            current_caller.reset(token)
+    return wrapper
@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """Remove os gauges do worker encerrado das métricas agregadas"""
+    multiprocess.mark_process_dead(worker.pid)
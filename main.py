@@ -1,9 +1,15 @@
 from fastapi import FastAPI
-from loguru import logger 
-import sys
-from fastapi import FastAPI
 from api.v1.endpoints.routers import api_router
 from fastapi.middleware.cors import CORSMiddleware
+from api.v1.apps.products.service.catalog import catalog
+from api.v1.apps.projection.service.simulation import shutdown_executor
+from api.v1.core.logs import configure_logging, shutdown_logging
+from api.v1.core.metrics import MetricsMiddleware, metrics_response
+from api.v1.websockets.manager import manager
+from api.v1.websockets.events import WebSocketSink
+from api.v1.apps.outbox.service.dispatcher import outbox_dispatcher
+
+configure_logging()
 
 app = FastAPI(title='PensionOne')
 app.include_router(api_router)
@@ -22,11 +28,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+outbox_dispatcher.register(WebSocketSink(manager))
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    """Métricas no formato texto do Prometheus, agregadas entre os workers"""
+    return metrics_response()
+
+
+@app.on_event("startup")
+async def startup():
+    catalog.start_listener()
+    await manager.start()
+    outbox_dispatcher.start()
+
 
+@app.on_event("shutdown")
+async def shutdown():
+    await catalog.stop_listener()
+    await outbox_dispatcher.stop()
+    await manager.stop()
+    shutdown_executor()
+    shutdown_logging()
 
-logger.add("logs/logs.log",  serialize=False)
-logger.add(sys.stdout, colorize=True, format="<green>{time}</green> <level>{message}</level>", backtrace=True, diagnose=True)
-logger.opt(colors=True)
 
 if __name__ == "__main__":
     import uvicorn
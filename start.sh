@@ -1,7 +1,11 @@
 #!/bin/sh
 set -e
 
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 exec gunicorn main:app \
-  --workers 2 \
+  --config gunicorn.conf.py \
+  --workers ${WEB_CONCURRENCY:-2} \
   --worker-class uvicorn.workers.UvicornWorker \
   --bind 0.0.0.0:8080
\ No newline at end of file
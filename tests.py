@@ -11,12 +11,55 @@ from api.v1.apps.client.models.models import Client
 from api.v1.apps.client.service.service import insert as insert_client
 from api.v1.apps.products.service.service import insert as insert_product
 from api.v1.apps.plan.service.service import insert as insert_plan
-from api.v1.apps.extra_contribution.service.service import insert as insert_extra_contribution
+from api.v1.apps.extra_contribution.service.service import insert as insert_extra_contribution, update as update_extra_contribution
 from api.v1.apps.rescue.service.service import insert as insert_rescue
-
-from datetime import datetime
+from api.v1.apps.rescue.service.eligibility import claim_rescue_window
+from database.session import pool_checkouts, engine as app_engine, engine_options, DATABASE_URL
+from api.v1.apps.products.service.catalog import catalog, PRODUCTS_CHANNEL
+from api.v1.apps.projection.service.service import simulation_cache, simulate_plan, MAX_JOB_PLANS
+from api.v1.apps.analytics.service.service import rebuild_rollups
+from api.v1.apps.idempotency.service.service import idempotency_cache
+from api.v1.apps.client.service import service as client_service
+from api.v1.apps.plan.service import service as plan_service
+from api.v1.apps.rescue.service import service as rescue_service
+from api.v1.apps.extra_contribution.service import service as extra_contribution_service
+from api.v1.apps.products.service import service as products_service
+from api.v1.apps.projection.service import service as projection_service
+from api.v1.apps.plan_balance.service import service as plan_balance_service
+from api.v1.apps.plan.models.models import Plan
+from api.v1.apps.products.models.models import Products
+from api.v1.apps.extra_contribution.models.models import ExtraContribution
+from api.v1.apps.rescue.models.models import Rescue
+from api.v1.apps.plan_balance.models.models import PlanBalance
+from sqlalchemy import event, text, select, update, func
+
+from datetime import datetime, timezone, timedelta
 import asyncio
 import uuid
+import json
+import zstandard
+from prometheus_client.parser import text_string_to_metric_families
+from api.v1.core.query_stats import query_stats
+from loguru import logger
+from api.v1.websockets.manager import ConnectionManager, SlowConsumerPolicyEnum, manager as websocket_manager, plan_topic, client_topic
+from database.session import AsyncSessionLocal as AppSessionLocal, unit_of_work
+from api.v1.apps.outbox.models.models import OutboxEvent
+from api.v1.apps.outbox.service.service import OutboxSink, add_event, dispatch_batch, purge as purge_outbox
+from api.v1.apps.outbox.service.dispatcher import outbox_dispatcher
+from api.v1.apps.jobs.models.models import Job
+from api.v1.apps.jobs.service.service import enqueue as enqueue_job, get_one as get_job, requeue_stale, purge as purge_jobs
+from api.v1.apps.jobs.service.registry import JOB_HANDLERS
+from api.v1.apps.jobs.service.worker import JobWorker
+from api.v1.apps.jobs.service.handlers import clients_bulk_import, CLIENTS_BULK_IMPORT
+from api.v1.core.config import settings
+from api.v1.core.serialization import FastJSONResponse, dumps
+from api.v1.core.logs import SizeOrTimeRotation, LevelSampler, parse_sampling, compress_zstd
+from types import SimpleNamespace
+from asyncpg.pgproto.pgproto import UUID as PgUUID
+from decimal import Decimal
+from api.v1.websockets.backplane import InMemoryBackplane, PostgresBackplane
+from api.v1.endpoints.websockets import websocket_handler, CHAT_MESSAGE_MAX_BYTES
+from fastapi import WebSocketDisconnect
 
 DATABASE_URL = "postgresql+asyncpg://postgres:12345678@db/postgres"
 
@@ -33,6 +76,8 @@ async def setup_database():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
+    await app_engine.dispose()
+
 @pytest.fixture()
 async def async_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
@@ -572,4 +617,1686 @@ async def test_rescue_invalid_initial_lack():
     
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "Carência inicial de resgate de 60 dias não foi cumprida."
-    
\ No newline at end of file
+    
+
+
+# Tests session
+@pytest.mark.asyncio
+async def test_request_uses_single_pool_checkout():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        new_product_data = {
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": "2030-11-02T19:30:24.117000+00:00",
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        }
+
+        pool_checkouts.reset()
+        response = await client.post("/products/create-product/", json=new_product_data)
+        assert response.status_code == 201
+        assert pool_checkouts.value == 1
+
+        pool_checkouts.reset()
+        response = await client.get(f"/products/get-one-product/{response.json()['id']}/")
+        assert response.status_code == 200
+        assert pool_checkouts.value == 1
+
+
+# Tests pagination
+@pytest.mark.asyncio
+async def test_get_product_keyset_pagination():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        created_ids = set()
+        for index in range(3):
+            new_product_data = {
+                "name": f"Produto Teste {index}",
+                "susep": "1234567890",
+                "expiration_of_sale": "2030-11-02T19:30:24.117000+00:00",
+                "value_minimum_aporte_initial": 1000.00,
+                "value_minimum_aporte_extra": 100.00,
+                "entry_age": 18,
+                "age_of_exit": 45,
+                "lack_initial_of_rescue": 60,
+                "lack_entre_resgates": 30
+            }
+            response = await client.post("/products/create-product/", json=new_product_data)
+            created_ids.add(response.json()["id"])
+
+        first_page = (await client.get("/products/get-product/", params={"limit": 2})).json()
+        assert len(first_page["items"]) == 2
+        assert first_page["next_cursor"] is not None
+
+        second_page = (await client.get("/products/get-product/", params={"limit": 2, "cursor": first_page["next_cursor"]})).json()
+        assert len(second_page["items"]) == 1
+        assert second_page["next_cursor"] is None
+
+        listed_ids = {item["id"] for item in first_page["items"] + second_page["items"]}
+        assert listed_ids == created_ids
+
+        response = await client.get("/products/get-product/", params={"cursor": "invalido"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "cursor inválido."
+
+
+# Tests export
+@pytest.mark.asyncio
+async def test_export_client_ndjson_and_compressed_csv():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        for index in range(2):
+            client_data = {
+                "cpf": f"1234567890{index}",
+                "name": f"Cliente Teste {index}",
+                "email": f"cliente{index}@teste.com",
+                "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+                "gender": "Feminino",
+                "monthly_income": 6000.0
+            }
+            await insert_client(args=client_data)
+
+        response = await client.get("/clients/export-client/")
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert {row["email"] for row in rows} == {"cliente0@teste.com", "cliente1@teste.com"}
+        assert rows[0]["monthly_income"] == "6000.00"
+
+        response = await client.get("/clients/export-client/", params={"export_format": "csv", "compression": "zstd"})
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == 'attachment; filename="client.csv.zst"'
+        lines = zstandard.ZstdDecompressor().decompressobj().decompress(response.content).decode().splitlines()
+        assert lines[0] == "id,cpf,name,email,date_of_birth,gender,monthly_income"
+        assert len(lines) == 3
+
+
+# Tests bulk clients
+@pytest.mark.asyncio
+async def test_bulk_create_client_report():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Existente",
+            "email": "existente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+
+        content = (
+            "cpf,name,email,date_of_birth,gender,monthly_income\n"
+            "12345678902,Cliente Um,um@teste.com,1990-01-01,Masculino,5000.00\n"
+            "123,Cliente Dois,dois@teste.com,1990-01-01,Feminino,5000.00\n"
+            "12345678903,Cliente Tres,existente@teste.com,1990-01-01,Outro,0\n"
+            "12345678904,Cliente Quatro,EXISTENTE@teste.com,1990-01-01,Outro,5000.00\n"
+            "12345678905,Cliente Cinco,Um@Teste.com,1990-01-01,Outro,5000.00\n"
+        )
+        response = await client.post("/clients/bulk/", files={"file": ("clientes.csv", content, "text/csv")})
+
+        assert response.status_code == 200
+        report = response.json()
+        assert report["created"] == 1
+        assert report["rejected"] == 4
+        assert report["results"][0]["status"] == "created"
+        assert report["results"][1]["errors"] == ["Informe um valor válido para o cpf"]
+        assert report["results"][2]["errors"] == ["Informe um valor válido para a renda mensal.", "Email já cadastrado."]
+        assert report["results"][3]["errors"] == ["Email duplicado no arquivo.", "Email já cadastrado."]
+        assert report["results"][4]["errors"] == ["Email duplicado no arquivo."]
+
+        response = await client.get("/clients/filter-client-by-email/um@teste.com/")
+        assert response.json()[0]["id"] == report["results"][0]["id"]
+
+
+# Tests batch extra contributions
+@pytest.mark.asyncio
+async def test_batch_extra_contribution_set_based_validation():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        client_ids = []
+        for index in range(2):
+            result_client = await insert_client(args={
+                "cpf": f"1234567890{index}",
+                "name": f"Cliente Teste {index}",
+                "email": f"cliente{index}@teste.com",
+                "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+                "gender": "Feminino",
+                "monthly_income": 6000.0
+            })
+            client_ids.append(result_client.get("id"))
+
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        result_plan = await insert_plan(args={
+            "client_id": client_ids[0],
+            "product_id": result_product.get("id"),
+            "contribution": 1500.00,
+            "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+            "age_of_retirement": 65
+        })
+        plan_id = result_plan.get("id")
+
+        lines = [
+            {"client_id": client_ids[0], "plan_id": plan_id, "contribution_value": 500.00},
+            {"client_id": client_ids[1], "plan_id": plan_id, "contribution_value": 500.00},
+            {"client_id": client_ids[0], "plan_id": plan_id, "contribution_value": 50.00},
+            {"client_id": "invalido", "plan_id": plan_id, "contribution_value": 500.00},
+            {"client_id": client_ids[0], "plan_id": plan_id, "contribution_value": "NaN"},
+            {"client_id": client_ids[0], "plan_id": plan_id, "contribution_value": "1e20"},
+        ]
+        content = "\n".join(json.dumps(line) for line in lines)
+        response = await client.post("/extra_contribuitions/batch/", files={"file": ("folha.ndjson", content, "application/x-ndjson")})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "inserted": 1,
+            "rejected": [
+                {"row": 2, "reason": "O plano informado não pertence ao cliente."},
+                {"row": 3, "reason": "Não é possível realizar aporte extra com valor menor que R$ 100,00."},
+                {"row": 4, "reason": "client_id inválido. Deve ser um UUID válido."},
+                {"row": 5, "reason": "Informe um valor válido para o aporte extra."},
+                {"row": 6, "reason": "Informe um valor válido para o aporte extra."},
+            ]
+        }
+        async with AppSessionLocal() as session:
+            balance = await session.scalar(select(PlanBalance.balance).where(PlanBalance.plan_id == plan_id))
+        assert balance.is_finite() and balance == Decimal("1500.00") + Decimal("500.00")
+        async with AppSessionLocal() as session:
+            events = (await session.scalars(select(OutboxEvent).where(OutboxEvent.event_type == "extra_contribution.batch_created"))).all()
+        assert [(event.aggregate_id, event.payload) for event in events] == [(uuid.UUID(plan_id), {
+            "event": "extra_contribution.batch_created", "plan_id": plan_id, "client_id": client_ids[0],
+            "contributions": 1, "contribution_value": 500.00, "balance": 2000.00})]
+
+        content = json.dumps(lines[0]) + "\n[1, 2]\n"
+        response = await client.post("/extra_contribuitions/batch/", files={"file": ("folha.ndjson", content, "application/x-ndjson")})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Linha 2 do arquivo não é um objeto JSON."
+
+
+# Tests plan balance
+@pytest.mark.asyncio
+async def test_rescue_debits_plan_balance_including_extra_contributions():
+    result_client = await insert_client(args={
+        "cpf": "12345678901",
+        "name": "Cliente Teste",
+        "email": "cliente@teste.com",
+        "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+        "gender": "Feminino",
+        "monthly_income": 6000.0
+    })
+    client_id = result_client.get("id")
+
+    result_product = await insert_product(args={
+        "name": "Produto Teste",
+        "susep": "1234567890",
+        "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+        "value_minimum_aporte_initial": 1000.00,
+        "value_minimum_aporte_extra": 100.00,
+        "entry_age": 18,
+        "age_of_exit": 45,
+        "lack_initial_of_rescue": 60,
+        "lack_entre_resgates": 0
+    })
+
+    result_plan = await insert_plan(args={
+        "client_id": client_id,
+        "product_id": result_product.get("id"),
+        "contribution": 1500.00,
+        "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+        "age_of_retirement": 65
+    })
+    plan_id = result_plan.get("id")
+
+    await insert_extra_contribution(args={"client_id": client_id, "plan_id": plan_id, "contribution_value": 1500.00})
+
+    results = await asyncio.gather(
+        insert_rescue(args={"plan_id": plan_id, "rescue_value": 2000.00}),
+        insert_rescue(args={"plan_id": plan_id, "rescue_value": 2000.00}),
+        return_exceptions=True,
+    )
+
+    assert len([result for result in results if isinstance(result, dict)]) == 1
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].detail == "Não há saldo suficiente para resgatar o valor informado."
+
+
+@pytest.mark.asyncio
+async def test_rescue_transfer_moves_balance_and_rollups_between_plans():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        plan_ids = []
+        for contribution in (1500.00, 1000.00):
+            result_plan = await insert_plan(args={
+                "client_id": result_client.get("id"),
+                "product_id": result_product.get("id"),
+                "contribution": contribution,
+                "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+                "age_of_retirement": 65
+            })
+            plan_ids.append(result_plan.get("id"))
+        rescue_id = (await insert_rescue(args={"plan_id": plan_ids[0], "rescue_value": 200.00})).get("id")
+
+        response = await client.put(f"/rescues/update-rescue/{rescue_id}/", json={"plan_id": plan_ids[1], "rescue_value": 2000.00})
+        assert response.status_code == 400
+
+        response = await client.put(f"/rescues/update-rescue/{rescue_id}/", json={"plan_id": plan_ids[1], "rescue_value": 300.00})
+        assert response.status_code == 200
+
+        async with AppSessionLocal() as session:
+            balances = dict((await session.execute(select(PlanBalance.plan_id, PlanBalance.balance))).all())
+            plans = {str(plan.id): plan for plan in (await session.scalars(select(Plan))).all()}
+            rescue = await session.get(Rescue, uuid.UUID(rescue_id))
+        assert balances == {uuid.UUID(plan_ids[0]): Decimal("1500.00"), uuid.UUID(plan_ids[1]): Decimal("700.00")}
+        assert str(rescue.plan_id) == plan_ids[1]
+        assert plans[plan_ids[0]].next_eligible_rescue_date == date(2025, 1, 1)
+        assert plans[plan_ids[1]].next_eligible_rescue_date == rescue.created_at.astimezone(timezone.utc).date() + timedelta(days=30)
+
+        incremental = (await client.get("/analytics/aum-by-age-band/")).json()
+        await rebuild_rollups()
+        assert (await client.get("/analytics/aum-by-age-band/")).json() == incremental
+
+        response = await client.delete(f"/rescues/delete-rescue/{rescue_id}/")
+        assert response.status_code == 200
+        async with AppSessionLocal() as session:
+            removed = await session.scalar(select(OutboxEvent).where(OutboxEvent.event_type == "rescue.removed"))
+        assert removed.aggregate_id == uuid.UUID(plan_ids[1])
+        assert removed.payload == {"event": "rescue.removed", "plan_id": plan_ids[1], "client_id": result_client.get("id"),
+                                   "rescue_id": rescue_id, "rescue_value": 300.00, "balance": 1000.00}
+
+
+# Tests product catalog
+@pytest.mark.asyncio
+async def test_product_catalog_snapshot_and_notify_invalidation():
+    result_client = await insert_client(args={
+        "cpf": "12345678901",
+        "name": "Cliente Teste",
+        "email": "cliente@teste.com",
+        "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+        "gender": "Feminino",
+        "monthly_income": 6000.0
+    })
+    result_product = await insert_product(args={
+        "name": "Produto Teste",
+        "susep": "1234567890",
+        "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+        "value_minimum_aporte_initial": 1000.00,
+        "value_minimum_aporte_extra": 100.00,
+        "entry_age": 18,
+        "age_of_exit": 45,
+        "lack_initial_of_rescue": 60,
+        "lack_entre_resgates": 30
+    })
+    product_id = result_product.get("id")
+
+    async with AsyncSessionLocal() as session:
+        assert (await catalog.get(session, product_id)).name == "Produto Teste"
+
+    statements = []
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(app_engine.sync_engine, "before_cursor_execute", record_statement)
+    try:
+        await insert_plan(args={
+            "client_id": result_client.get("id"),
+            "product_id": product_id,
+            "contribution": 1500.00,
+            "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+            "age_of_retirement": 65
+        })
+    finally:
+        event.remove(app_engine.sync_engine, "before_cursor_execute", record_statement)
+
+    assert not [statement for statement in statements if "FROM products" in statement]
+
+    catalog.start_listener()
+    try:
+        await asyncio.sleep(0.2)
+
+        async with AsyncSessionLocal() as session:
+            await catalog.get(session, product_id)
+            assert catalog.is_fresh()
+
+            await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": PRODUCTS_CHANNEL, "payload": product_id})
+            await session.commit()
+
+        for _ in range(100):
+            if not catalog.is_fresh():
+                break
+            await asyncio.sleep(0.01)
+        assert not catalog.is_fresh()
+    finally:
+        await catalog.stop_listener()
+
+
+@pytest.mark.asyncio
+async def test_product_catalog_invalidation_during_refresh_is_not_lost():
+    catalog.invalidate()
+    async with AppSessionLocal() as session:
+        execute = session.execute
+
+        async def execute_and_invalidate(*args, **kwargs):
+            result = await execute(*args, **kwargs)
+            catalog.invalidate()
+            return result
+
+        session.execute = execute_and_invalidate
+        await catalog.refresh(session)
+        assert not catalog.is_fresh()
+
+        session.execute = execute
+        await catalog.refresh(session)
+        assert catalog.is_fresh()
+
+
+
+# Tests client summary
+@pytest.mark.asyncio
+async def test_client_summary_fixed_number_of_queries():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        client_id = result_client.get("id")
+
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+
+        plan_ids = []
+        for _ in range(20):
+            result_plan = await insert_plan(args={
+                "client_id": client_id,
+                "product_id": result_product.get("id"),
+                "contribution": 1500.00,
+                "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+                "age_of_retirement": 65
+            })
+            plan_ids.append(result_plan.get("id"))
+
+        await insert_extra_contribution(args={"client_id": client_id, "plan_id": plan_ids[0], "contribution_value": 500.00})
+        await insert_rescue(args={"plan_id": plan_ids[0], "rescue_value": 300.00})
+
+        statements = []
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(app_engine.sync_engine, "before_cursor_execute", record_statement)
+        try:
+            response = await client.get(f"/clients/summary-client/{client_id}/")
+        finally:
+            event.remove(app_engine.sync_engine, "before_cursor_execute", record_statement)
+
+        assert response.status_code == 200
+        assert len([statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]) == 4
+
+        summary = response.json()
+        assert len(summary["plans"]) == 20
+        plan = next(plan for plan in summary["plans"] if plan["id"] == plan_ids[0])
+        assert plan["product"]["name"] == "Produto Teste"
+        assert float(plan["balance"]) == 1700.00
+        assert len(plan["extra_contributions"]) == 1
+        assert len(plan["rescues"]) == 1
+
+        response = await client.get(f"/clients/summary-client/{uuid.uuid4()}/")
+        assert response.status_code == 404
+
+
+
+# Tests projection
+@pytest.mark.asyncio
+async def test_projection_plan_batch_and_cache_invalidation():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        plan_data = {
+            "client_id": result_client.get("id"),
+            "product_id": result_product.get("id"),
+            "contribution": 1500.00,
+            "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+            "age_of_retirement": 65
+        }
+        plan_ids = [(await insert_plan(args=plan_data)).get("id") for _ in range(2)]
+
+        response = await client.get(f"/projections/projection-plan/{plan_ids[0]}/", params={"annual_rate": 0.06})
+        assert response.status_code == 200
+        projection = response.json()
+        assert projection["retirement_month"] == "2055-05"
+        assert projection["months"] == 366
+        assert projection["projected_balance"] == round(1500.00 * 1.06 ** (366 / 12), 2)
+
+        response = await client.post("/projections/batch/", json={"plan_ids": plan_ids, "annual_rate": 0.06, "monthly_contribution": 100.0})
+        assert response.status_code == 200
+        assert [item["plan_id"] for item in response.json()] == plan_ids
+        assert response.json()[0]["projected_balance"] > projection["projected_balance"]
+
+        response = await client.put(f"/plans/update-plan/{plan_ids[0]}/", json={**plan_data, "contribution": 3000.00, "date_of_contract": "2024-11-02T20:46:03.566+00:00"})
+        assert response.status_code == 200
+
+        response = await client.get(f"/projections/projection-plan/{plan_ids[0]}/", params={"annual_rate": 0.06})
+        assert response.json()["projected_balance"] == round(3000.00 * 1.06 ** (366 / 12), 2)
+
+        response = await client.put(f"/clients/update-client/{result_client.get('id')}/", json={"date_of_birth": "1985-05-15", "gender": "Feminino", "monthly_income": 6000.0})
+        assert response.status_code == 200
+        response = await client.get(f"/projections/projection-plan/{plan_ids[0]}/", params={"annual_rate": 0.06})
+        assert response.json()["retirement_month"] == "2050-05"
+        assert response.json()["months"] == 306
+
+        response = await client.get("/projections/export-projection/", params={"annual_rate": 0.06})
+        assert len(response.text.splitlines()) == 2
+
+        response = await client.get(f"/projections/projection-plan/{plan_ids[0]}/", params={"annual_rate": 2})
+        assert response.status_code == 400
+
+
+
+@pytest.mark.asyncio
+async def test_simulation_plan_seeded_and_cached():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        result_plan = await insert_plan(args={
+            "client_id": result_client.get("id"),
+            "product_id": result_product.get("id"),
+            "contribution": 1500.00,
+            "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+            "age_of_retirement": 65
+        })
+        url = f"/projections/simulation-plan/{result_plan.get('id')}/"
+        params = {"paths": 2000, "seed": 42}
+
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        simulation = response.json()
+        assert simulation["product"] == "Produto Teste"
+        assert simulation["balance"]["p10"] < simulation["balance"]["p50"] < simulation["balance"]["p90"]
+        assert simulation["monthly_income"]["p10"] < simulation["monthly_income"]["p90"]
+
+        cached = len(simulation_cache)
+        response = await client.get(url, params=params)
+        assert response.json() == simulation
+        assert len(simulation_cache) == cached
+
+        response = await client.get(url, params={"paths": 2000, "seed": -1})
+        assert response.status_code == 400
+
+        response = await client.get(url, params={"paths": 2000, "seed": 7})
+        assert response.json()["balance"] != simulation["balance"]
+
+        response = await client.get(url, params={"paths": 10 ** 9})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_simulation_plan_survives_first_caller_cancel_without_holding_connections():
+    result_client = await insert_client(args={
+        "cpf": "12345678901",
+        "name": "Cliente Teste",
+        "email": "cliente@teste.com",
+        "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+        "gender": "Feminino",
+        "monthly_income": 6000.0
+    })
+    result_product = await insert_product(args={
+        "name": "Produto Teste",
+        "susep": "1234567890",
+        "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+        "value_minimum_aporte_initial": 1000.00,
+        "value_minimum_aporte_extra": 100.00,
+        "entry_age": 18,
+        "age_of_exit": 45,
+        "lack_initial_of_rescue": 60,
+        "lack_entre_resgates": 30
+    })
+    result_plan = await insert_plan(args={
+        "client_id": result_client.get("id"),
+        "product_id": result_product.get("id"),
+        "contribution": 1500.00,
+        "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+        "age_of_retirement": 65
+    })
+    params = {"plan_id": result_plan.get("id"), "paths": 50000, "seed": 1234}
+
+    first = asyncio.create_task(simulate_plan(**params))
+    while not first.done() and not projection_service._running_simulations:
+        await asyncio.sleep(0.001)
+    second = asyncio.create_task(simulate_plan(**params))
+    await asyncio.sleep(0.01)
+    assert app_engine.pool.checkedout() == 0
+
+    first.cancel()
+    simulation = await second
+    assert first.cancelled()
+    assert simulation["seed"] == 1234
+    assert simulation["balance"]["p10"] < simulation["balance"]["p90"]
+
+
+
+
+# Tests rescue eligibility
+@pytest.mark.asyncio
+async def test_rescue_waiting_periods_use_real_dates():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        plan_data = {
+            "client_id": result_client.get("id"),
+            "product_id": result_product.get("id"),
+            "contribution": 1500.00,
+            "age_of_retirement": 65
+        }
+        new_plan = await insert_plan(args={**plan_data, "date_of_contract": datetime.now(timezone.utc)})
+        old_plan = await insert_plan(args={**plan_data, "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00")})
+
+        with pytest.raises(HTTPException) as exc_info:
+            await insert_rescue(args={"plan_id": new_plan.get("id"), "rescue_value": 100.00})
+        assert exc_info.value.detail.startswith("Carência de resgate não cumprida.")
+
+        response = await client.get("/rescues/eligible-plans/")
+        assert [plan["id"] for plan in response.json()["items"]] == [old_plan.get("id")]
+
+        result_rescue = await insert_rescue(args={"plan_id": old_plan.get("id"), "rescue_value": 100.00})
+        with pytest.raises(HTTPException) as exc_info:
+            await insert_rescue(args={"plan_id": old_plan.get("id"), "rescue_value": 100.00})
+        assert exc_info.value.detail.startswith("Carência de resgate não cumprida.")
+
+        response = await client.get("/rescues/eligible-plans/")
+        assert response.json()["items"] == []
+
+        response = await client.delete(f"/rescues/delete-rescue/{result_rescue.get('id')}/")
+        assert response.status_code == 200
+
+        response = await client.get("/rescues/eligible-plans/")
+        assert [plan["id"] for plan in response.json()["items"]] == [old_plan.get("id")]
+
+
+@pytest.mark.asyncio
+async def test_rescue_waiting_periods_follow_utc_and_product_changes():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        product = {
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": "2030-11-02T19:30:24.117000+00:00",
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        }
+        result_product = await insert_product(args={**product, "expiration_of_sale": datetime.fromisoformat(product["expiration_of_sale"])})
+        plan_ids = []
+        for _ in range(3):
+            result_plan = await insert_plan(args={
+                "client_id": result_client.get("id"),
+                "product_id": result_product.get("id"),
+                "contribution": 1500.00,
+                "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+                "age_of_retirement": 65
+            })
+            plan_ids.append(result_plan.get("id"))
+
+        # Em qualquer horário, pelo menos um dos fusos está em um dia diferente do dia em UTC
+        utc_today = datetime.now(timezone.utc).date()
+        for plan_id, time_zone in zip(plan_ids[1:], ("Pacific/Kiritimati", "Etc/GMT+12")):
+            async with AppSessionLocal() as session:
+                await session.execute(text(f"SET TIME ZONE '{time_zone}'"))
+                assert await claim_rescue_window(session, plan_id, 30) == utc_today + timedelta(days=30)
+                await session.rollback()
+
+        result_rescue = await insert_rescue(args={"plan_id": plan_ids[0], "rescue_value": 100.00})
+        async with AppSessionLocal() as session:
+            rescued_at = await session.scalar(select(Rescue.created_at).where(Rescue.id == result_rescue.get("id")))
+        rescue_day = rescued_at.astimezone(timezone.utc).date()
+
+        response = await client.put(f"/products/update-product/{result_product.get('id')}/", json={**product, "lack_entre_resgates": 45})
+        assert response.status_code == 200
+        async with AppSessionLocal() as session:
+            next_eligible = await session.scalar(select(Plan.next_eligible_rescue_date).where(Plan.id == plan_ids[0]))
+        assert next_eligible == rescue_day + timedelta(days=45)
+
+
+# Tests analytics
+@pytest.mark.asyncio
+async def test_portfolio_rollups_match_rebuild():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        client_id = result_client.get("id")
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        plan_data = {
+            "client_id": client_id,
+            "product_id": result_product.get("id"),
+            "contribution": 1500.00,
+            "date_of_contract": "2024-11-02T20:46:03.566+00:00",
+            "age_of_retirement": 65
+        }
+        plan_ids = []
+        for date_of_contract in ("2024-11-02T20:46:03.566+00:00", "2024-12-10T10:00:00+00:00"):
+            response = await client.post("/plans/create-plan/", json={**plan_data, "date_of_contract": date_of_contract})
+            plan_ids.append(response.json()["id"])
+
+        await insert_extra_contribution(args={"client_id": client_id, "plan_id": plan_ids[0], "contribution_value": 500.00})
+        await insert_rescue(args={"plan_id": plan_ids[0], "rescue_value": 300.00})
+
+        response = await client.get("/analytics/aum-by-contract-month/")
+        assert [(row["contract_month"], row["plans"], float(row["aum"])) for row in response.json()] == [
+            ("2024-11-01", 1, 1700.00),
+            ("2024-12-01", 1, 1500.00),
+        ]
+
+        response = await client.put(f"/plans/update-plan/{plan_ids[1]}/", json={**plan_data, "contribution": 2000.00, "date_of_contract": "2024-11-20T10:00:00+00:00"})
+        assert response.status_code == 200
+        response = await client.put(f"/clients/update-client/{client_id}/", json={"date_of_birth": "1980-05-15", "gender": "Feminino", "monthly_income": 6000.0})
+        assert response.status_code == 200
+
+        response = await client.get("/analytics/aum-by-product/")
+        by_product = response.json()
+        assert len(by_product) == 1
+        assert by_product[0]["product"] == "Produto Teste"
+        assert by_product[0]["plans"] == 2
+        assert float(by_product[0]["aum"]) == 3700.00
+        assert float(by_product[0]["contributions"]) == 4000.00
+        assert float(by_product[0]["rescues"]) == 300.00
+
+        response = await client.get("/analytics/aum-by-age-band/")
+        incremental = response.json()
+        assert [(row["age_band"], row["plans"]) for row in incremental] == [(40, 2)]
+
+        response = await client.get("/analytics/aum-by-contract-month/")
+        incremental_months = response.json()
+
+        await rebuild_rollups()
+
+        assert (await client.get("/analytics/aum-by-age-band/")).json() == incremental
+        assert (await client.get("/analytics/aum-by-contract-month/")).json() == incremental_months
+
+
+
+# Tests idempotency
+@pytest.mark.asyncio
+async def test_create_plan_idempotency_key_replays_without_queries():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        result_product = await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        plan_data = {
+            "client_id": result_client.get("id"),
+            "product_id": result_product.get("id"),
+            "contribution": 1500.00,
+            "date_of_contract": "2024-11-02T20:46:03.566+00:00",
+            "age_of_retirement": 65
+        }
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+        responses = await asyncio.gather(*[client.post("/plans/create-plan/", json=plan_data, headers=headers) for _ in range(3)])
+        assert {response.status_code for response in responses} == {201}
+        assert len({response.json()["id"] for response in responses}) == 1
+        plan_id = responses[0].json()["id"]
+
+        statements = []
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(app_engine.sync_engine, "before_cursor_execute", record_statement)
+        try:
+            response = await client.post("/plans/create-plan/", json=plan_data, headers=headers)
+            assert response.json() == {"id": plan_id}
+            assert response.headers["idempotent-replayed"] == "true"
+            assert not [statement for statement in statements if "idempotency_key" in statement]
+
+            idempotency_cache.clear()
+            response = await client.post("/plans/create-plan/", json=plan_data, headers=headers)
+            assert response.status_code == 201
+            assert response.json() == {"id": plan_id}
+        finally:
+            event.remove(app_engine.sync_engine, "before_cursor_execute", record_statement)
+
+        assert not [statement for statement in statements if "products" in statement or "plan_balance" in statement]
+
+        response = await client.post("/plans/create-plan/", json={**plan_data, "contribution": 2000.00}, headers=headers)
+        assert response.status_code == 422
+
+        response = await client.get(f"/plans/filter-plan-by-client/{result_client.get('id')}/")
+        assert len(response.json()["items"]) == 1
+
+
+# Tests etag
+@pytest.mark.asyncio
+async def test_conditional_get_with_etag():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        await insert_product(args={
+            "name": "Produto Teste",
+            "susep": "1234567890",
+            "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+            "value_minimum_aporte_initial": 1000.00,
+            "value_minimum_aporte_extra": 100.00,
+            "entry_age": 18,
+            "age_of_exit": 45,
+            "lack_initial_of_rescue": 60,
+            "lack_entre_resgates": 30
+        })
+        client_id = result_client.get("id")
+
+        response = await client.get(f"/clients/get-one-client/{client_id}/")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        response = await client.get(f"/clients/get-one-client/{client_id}/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        response = await client.put(f"/clients/update-client/{client_id}/", json={"gender": "Feminino", "monthly_income": 7000.0})
+        assert response.status_code == 200
+
+        response = await client.get(f"/clients/get-one-client/{client_id}/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["monthly_income"] == 7000.0
+
+        response = await client.get("/products/get-product/")
+        assert response.status_code == 200
+        catalog_etag = response.headers["etag"]
+        assert "stale-while-revalidate" in response.headers["cache-control"]
+
+        statements = []
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(app_engine.sync_engine, "before_cursor_execute", record_statement)
+        try:
+            response = await client.get("/products/get-product/", headers={"If-None-Match": catalog_etag})
+        finally:
+            event.remove(app_engine.sync_engine, "before_cursor_execute", record_statement)
+        assert response.status_code == 304
+        assert statements == []
+
+        product_id = (await client.get("/products/get-product/")).json()["items"][0]["id"]
+        response = await client.get(f"/products/get-one-product/{product_id}/", headers={"If-None-Match": catalog_etag})
+        assert response.status_code == 304
+        response = await client.get("/products/get-one-product/invalido/", headers={"If-None-Match": catalog_etag})
+        assert response.status_code == 400
+        response = await client.get(f"/products/get-one-product/{uuid.uuid4()}/", headers={"If-None-Match": catalog_etag})
+        assert response.status_code == 404
+
+
+# Tests serialization
+def test_fast_json_response_serializes_decimal_and_asyncpg_uuid():
+    plan_id = PgUUID("9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a")
+    response = FastJSONResponse({"id": plan_id, "balance": Decimal("1500.10"), "products": [uuid.UUID(int=1)],
+                                 "created_at": datetime(2024, 11, 2, tzinfo=timezone.utc)})
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {
+        "id": "9c3a5b52-8f0d-4b58-9bfb-987f3a1c457a",
+        "balance": 1500.1,
+        "products": ["00000000-0000-0000-0000-000000000001"],
+        "created_at": "2024-11-02T00:00:00+00:00",
+    }
+
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+# Tests logs
+class FakeLogMessage(str):
+    def __new__(cls, text, time):
+        message = super().__new__(cls, text)
+        message.record = {"time": time}
+        return message
+
+
+class FakeLogFile:
+    def __init__(self, size):
+        self.size = size
+
+    def tell(self):
+        return self.size
+
+
+def test_size_or_time_rotation():
+    rotation = SizeOrTimeRotation(100, timedelta(hours=1))
+    start = datetime(2024, 11, 2, tzinfo=timezone.utc)
+
+    assert not rotation(FakeLogMessage("x" * 10, start), FakeLogFile(0))
+    assert not rotation(FakeLogMessage("x" * 10, start + timedelta(minutes=59)), FakeLogFile(90))
+    assert rotation(FakeLogMessage("x" * 11, start + timedelta(minutes=59)), FakeLogFile(90))
+    assert not rotation(FakeLogMessage("x", start + timedelta(minutes=61)), FakeLogFile(0))
+    assert rotation(FakeLogMessage("x", start + timedelta(minutes=119)), FakeLogFile(0))
+
+
+def test_rotated_logs_are_compressed_with_zstd(tmp_path):
+    sink_id = logger.add(tmp_path / "app.log", format="{message}",
+                         rotation=SizeOrTimeRotation(200, timedelta(hours=1)), compression=compress_zstd)
+    try:
+        for index in range(30):
+            logger.info(f"mensagem {index:02d}")
+    finally:
+        logger.remove(sink_id)
+
+    compressed = sorted(tmp_path.glob("*.zst"))
+    assert compressed and not [path for path in tmp_path.iterdir() if path.suffix == ".log" and path.name != "app.log"]
+    content = b""
+    for path in compressed:
+        with open(path, "rb") as file:
+            content += zstandard.ZstdDecompressor().stream_reader(file).read()
+    assert content.startswith(b"mensagem 00\n")
+
+
+def test_level_sampler_emits_one_in_n():
+    assert parse_sampling("success:10, INFO:0,,") == {"SUCCESS": 10, "INFO": 1}
+
+    sampler = LevelSampler({"SUCCESS": 3})
+    emitted = [sampler({"level": SimpleNamespace(name="SUCCESS")}) for _ in range(7)]
+    assert emitted == [True, False, False, True, False, False, True]
+    assert all(sampler({"level": SimpleNamespace(name="ERROR")}) for _ in range(5))
+
+
+# Tests engine options
+@pytest.mark.asyncio
+async def test_engine_options_for_pgbouncer(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_CACHE_SIZE", 50)
+    options = engine_options()
+    assert options["connect_args"]["statement_cache_size"] == options["connect_args"]["prepared_statement_cache_size"] == 50
+    assert "prepared_statement_name_func" not in options["connect_args"]
+
+    monkeypatch.setattr(settings, "DB_ECHO", True)
+    assert engine_options()["echo"] is (settings.ENVIRONMENT == "development")
+
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    options = engine_options()
+    connect_args = options["connect_args"]
+    assert connect_args["statement_cache_size"] == connect_args["prepared_statement_cache_size"] == 0
+    names = {connect_args["prepared_statement_name_func"]() for _ in range(100)}
+    assert len(names) == 100 and all(name.startswith("__asyncpg_") for name in names)
+
+    pgbouncer_engine = create_async_engine(DATABASE_URL, **options)
+    try:
+        async with pgbouncer_engine.connect() as connection:
+            for _ in range(2):
+                assert await connection.scalar(select(func.count()).select_from(Client).where(Client.cpf == "00000000000")) == 0
+            # Nenhum statement fica preparado na conexão além da própria consulta
+            assert await connection.scalar(text("SELECT count(*) FROM pg_prepared_statements")) == 1
+    finally:
+        await pgbouncer_engine.dispose()
+
+
+# Tests metrics
+def _metric(text, name, **labels):
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == name and all(sample.labels.get(key) == value for key, value in labels.items()):
+                return sample.value
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_metrics_per_route_template():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        result_client = await insert_client(args={
+            "cpf": "12345678901",
+            "name": "Cliente Teste",
+            "email": "cliente@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        route = "/clients/get-one-client/{client_id}/"
+
+        before = (await client.get("/metrics")).text
+        for _ in range(3):
+            response = await client.get(f"/clients/get-one-client/{result_client.get('id')}/")
+            assert response.status_code == 200
+        response = await client.get("/clients/get-one-client/invalido/")
+        assert response.status_code == 400
+        await client.get("/rota-inexistente/")
+
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        after = response.text
+
+        def delta(name, **labels):
+            return _metric(after, name, **labels) - _metric(before, name, **labels)
+
+        assert delta("http_requests_total", method="GET", route=route, status="200") == 3
+        assert delta("http_requests_total", method="GET", route=route, status="400") == 1
+        assert delta("http_requests_total", method="GET", route="unmatched", status="404") == 1
+        assert delta("http_request_duration_seconds_count", method="GET", route=route) == 4
+        assert delta("http_request_db_queries_total", method="GET", route=route) == 6
+        assert delta("http_request_db_seconds_total", method="GET", route=route) > 0
+        assert delta("db_pool_wait_seconds_count") >= 3
+        assert "db_pool_checked_out" in after
+        assert result_client.get("id") not in after
+
+
+# Tests query stats
+@pytest.mark.asyncio
+async def test_query_stats_fingerprints_and_slow_log(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "segredo")
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        response = await client.get("/admin/query-stats/")
+        assert response.status_code == 403
+        response = await client.delete("/admin/query-stats/", headers={"X-Admin-Token": "errado"})
+        assert response.status_code == 403
+
+        client.headers["X-Admin-Token"] = "segredo"
+        client_ids = []
+        for index in range(2):
+            result_client = await insert_client(args={
+                "cpf": f"1234567890{index}",
+                "name": "Cliente Teste",
+                "email": f"cliente{index}@teste.com",
+                "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+                "gender": "Feminino",
+                "monthly_income": 6000.0
+            })
+            client_ids.append(result_client.get("id"))
+
+        response = await client.delete("/admin/query-stats/")
+        assert response.status_code == 204
+
+        slow_queries = []
+        threshold = query_stats.threshold
+        query_stats.threshold = 0
+        sink_id = logger.add(slow_queries.append, level="WARNING", format="{message}")
+        try:
+            for client_id in client_ids:
+                response = await client.get(f"/clients/get-one-client/{client_id}/")
+                assert response.status_code == 200
+        finally:
+            logger.remove(sink_id)
+            query_stats.threshold = threshold
+
+        response = await client.get("/admin/query-stats/", params={"limit": 50})
+        assert response.status_code == 200
+        stats = response.json()
+        get_one_stats = [item for item in stats if item["caller"] == "api.v1.apps.client.service.service.get_one"]
+        assert len(get_one_stats) == 1
+        assert get_one_stats[0]["calls"] == 2
+        assert "?" in get_one_stats[0]["statement"]
+        assert not any(client_id in item["statement"] for item in stats for client_id in client_ids)
+        assert stats == sorted(stats, key=lambda item: item["total_ms"], reverse=True)
+
+        response = await client.get("/admin/query-stats/", params={"limit": 1, "order_by": "p99"})
+        assert len(response.json()) == 1
+        assert response.json()[0]["p99_ms"] == max(item["p99_ms"] for item in stats)
+
+        assert any("api.v1.apps.client.service.service.get_one" in message for message in slow_queries)
+
+
+# Tests websockets backplane
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.messages.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class SlowWebSocket(FakeWebSocket):
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def send_text(self, message):
+        await self.release.wait()
+        self.messages.append(message)
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backplane_factory", ["memory", "postgres"])
+async def test_broadcast_reaches_every_worker_once(backplane_factory):
+    hub, channel = [], f"websocket_test_{uuid.uuid4().hex}"
+    def make_backplane():
+        if backplane_factory == "memory":
+            return InMemoryBackplane(hub)
+        return PostgresBackplane(channel=channel)
+
+    workers = [ConnectionManager(make_backplane()), ConnectionManager(make_backplane())]
+    sockets = [FakeWebSocket() for _ in range(4)]
+    for index, websocket in enumerate(sockets):
+        await workers[index % 2].connect(websocket)
+
+    for worker in workers:
+        await worker.start()
+    try:
+        await workers[0].broadcast("primeira")
+        await workers[1].broadcast("segunda")
+        await workers[0].broadcast("terceira")
+        await _wait_for(lambda: all(len(websocket.messages) == 3 for websocket in sockets))
+        await asyncio.sleep(0.05)
+        assert all(websocket.messages == ["primeira", "segunda", "terceira"] for websocket in sockets)
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+
+class ChatWebSocket(FakeWebSocket):
+    def __init__(self, incoming):
+        super().__init__()
+        self.incoming = list(incoming)
+
+    async def receive_text(self):
+        await asyncio.sleep(0.05)
+        if not self.incoming:
+            raise WebSocketDisconnect()
+        return self.incoming.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_websocket_handler_survives_oversized_and_failed_messages(monkeypatch):
+    backplane = InMemoryBackplane()
+    monkeypatch.setattr(websocket_manager, "backplane", backplane)
+    publish, published = backplane.publish, []
+
+    async def flaky_publish(topics, message):
+        published.append(message)
+        if len(published) == 1:
+            raise ConnectionError("backplane indisponível")
+        await publish(topics, message)
+
+    monkeypatch.setattr(backplane, "publish", flaky_publish)
+    websocket = ChatWebSocket(["x" * (CHAT_MESSAGE_MAX_BYTES + 1), "oi", "oi de novo"])
+    await websocket_manager.start()
+    try:
+        await websocket_handler(websocket, "1")
+    finally:
+        await websocket_manager.stop()
+
+    assert websocket.messages[1::2] == ["You wrote: oi", "You wrote: oi de novo"]
+    assert [json.loads(message) for message in websocket.messages[0:3:2]] == [
+        {"error": f"Mensagem excede o limite de {CHAT_MESSAGE_MAX_BYTES} bytes."},
+        {"error": "Não foi possível enviar a mensagem. Tente novamente."},
+    ]
+    assert websocket.messages[4:] == ["Client #1 says: oi de novo"]
+    assert published[-1] == "Client #1 has left the chat"
+    assert websocket not in websocket_manager.active_connections
+    assert websocket_manager.topics == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", ["drop", "coalesce"])
+async def test_slow_websocket_consumer_does_not_stall_broadcast(policy):
+    worker = ConnectionManager(InMemoryBackplane(), queue_size=3, slow_consumer_policy=SlowConsumerPolicyEnum(policy))
+    fast, slow = FakeWebSocket(), SlowWebSocket()
+    await worker.connect(fast, "1")
+    await worker.connect(slow, "2")
+    await worker.start()
+    try:
+        messages = [f"mensagem {index}" for index in range(20)]
+        for message in messages:
+            await worker.broadcast(message)
+        await _wait_for(lambda: len(fast.messages) == 20)
+        assert fast.messages == messages
+
+        if policy == "drop":
+            await _wait_for(lambda: getattr(slow, "close_code", None) == 1013)
+            assert slow not in worker.active_connections
+            assert client_topic("2") not in worker.topics
+            assert worker.evicted == 1
+        else:
+            slow.release.set()
+            await _wait_for(lambda: slow.messages and slow.messages[-1] == messages[-1])
+            assert len(slow.messages) < len(messages)
+            assert slow.messages == sorted(slow.messages, key=messages.index)
+            assert worker.active_connections[slow].coalesced > 0
+
+        worker.disconnect(fast)
+        assert set(worker.topics) == ({client_topic("2")} if policy == "coalesce" else set())
+    finally:
+        await worker.stop()
+
+
+# Tests websockets topics
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backplane_name", ["memory", "postgres"])
+async def test_plan_events_reach_only_subscribed_sockets(backplane_name, monkeypatch):
+    if backplane_name == "memory":
+        monkeypatch.setattr(websocket_manager, "backplane", InMemoryBackplane())
+
+    result_product = await insert_product(args={
+        "name": "Produto Teste",
+        "susep": "1234567890",
+        "expiration_of_sale": datetime.fromisoformat("2030-11-02T19:30:24.117000+00:00"),
+        "value_minimum_aporte_initial": 1000.00,
+        "value_minimum_aporte_extra": 100.00,
+        "entry_age": 18,
+        "age_of_exit": 45,
+        "lack_initial_of_rescue": 60,
+        "lack_entre_resgates": 0
+    })
+
+    client_ids, plan_ids = [], []
+    for index in range(2):
+        result_client = await insert_client(args={
+            "cpf": f"1234567890{index}",
+            "name": f"Cliente {index}",
+            "email": f"cliente{index}@teste.com",
+            "date_of_birth": datetime.strptime("1990-05-15", "%Y-%m-%d").date(),
+            "gender": "Feminino",
+            "monthly_income": 6000.0
+        })
+        client_ids.append(result_client.get("id"))
+        result_plan = await insert_plan(args={
+            "client_id": client_ids[-1],
+            "product_id": result_product.get("id"),
+            "contribution": 1500.00,
+            "date_of_contract": datetime.fromisoformat("2024-11-02T20:46:03.566+00:00"),
+            "age_of_retirement": 65
+        })
+        plan_ids.append(result_plan.get("id"))
+
+    owner, other, plan_watcher = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await websocket_manager.start()
+    try:
+        await websocket_manager.connect(owner, client_ids[0])
+        await websocket_manager.connect(other, client_ids[1])
+        await websocket_manager.connect(plan_watcher)
+        websocket_manager.subscribe(plan_watcher, plan_topic(plan_ids[0]))
+        outbox_dispatcher.start()
+
+        with pytest.raises(RuntimeError):
+            async with AppSessionLocal() as session:
+                async with unit_of_work(session):
+                    await insert_extra_contribution(session=session, args={"client_id": client_ids[0], "plan_id": plan_ids[0],
+                                                                           "contribution_value": 700.00})
+                    raise RuntimeError("rollback")
+
+        # O client_id informado na requisição não é o dono do plano: os eventos seguem o dono de cada plano
+        result = await insert_extra_contribution(args={"client_id": client_ids[1], "plan_id": plan_ids[0], "contribution_value": 500.00})
+        await insert_rescue(args={"plan_id": plan_ids[0], "rescue_value": 200.00})
+        await update_extra_contribution(extra_contribution_id=result["id"], client_id=client_ids[1], plan_id=plan_ids[1],
+                                        contribution_value=500.00)
+
+        await _wait_for(lambda: len(owner.messages) == 4 and len(plan_watcher.messages) == 4 and len(other.messages) == 2)
+        await asyncio.sleep(0.1)
+        events = [json.loads(message) for message in owner.messages]
+        assert [event["event"] for event in events] == ["plan.created", "extra_contribution.created", "rescue.processed",
+                                                        "extra_contribution.updated"]
+        assert [event["balance"] for event in events] == [1500.0, 2000.0, 1800.0, 1300.0]
+        assert all(event["plan_id"] == plan_ids[0] and event["client_id"] == client_ids[0] for event in events)
+        assert plan_watcher.messages == owner.messages
+        events = [json.loads(message) for message in other.messages]
+        assert [(event["event"], event["plan_id"]) for event in events] == [("plan.created", plan_ids[1]),
+                                                                            ("extra_contribution.updated", plan_ids[1])]
+        assert events[1]["balance"] == 2000.0
+    finally:
+        for websocket in (owner, other, plan_watcher):
+            websocket_manager.disconnect(websocket)
+        await outbox_dispatcher.stop()
+        await websocket_manager.stop()
+    assert websocket_manager.topics == {}
+
+
+# Tests outbox
+class RecordingSink(OutboxSink):
+    def __init__(self, failures=None, delay=0.0):
+        self.delivered = []
+        self.failures = dict(failures or {})
+        self.delay = delay
+
+    async def deliver(self, event):
+        await asyncio.sleep(self.delay)
+        key = event["payload"]["key"]
+        if self.failures.get(key, 0) > 0:
+            self.failures[key] -= 1
+            raise RuntimeError(f"falha em {key}")
+        self.delivered.append((str(event["aggregate_id"]), event["payload"]["seq"]))
+
+
+async def _add_outbox_events(events):
+    async with AppSessionLocal() as session:
+        async with unit_of_work(session):
+            for aggregate_id, seq in events:
+                await add_event(session, "test", aggregate_id, "test.event", {"key": f"{aggregate_id}:{seq}", "seq": seq})
+
+
+@pytest.mark.asyncio
+async def test_outbox_retries_in_aggregate_order_and_dead_letters():
+    first, second, poisoned = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    await _add_outbox_events([(first, 1), (second, 1), (first, 2), (poisoned, 1), (first, 3), (poisoned, 2)])
+    sink = RecordingSink(failures={f"{first}:2": 1, f"{poisoned}:1": 99})
+
+    assert await dispatch_batch([sink], max_attempts=2) == 6
+    assert sorted(sink.delivered) == sorted([(first, 1), (second, 1)])
+
+    async with AppSessionLocal() as session:
+        retried = await session.scalar(select(OutboxEvent).where(OutboxEvent.payload["key"].astext == f"{first}:2"))
+        assert retried.attempts == 1 and retried.dispatched_at is None and "falha em" in retried.last_error
+
+    assert await dispatch_batch([sink], max_attempts=2) == 0
+
+    async with AppSessionLocal() as session:
+        async with unit_of_work(session):
+            await session.execute(update(OutboxEvent).where(OutboxEvent.dispatched_at.is_(None)).values(available_at=func.now()))
+
+    await dispatch_batch([sink], max_attempts=2)
+    assert [seq for aggregate_id, seq in sink.delivered if aggregate_id == first] == [1, 2, 3]
+    assert (poisoned, 2) in sink.delivered
+
+    async with AppSessionLocal() as session:
+        dead = await session.scalar(select(OutboxEvent).where(OutboxEvent.failed_at.is_not(None)))
+        assert dead.payload["key"] == f"{poisoned}:1" and dead.attempts == 2
+        assert await session.scalar(select(func.count()).select_from(OutboxEvent)
+                                    .where(OutboxEvent.dispatched_at.is_(None), OutboxEvent.failed_at.is_(None))) == 0
+
+    await _add_outbox_events([(second, 2)])
+    assert await purge_outbox() == 0
+    async with AppSessionLocal() as session:
+        async with unit_of_work(session):
+            old = func.now() - timedelta(days=8)
+            await session.execute(update(OutboxEvent).where(OutboxEvent.dispatched_at.is_not(None)).values(dispatched_at=old))
+            await session.execute(update(OutboxEvent).where(OutboxEvent.failed_at.is_not(None)).values(failed_at=old))
+
+    assert await purge_outbox(limit=4) == 4
+    assert await purge_outbox() == 2
+    async with AppSessionLocal() as session:
+        remaining = (await session.scalars(select(OutboxEvent))).all()
+        assert [event.payload["key"] for event in remaining] == [f"{second}:2"]
+
+
+@pytest.mark.asyncio
+async def test_outbox_concurrent_dispatchers_deliver_once_in_order():
+    aggregates = [str(uuid.uuid4()) for _ in range(5)]
+    await _add_outbox_events([(aggregate_id, seq) for seq in range(20) for aggregate_id in aggregates])
+    sink = RecordingSink(delay=0.001)
+
+    async def dispatcher():
+        while await dispatch_batch([sink], batch_size=7):
+            pass
+
+    await asyncio.gather(*(dispatcher() for _ in range(3)))
+
+    assert len(sink.delivered) == len(set(sink.delivered)) == 100
+    for aggregate_id in aggregates:
+        assert [seq for delivered_id, seq in sink.delivered if delivered_id == aggregate_id] == list(range(20))
+
+
+# Tests jobs
+@pytest.mark.asyncio
+async def test_bulk_import_job_returns_202_and_runs_on_worker():
+    async with AsyncClient(app=app, base_url="http://127.0.0.1:8080") as client:
+        content = (
+            "cpf,name,email,date_of_birth,gender,monthly_income\n"
+            "12345678902,Cliente Um,um@teste.com,1990-01-01,Masculino,5000.00\n"
+            "123,Cliente Dois,dois@teste.com,1990-01-01,Feminino,5000.00\n"
+        )
+        response = await client.post("/clients/bulk-job/", files={"file": ("clientes.csv", content, "text/csv")})
+        assert response.status_code == 202
+        accepted = response.json()
+        assert accepted["status"] == "queued"
+
+        response = await client.get(accepted["status_url"])
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+
+        await JobWorker(concurrency=2, name="teste").run(until_idle=True)
+
+        job = (await client.get(accepted["status_url"])).json()
+        assert job["status"] == "succeeded" and job["progress"] == 100 and job["attempts"] == 1
+        assert job["result"]["created"] == 1 and job["result"]["rejected"] == 1
+
+        response = await client.get("/clients/filter-client-by-email/um@teste.com/")
+        assert response.json()[0]["id"] == job["result"]["results"][0]["id"]
+
+        response = await client.get(f"/jobs/get-one-job/{uuid.uuid4()}/")
+        assert response.status_code == 404
+
+        response = await client.post("/projections/batch-job/", json={"plan_ids": ["abc"]})
+        assert response.status_code == 400
+        response = await client.post("/projections/batch-job/", json={"plan_ids": [str(uuid.uuid4())], "annual_rate": 2})
+        assert response.status_code == 400
+        response = await client.post("/projections/batch-job/", json={"plan_ids": [str(uuid.uuid4())] * (MAX_JOB_PLANS + 1)})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_job_worker_retries_bounds_concurrency_and_recovers_stale_jobs(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    running, peak, calls = 0, 0, {}
+
+    async def flaky(context, payload):
+        calls[payload["key"]] = calls.get(payload["key"], 0) + 1
+        if calls[payload["key"]] < payload["failures"] + 1:
+            raise RuntimeError("instável")
+        return {"attempts": context.attempts}
+
+    async def invalid(context, payload):
+        raise HTTPException(status_code=400, detail="Dados inválidos.")
+
+    async def slow(context, payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        await context.progress(1, 2)
+        running -= 1
+
+    monkeypatch.setitem(JOB_HANDLERS, "test.flaky", flaky)
+    monkeypatch.setitem(JOB_HANDLERS, "test.invalid", invalid)
+    monkeypatch.setitem(JOB_HANDLERS, "test.slow", slow)
+
+    retried = await enqueue_job(kind="test.flaky", payload={"key": "retried", "failures": 1})
+    exhausted = await enqueue_job(kind="test.flaky", payload={"key": "exhausted", "failures": 5}, max_attempts=2)
+    rejected = await enqueue_job(kind="test.invalid", payload={})
+    unknown = await enqueue_job(kind="test.unknown", payload={})
+    slow_jobs = [await enqueue_job(kind="test.slow", payload={}) for _ in range(6)]
+
+    await JobWorker(concurrency=2, poll_interval=0.05, name="teste").run(until_idle=True)
+
+    job = await get_job(job_id=retried["job_id"])
+    assert job["status"] == "succeeded" and job["attempts"] == 2 and job["result"] == {"attempts": 2}
+    job = await get_job(job_id=exhausted["job_id"])
+    assert job["status"] == "failed" and job["attempts"] == 2 and "instável" in job["error"]
+    job = await get_job(job_id=rejected["job_id"])
+    assert job["status"] == "failed" and job["attempts"] == 1 and job["error"] == "Dados inválidos."
+    assert (await get_job(job_id=unknown["job_id"]))["status"] == "failed"
+    assert [(await get_job(job_id=slow_job["job_id"]))["status"] for slow_job in slow_jobs] == ["succeeded"] * 6
+    assert peak == 2
+
+    stale = await enqueue_job(kind="test.slow", payload={})
+    async with AppSessionLocal() as session:
+        async with unit_of_work(session):
+            await session.execute(update(Job).where(Job.id == stale["job_id"])
+                                  .values(status="running", attempts=1, worker="parado", heartbeat_at=func.now() - text("interval '5 minutes'")))
+    assert await requeue_stale(lease_seconds=60) == 1
+    job = await get_job(job_id=stale["job_id"])
+    assert job["status"] == "queued" and "expirada" in job["error"]
+
+    assert await purge_jobs() == 0
+    async with AppSessionLocal() as session:
+        async with unit_of_work(session):
+            await session.execute(update(Job).where(Job.finished_at.is_not(None)).values(finished_at=func.now() - timedelta(days=8)))
+    assert await purge_jobs() == 10
+    async with AppSessionLocal() as session:
+        assert (await session.scalars(select(Job.id))).all() == [uuid.UUID(stale["job_id"])]
+
+
+@pytest.mark.asyncio
+async def test_job_writes_are_discarded_when_the_lease_was_lost(monkeypatch):
+    async def import_then_lose_lease(context, payload):
+        report = await clients_bulk_import(context, payload)
+        async with AppSessionLocal() as session:
+            async with unit_of_work(session):
+                await session.execute(update(Job).where(Job.id == context.job_id).values(worker="outro"))
+        return report
+
+    monkeypatch.setitem(JOB_HANDLERS, CLIENTS_BULK_IMPORT, import_then_lose_lease)
+    queued = await enqueue_job(kind=CLIENTS_BULK_IMPORT, payload={"records": [{
+        "cpf": "12345678902", "name": "Cliente Um", "email": "um@teste.com",
+        "date_of_birth": "1990-01-01", "gender": "Masculino", "monthly_income": "5000.00"
+    }]})
+
+    await JobWorker(concurrency=1, name="teste").run(until_idle=True)
+
+    job = await get_job(job_id=queued["job_id"])
+    assert job["status"] == "running" and job["result"] is None
+    async with AppSessionLocal() as session:
+        assert await session.scalar(select(func.count()).select_from(Client)) == 0
+
+
+# Tests query plans
+def _seq_scans(plan_node):
+    """Retorna as tabelas lidas com Seq Scan em qualquer nó do plano"""
+    tables = [plan_node["Relation Name"]] if plan_node["Node Type"] == "Seq Scan" else []
+    for child in plan_node.get("Plans", []):
+        tables += _seq_scans(child)
+    return tables
+
+
+class RollbackServiceCall(Exception):
+    """Desfaz as escritas feitas pelo serviço durante a captura das consultas"""
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes():
+    async with engine.begin() as conn:
+        await conn.execute(text("""
+            INSERT INTO products (id, name, susep, expiration_of_sale, value_minimum_aporte_initial, value_minimum_aporte_extra,
+                                  entry_age, age_of_exit, lack_initial_of_rescue, lack_entre_resgates)
+            SELECT gen_random_uuid(), 'Produto ' || n, '1234567890', now() + interval '5 years', 1000, 100, 18, 60, 60, 30
+            FROM generate_series(1, 2000) AS n
+        """))
+        await conn.execute(text("""
+            INSERT INTO client (id, cpf, name, email, date_of_birth, gender, monthly_income)
+            SELECT gen_random_uuid(), lpad(n::text, 11, '0'), 'Cliente ' || n, 'cliente' || n || '@teste.com', '1990-01-01', 'Outro', 5000
+            FROM generate_series(1, 5000) AS n
+        """))
+        await conn.execute(text("""
+            INSERT INTO plan (id, client_id, product_id, contribution, date_of_contract, age_of_retirement)
+            SELECT gen_random_uuid(), c.id, (SELECT id FROM products ORDER BY random() + n LIMIT 1), 1500, now(), 65
+            FROM client c, generate_series(1, 2) AS n
+        """))
+        await conn.execute(text("INSERT INTO plan_balance (plan_id, balance) SELECT id, contribution FROM plan"))
+        await conn.execute(text("""
+            INSERT INTO extra_contribution (id, client_id, plan_id, contribution_value)
+            SELECT gen_random_uuid(), p.client_id, p.id, 100 FROM plan p
+        """))
+        await conn.execute(text("INSERT INTO rescue (id, plan_id, rescue_value) SELECT gen_random_uuid(), id, 10 FROM plan"))
+        await conn.execute(text("ANALYZE"))
+
+        plan = (await conn.execute(select(Plan).limit(1))).first()
+        client = (await conn.execute(select(Client).where(Client.id == plan.client_id))).first()
+        rescue_id = await conn.scalar(select(Rescue.id).where(Rescue.plan_id == plan.id))
+        # Produto e plano sem dependentes, para que as remoções cheguem até o fim
+        empty_product_id = await conn.scalar(text("""
+            INSERT INTO products (id, name, susep, expiration_of_sale, value_minimum_aporte_initial, value_minimum_aporte_extra,
+                                  entry_age, age_of_exit, lack_initial_of_rescue, lack_entre_resgates)
+            VALUES (gen_random_uuid(), 'Produto sem planos', '1234567890', now() + interval '5 years', 1000, 100, 18, 60, 60, 30)
+            RETURNING id
+        """))
+        empty_plan_id = await conn.scalar(text("""
+            INSERT INTO plan (id, client_id, product_id, contribution, date_of_contract, age_of_retirement)
+            VALUES (gen_random_uuid(), :client_id, :product_id, 1500, now(), 65) RETURNING id
+        """), {"client_id": plan.client_id, "product_id": plan.product_id})
+
+    # As consultas são as emitidas pelas próprias funções de serviço, não cópias delas
+    service_calls = {
+        "filter-plan-by-client": lambda session: plan_service.get_plan_by_client_id(session=session, client_id=str(plan.client_id)),
+        "filter-rescue-by-plan": lambda session: rescue_service.get_rescue_by_plan_id(session=session, plan_id=str(plan.id)),
+        "filter-extra-contribution-by-client": lambda session: extra_contribution_service.get_extra_contribution_by_client_id(
+            session=session, client_id=str(plan.client_id)),
+        "filter-client-by-email": lambda session: client_service.get_client_by_email(session=session, client_email=client.email.upper()),
+        "bulk-client-cpf-check": lambda session: client_service.bulk_insert(session=session, records=[{
+            "cpf": client.cpf, "name": "Cliente Repetido", "email": "repetido@teste.com",
+            "date_of_birth": "1990-01-01", "gender": "Outro", "monthly_income": "5000.00"}]),
+        "products-by-name": lambda session: products_service.get_products_by_name(session=session, product_name="Produto 10"),
+        "debit-plan-balance": lambda session: plan_balance_service.debit(session, plan.id, 10),
+        "remove-rescue": lambda session: rescue_service.remove(session=session, rescue_id=str(rescue_id)),
+        "remove-plan": lambda session: plan_service.remove(session=session, plan_id=str(empty_plan_id)),
+        "remove-product": lambda session: products_service.remove(session=session, product_id=str(empty_product_id)),
+    }
+
+    statements = []
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+            statements.append((statement, parameters))
+
+    regressions = {}
+    async with AppSessionLocal() as session:
+        await catalog.all(session)
+    for name, call in service_calls.items():
+        statements.clear()
+        async with AppSessionLocal() as session:
+            event.listen(app_engine.sync_engine, "before_cursor_execute", record_statement)
+            try:
+                # O bloco externo impede o commit dos serviços e desfaz as escritas ao final
+                async with unit_of_work(session):
+                    await call(session)
+                    raise RollbackServiceCall()
+            except RollbackServiceCall:
+                pass
+            finally:
+                event.remove(app_engine.sync_engine, "before_cursor_execute", record_statement)
+
+        assert statements, name
+        async with app_engine.connect() as conn:
+            for statement, parameters in statements:
+                explain = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar()
+                tables = _seq_scans(explain[0]["Plan"])
+                if tables:
+                    regressions.setdefault(name, []).append((statement, tables))
+
+    assert regressions == {}
+
+    async with engine.connect() as conn:
+        assert await conn.scalar(select(func.count()).select_from(Rescue).where(Rescue.id == rescue_id)) == 1
+        assert await conn.scalar(select(func.count()).select_from(Plan).where(Plan.id == empty_plan_id)) == 1
+        assert await conn.scalar(select(func.count()).select_from(Products).where(Products.id == empty_product_id)) == 1
+        assert await conn.scalar(select(func.count()).select_from(Client).where(Client.name == "Cliente Repetido")) == 0
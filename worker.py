@@ -0,0 +1,50 @@
+from api.v1.apps.jobs.service.worker import JobWorker
+from api.v1.apps.jobs.service import handlers  # noqa: F401 (registra os tipos de job)
+from api.v1.apps.rescue.models import models as rescue_models  # noqa: F401 (relacionamento de Plan)
+from api.v1.apps.projection.service.simulation import shutdown_executor
+from api.v1.core.logs import configure_logging, shutdown_logging
+from api.v1.core.config import settings
+from database.session import engine
+import argparse
+import asyncio
+import signal
+
+"""
+    Worker dos jobs em segundo plano, separado da API (`main:app`).
+
+    Uso: python worker.py [--concurrency N] [--until-idle]
+
+    O processo tem o seu próprio pool de conexões (`DB_POOL_SIZE`), que deve comportar a
+    concorrência configurada. SIGTERM/SIGINT param a reserva de novos jobs e aguardam os que
+    estão em execução.
+
+"""
+
+
+async def _main(concurrency: int, until_idle: bool) -> None:
+    worker = JobWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run(until_idle=until_idle)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY)
+    parser.add_argument("--until-idle", action="store_true", help="encerra quando a fila estiver vazia")
+    args = parser.parse_args()
+
+    configure_logging()
+    try:
+        asyncio.run(_main(args.concurrency, args.until_idle))
+    finally:
+        shutdown_executor()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()